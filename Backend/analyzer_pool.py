@@ -0,0 +1,133 @@
+# backend/analyzer_pool.py
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from analyzers import Analyzer
+from metrics import ANALYZER_CALL_SECONDS
+
+
+class AnalyzerPool:
+    """Bounded set of asyncio workers running Analyzer calls concurrently
+
+    submit() queues a screenshot and returns a future for its verdict
+    without waiting on the analyzer. At most `workers` calls run at once and
+    at most `queue_size` screenshots wait; when the queue is full the oldest
+    waiting screenshot is dropped (its future is cancelled), since a newer
+    capture of the same screen makes it stale. Each call is cancelled after
+    `timeout` seconds, and cancelling a returned future cancels its call.
+    """
+
+    def __init__(self, analyzer: Analyzer, workers: int = 2, queue_size: int = 4,
+                 timeout: float = 30.0):
+        self.analyzer = analyzer
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._latencies = deque(maxlen=1024)  # submit -> verdict, seconds
+        self._started_at: Optional[float] = None
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancels running calls and every queued screenshot"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while self._queue is not None and not self._queue.empty():
+            self._queue.get_nowait()[1].cancel()
+
+    def submit(self, image) -> asyncio.Future:
+        self.start()
+        if self._queue.qsize() >= self.queue_size:
+            _, stale, _ = self._queue.get_nowait()
+            stale.cancel()
+            self.dropped += 1
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((image, future, time.monotonic()))
+        return future
+
+    async def analyze(self, image=None) -> dict:
+        """Submits one screenshot and waits for its verdict"""
+        return await self.submit(image)
+
+    async def _worker(self):
+        while True:
+            image, future, submitted = await self._queue.get()
+            if future.done():
+                continue  # cancelled while it waited
+
+            call = asyncio.ensure_future(
+                asyncio.wait_for(self.analyzer.analyze(image), self.timeout))
+            future.add_done_callback(lambda f, call=call: f.cancelled() and call.cancel())
+            self.in_flight += 1
+            started = time.monotonic()
+            try:
+                # wait() only raises if this worker is cancelled, not the call
+                await asyncio.wait([call])
+            except asyncio.CancelledError:
+                call.cancel()
+                future.cancel()
+                raise  # the pool itself is stopping
+            finally:
+                self.in_flight -= 1
+            duration = time.monotonic() - started
+
+            if call.cancelled():
+                self.cancelled += 1
+                ANALYZER_CALL_SECONDS.labels("cancelled").observe(duration)
+                continue
+            error = call.exception()
+            if isinstance(error, asyncio.TimeoutError):
+                self.timeouts += 1
+                error = TimeoutError(f"{self.analyzer.name} took longer than {self.timeout}s")
+                ANALYZER_CALL_SECONDS.labels("timeout").observe(duration)
+            elif error is not None:
+                self.failed += 1
+                ANALYZER_CALL_SECONDS.labels("error").observe(duration)
+            if error is not None:
+                if not future.done():
+                    future.set_exception(error)
+                continue
+
+            result = call.result()
+            self.completed += 1
+            ANALYZER_CALL_SECONDS.labels("ok").observe(duration)
+            self._latencies.append(time.monotonic() - submitted)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3)
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "analyzer": self.analyzer.name,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+            "latency_p50": pick(0.5) if latencies else None,
+            "latency_p95": pick(0.95) if latencies else None,
+            "throughput_per_min": round(self.completed * 60 / uptime, 2) if uptime else 0.0
+        }
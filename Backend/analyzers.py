@@ -0,0 +1,72 @@
+# backend/analyzers.py
+
+import asyncio
+import importlib
+import random
+from typing import Any, Dict
+
+from config import settings
+
+
+class Analyzer:
+    """Turns one screenshot into a verdict dict (see models.ThreatDetection)
+
+    Implementations must be safe to call concurrently; the analyzer pool runs
+    several analyze() calls at once and may cancel one that takes too long.
+    """
+
+    name = "analyzer"
+
+    async def analyze(self, image=None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MockAnalyzer(Analyzer):
+    """Local stand-in for a vision model: random verdicts after a fixed delay"""
+
+    name = "mock"
+
+    def __init__(self, delay: float = 2.0, jitter: float = 0.0, threat_rate: float = 0.4):
+        self.delay = delay
+        self.jitter = jitter
+        self.threat_rate = threat_rate
+
+    async def analyze(self, image=None) -> Dict[str, Any]:
+        # Simulate some processing time
+        await asyncio.sleep(max(0.0, self.delay + random.uniform(-self.jitter, self.jitter)))
+
+        # For demo purposes, randomly detect threats sometimes
+        if random.random() < self.threat_rate:
+            threat_type = random.choice(["phishing_email", "suspicious_website", "fake_login"])
+            return {
+                "threat_detected": True,
+                "threat_type": threat_type,
+                "confidence": random.randint(70, 95),
+                "explanation": f"Mock {threat_type} detected for demo purposes",
+                "user_friendly_message": f"⚠️ Mock {threat_type.replace('_', ' ')} detected!"
+            }
+        else:
+            return {
+                "threat_detected": False,
+                "threat_type": "none",
+                "confidence": 0,
+                "explanation": "No threats detected - running in mock mode",
+                "user_friendly_message": "✅ Everything looks secure!"
+            }
+
+
+def load_analyzer(spec: str) -> Analyzer:
+    """"mock", or "package.module:ClassName" for an Analyzer defined elsewhere"""
+    if spec == "mock":
+        return MockAnalyzer(delay=settings.ANALYZER_MOCK_DELAY,
+                            jitter=settings.ANALYZER_MOCK_JITTER)
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"ANALYZER must be 'mock' or 'module:Class', got {spec!r}")
+    analyzer = getattr(importlib.import_module(module_name), class_name)()
+    if not isinstance(analyzer, Analyzer):
+        raise TypeError(f"{spec} is not an Analyzer")
+    return analyzer
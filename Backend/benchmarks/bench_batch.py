@@ -0,0 +1,45 @@
+# backend/benchmarks/bench_batch.py
+#
+# Throughput of SecurityDetector.analyze_urls vs looping analyze_url over a
+# browser-history-like batch, with a cold verdict cache, plus the same loop
+# once the cache is warm. Run from Backend/:  python -m benchmarks.bench_batch
+
+import time
+
+from benchmarks.synthetic import make_domains, make_history
+from security_detector import SecurityDetector
+
+BATCH = 10000
+SIZES = [8, 10000]
+
+
+def main():
+    detector = SecurityDetector()
+    print(f"{'brands':>8} {'loop url/s':>11} {'batch url/s':>12} {'speedup':>8} "
+          f"{'warm loop url/s':>16}")
+    for size in SIZES:
+        protected = make_domains(size)
+        detector.set_protected_domains(protected)
+        urls = make_history(BATCH, protected)
+
+        detector.verdict_cache.clear()
+        start = time.perf_counter()
+        expected = [detector.analyze_url(url) for url in urls]
+        loop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = [detector.analyze_url(url) for url in urls]
+        warm_s = time.perf_counter() - start
+
+        detector.verdict_cache.clear()
+        start = time.perf_counter()
+        actual = detector.analyze_urls(urls)
+        batch_s = time.perf_counter() - start
+        assert actual == expected == warm, "analyze_urls disagrees with analyze_url"
+
+        print(f"{size:>8} {BATCH / loop_s:>11.0f} {BATCH / batch_s:>12.0f} "
+              f"{loop_s / batch_s:>7.1f}x {BATCH / warm_s:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
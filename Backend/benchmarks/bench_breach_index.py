@@ -0,0 +1,69 @@
+# backend/benchmarks/bench_breach_index.py
+#
+# Import time, disk size, resident memory, full-hash lookup and range
+# (text + binary) latency of the breached-password index. The hashes are
+# random, so a 5-digit range holds entries / 2^20 of them on average.
+# Run from Backend/:
+#   python -m benchmarks.bench_breach_index [entries]
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_threat_intel import per_call_us, rss_mb
+from breach_index import BreachIndex
+
+ENTRIES = 5_000_000
+LOOKUPS = 100_000
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else ENTRIES
+    rng = random.Random(7)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'corpus.txt')
+        hashes = []
+        with open(corpus, 'w') as f:
+            for i in range(entries):
+                sha1 = f"{rng.getrandbits(160):040X}"
+                if i % (entries // LOOKUPS or 1) == 0:
+                    hashes.append(sha1)
+                f.write(f"{sha1}:{rng.randint(1, 1000)}\n")
+
+        # Import in a separate process so its peak memory doesn't skew ours
+        path = os.path.join(tmp, 'bench.bpidx')
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'breach_index', '--file', path, 'import', corpus],
+                       check=True, stdout=subprocess.DEVNULL)
+        import_s = time.perf_counter() - start
+
+        before = rss_mb()
+        index = BreachIndex(path)
+        misses = [f"{rng.getrandbits(160):040X}" for _ in range(LOOKUPS)]
+        prefixes = [h[:5] for h in misses]
+        hit_us = per_call_us(index.lookup, hashes)
+        miss_us = per_call_us(index.lookup, misses)
+        assert all(index.lookup(h) for h in hashes[:1000])
+        text_us = per_call_us(index.range_text, prefixes)
+        binary_us = per_call_us(index.range_bytes, prefixes)
+        after = rss_mb()
+
+        stats = index.stats()
+        print(f"hashes             {stats['hashes']}")
+        print(f"import             {import_s:.2f} s (incl. interpreter start)")
+        print(f"disk               {stats['disk_bytes'] / 2**20:.1f} MB "
+              f"({stats['disk_bytes'] / entries:.1f} bytes/hash)")
+        print(f"rss after lookups  +{after - before:.1f} MB")
+        print(f"lookup hit         {hit_us:.2f} us")
+        print(f"lookup miss        {miss_us:.2f} us")
+        print(f"range (text)       {text_us:.2f} us")
+        print(f"range (binary)     {binary_us:.2f} us")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_event_store.py
+#
+# Loads a year of synthetic events into a throwaway EventStore and times
+# filtered pages (first and deep), and the per-type / per-hour aggregates.
+# Run from Backend/:  python -m benchmarks.bench_event_store [--events 1000000]
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from event_store import EventStore
+
+TYPES = ["phishing", "typosquatting", "suspicious_tld", "weak_password",
+         "fake_login", "suspicious_website", "phishing_email", "no_https"]
+TENANTS = 50
+
+
+def timed(fn, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    directory = tempfile.mkdtemp()
+    store = EventStore(os.path.join(directory, "events.db"))
+    now = time.time()
+    year = 365 * 24 * 3600
+
+    started = time.perf_counter()
+    chunk = 50_000
+    for offset in range(0, args.events, chunk):
+        for tenant in range(TENANTS):
+            events = [{"timestamp": now - rng.random() * year, "type": "threat",
+                       "threat_type": rng.choice(TYPES), "severity": rng.randint(10, 95),
+                       "damage": 1.0}
+                      for _ in range(min(chunk, args.events - offset) // TENANTS)]
+            store.add(f"user{tenant}", events)
+        store.flush()
+    load = time.perf_counter() - started
+    size = os.path.getsize(store.path) / 1e6
+    print(f"{args.events:,} events for {TENANTS} tenants loaded in {load:.1f}s "
+          f"({args.events / load:,.0f}/s), {size:.0f} MB\n")
+
+    week = (now - 7 * 24 * 3600, now)
+    cases = [
+        ("newest page", lambda: store.query("user7")),
+        ("last week, phishing", lambda: store.query("user7", *week, threat_type="phishing")),
+        ("severity >= 90", lambda: store.query("user7", min_severity=90)),
+    ]
+    for name, fn in cases:
+        ms, page = timed(fn)
+        print(f"{name:<28} {ms:7.2f} ms  ({len(page['events'])} events)")
+
+    # Walk 200 pages deep, then time the next one
+    cursor = None
+    for _ in range(200):
+        cursor = store.query("user7", cursor=cursor)["next_cursor"]
+    ms, _ = timed(lambda: store.query("user7", cursor=cursor))
+    print(f"{'page 201':<28} {ms:7.2f} ms")
+
+    ms, counts = timed(lambda: store.counts_by_type("user7"))
+    print(f"{'counts by type (year)':<28} {ms:7.2f} ms  ({sum(c['count'] for c in counts.values()):,} events)")
+    ms, hours = timed(lambda: store.counts_by_hour("user7", *week))
+    print(f"{'counts by hour (week)':<28} {ms:7.2f} ms  ({len(hours)} hours)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# backend/benchmarks/bench_keywords.py
+#
+# Per-URL keyword scan, `kw in url` loop vs the compiled KeywordMatcher.
+# Run from Backend/:  python -m benchmarks.bench_keywords
+
+import random
+import time
+
+from benchmarks.synthetic import LETTERS, make_domains, make_history
+from keyword_matcher import KeywordMatcher
+
+SIZES = [10, 1000, 5000]
+QUERIES = 5000
+BASE = ['verify', 'suspend', 'account', 'update', 'confirm',
+        'secure', 'banking', 'urgent', 'immediately', 'click-here']
+
+
+def make_keywords(n, seed=3):
+    rng = random.Random(seed)
+    keywords = list(BASE[:n])
+    while len(keywords) < n:
+        term = ''.join(rng.choice(LETTERS) for _ in range(rng.randint(3, 10)))
+        if term not in keywords:
+            keywords.append(term)
+    return keywords
+
+
+def main():
+    urls = [u.lower() for u in make_history(QUERIES, make_domains(1000))]
+    print(f"{'keywords':>9} {'loop us':>8} {'matcher us':>11} {'speedup':>8}")
+    for size in SIZES:
+        keywords = make_keywords(size)
+        matcher = KeywordMatcher(keywords)
+
+        start = time.perf_counter()
+        expected = [[kw for kw in keywords if kw in url] for url in urls]
+        loop_us = (time.perf_counter() - start) / len(urls) * 1e6
+
+        start = time.perf_counter()
+        actual = [matcher.find(url) for url in urls]
+        matcher_us = (time.perf_counter() - start) / len(urls) * 1e6
+        assert actual == expected, "matcher disagrees with the substring loop"
+
+        print(f"{size:>9} {loop_us:>8.1f} {matcher_us:>11.1f} {loop_us / matcher_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
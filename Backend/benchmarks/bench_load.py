@@ -0,0 +1,241 @@
+# backend/benchmarks/bench_load.py
+#
+# In-process load test of the FastAPI app: concurrent senders POST
+# /api/security-event while many /ws clients listen and screenshot
+# monitoring runs with the mock analyzer on synthetic frames. Requests go
+# straight into the ASGI app (no sockets, no server), so the numbers are
+# the app's own cost. Reports request latency, event -> WebSocket delivery
+# latency, event loop lag and monitor check latency, and appends the run
+# to benchmarks/results.jsonl. State files go to a temp dir.
+# Run from Backend/:  python -m benchmarks.bench_load [--clients 200 --senders 20 --seconds 10]
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.results import print_cases, record, summarize
+
+
+class ASGIClient:
+    """Just enough of an HTTP client to call an ASGI app directly"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, body=None):
+        path, _, query = path.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "root_path": "",
+            "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                        (b"content-length", str(len(payload)).encode())],
+            "client": ("127.0.0.1", 0), "server": ("bench", 80)
+        }
+        done = asyncio.Event()
+        requested = False
+        status, chunks = None, []
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body"):
+                    done.set()
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+
+class ASGIWebSocket:
+    def __init__(self, app, path: str):
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws",
+            "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "headers": [(b"host", b"bench")], "subprotocols": [],
+            "client": ("127.0.0.1", 0), "server": ("bench", 80)
+        }
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._to_app.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.create_task(app(scope, self._to_app.get, self._from_app.put))
+
+    async def accepted(self):
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            raise ConnectionError(f"WebSocket refused: {message}")
+
+    async def receive_text(self) -> str:
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            raise ConnectionError("WebSocket closed by the server")
+        return message["text"]
+
+    def send_text(self, text: str):
+        self._to_app.put_nowait({"type": "websocket.receive", "text": text})
+
+    async def close(self):
+        self._to_app.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        with contextlib.suppress(Exception):
+            await self.task
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    to_app: asyncio.Queue = asyncio.Queue()
+    from_app: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}},
+                                   to_app.get, from_app.put))
+    await to_app.put({"type": "lifespan.startup"})
+    await from_app.get()
+    try:
+        yield
+    finally:
+        await to_app.put({"type": "lifespan.shutdown"})
+        await from_app.get()
+        await task
+
+
+def synthetic_capture():
+    from PIL import Image
+    shade = iter(range(10 ** 9))
+    return lambda: Image.new('L', (640, 400), next(shade) * 37 % 256)
+
+
+async def run(args) -> Dict[str, dict]:
+    import main
+
+    # Checks as fast as the mock analyzer allows, on frames that always differ
+    main.gemini_computer_use.capture = synthetic_capture()
+    for name in ("base_interval", "interval", "min_interval", "max_interval"):
+        setattr(main.scheduler, name, args.monitor_interval)
+    main.scheduler.calls_per_minute = main.scheduler._tokens = 10 ** 6
+
+    client = ASGIClient(main.app)
+    sent_at: Dict[int, float] = {}
+    request_times: List[float] = []
+    delivery_times: List[float] = []
+    loop_lag: List[float] = []
+    statuses: Dict[int, int] = {}
+    received = 0
+    deadline = None
+
+    async def listen(ws: ASGIWebSocket):
+        nonlocal received
+        with contextlib.suppress(ConnectionError, asyncio.CancelledError):
+            while True:
+                message = json.loads(await ws.receive_text())
+                received += 1
+                explanation = str(message.get("threat", {}).get("explanation", ""))
+                if explanation.startswith("load:"):
+                    seq = int(explanation[5:])
+                    delivery_times.append(time.perf_counter() - sent_at[seq])
+
+    async def sender(worker: int):
+        rng = random.Random(worker)
+        seq = worker
+        while time.perf_counter() < deadline:
+            seq += args.senders
+            tenant = f"user{rng.randrange(args.tenants)}" if args.tenants > 1 else "default"
+            event = {"type": rng.choice(["phishing", "typosquatting", "weak_password"]),
+                     "severity": rng.randint(10, 90), "url": f"https://site{seq}.com/",
+                     "metadata": {"reason": f"load:{seq}"}}
+            started = sent_at[seq] = time.perf_counter()
+            status, _ = await client.request("POST", f"/api/security-event?tenant={tenant}", event)
+            request_times.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 429:
+                await asyncio.sleep(0.05)
+
+    async def ticker():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            loop_lag.append(max(0.0, time.perf_counter() - started - 0.01))
+
+    async with lifespan(main.app):
+        sockets = []
+        for i in range(args.clients):
+            tenant = f"user{i % args.tenants}" if args.tenants > 1 else "default"
+            ws = ASGIWebSocket(main.app, f"/ws?tenant={tenant}")
+            await ws.accepted()
+            sockets.append(ws)
+        listeners = [asyncio.create_task(listen(ws)) for ws in sockets]
+        lag = asyncio.create_task(ticker())
+        await client.request("POST", "/api/monitoring/start")
+
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        await asyncio.gather(*(sender(i) for i in range(args.senders)))
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.5)  # let the last batch reach the sockets
+
+        await client.request("POST", "/api/monitoring/stop")
+        lag.cancel()
+        for task in listeners:
+            task.cancel()
+        for ws in sockets:
+            await ws.close()
+        checks = list(main.pipeline._latencies)
+
+    return {
+        "POST /api/security-event": summarize(
+            request_times, elapsed, statuses={str(k): v for k, v in statuses.items()}),
+        "event -> /ws delivery": summarize(delivery_times, elapsed, messages_received=received),
+        "event loop lag": summarize(loop_lag),
+        "monitor check (mock analyzer)": summarize(checks, elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200, help="concurrent /ws clients")
+    parser.add_argument("--senders", type=int, default=20, help="concurrent event senders")
+    parser.add_argument("--tenants", type=int, default=1, help="spread clients and events over this many pets")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--analyzer-delay", type=float, default=0.2, help="mock analyzer seconds per call")
+    parser.add_argument("--monitor-interval", type=float, default=0.5)
+    parser.add_argument("--no-record", action="store_true", help="don't append to results.jsonl")
+    args = parser.parse_args()
+
+    os.environ["ANALYZER"] = "mock"
+    os.environ["ANALYZER_MOCK_DELAY"] = str(args.analyzer_delay)
+    os.environ.setdefault("LOG_MODE", "log")
+    os.environ.setdefault("LOG_LEVEL", "error")
+    # Pet state, journals and the event DB land in a throwaway directory
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="cyberpet-load-"))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cases = asyncio.run(run(args))
+    print(f"{args.clients} /ws clients, {args.senders} senders, {args.tenants} tenant(s), "
+          f"{args.seconds:.0f}s, mock analyzer {args.analyzer_delay}s\n")
+    print_cases(cases)
+    print(f"\nstatus codes: {cases['POST /api/security-event'].get('statuses')}, "
+          f"/ws messages received: {cases['event -> /ws delivery'].get('messages_received')}")
+    if not args.no_record:
+        record("load", cases, vars(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_micro.py
+#
+# Per-call latency of the hot paths: SecurityDetector.analyze_url over
+# synthetic URL corpora (cold and warm verdict cache), check_password_strength,
+# and the PetManager transitions (threat, good behavior, state read) against
+# a throwaway journal. Appends the run to benchmarks/results.jsonl.
+# Run from Backend/:  python -m benchmarks.bench_micro [--n 20000] [--no-record]
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.results import print_cases, record, summarize
+from benchmarks.synthetic import BRANDS, make_domains, make_history, make_urls
+from pet_journal import PetJournal
+from pet_manager import PetManager
+from security_detector import SecurityDetector
+
+
+def per_call(fn, inputs):
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        fn(value)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def url_cases(n: int) -> dict:
+    detector = SecurityDetector()
+    corpora = {
+        "brands + typosquats": make_urls(n, BRANDS, seed=1),
+        "unrelated hosts": [f"https://{d}/" for d in make_domains(n, seed=9)],
+        "browsing history": make_history(n, BRANDS, seed=2),
+    }
+    cases = {}
+    for name, urls in corpora.items():
+        detector.verdict_cache.clear()
+        cases[f"analyze_url {name} cold"] = summarize(per_call(detector.analyze_url, urls))
+        cases[f"analyze_url {name} warm"] = summarize(per_call(detector.analyze_url, urls))
+    return cases
+
+
+def password_cases(n: int) -> dict:
+    detector = SecurityDetector()
+    rng = random.Random(4)
+    inputs = [{"length": rng.randint(4, 24), "has_upper": rng.random() < 0.7,
+               "has_lower": rng.random() < 0.95, "has_numbers": rng.random() < 0.6,
+               "has_special": rng.random() < 0.3} for _ in range(n)]
+    return {"check_password_strength": summarize(per_call(detector.check_password_strength, inputs))}
+
+
+def pet_cases(n: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        pet = PetManager(PetJournal(os.path.join(tmp, "pet_state.json"),
+                                    os.path.join(tmp, "pet_state.journal"),
+                                    snapshot_every=10 ** 9))
+
+        def threat(i):
+            pet.process_threat_event(severity=10 + i % 80, threat_type="phishing_url")
+            if pet.health < 30:
+                pet.health = 100  # keep the pet alive without journaling a reset
+
+        cases = {
+            "pet threat event": summarize(per_call(threat, range(n))),
+            "pet good behavior": summarize(per_call(pet.process_good_behavior, [30] * n)),
+            "pet get_state": summarize(per_call(lambda _: pet.get_state(), range(n))),
+        }
+        pet.close()
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000, help="calls per case")
+    parser.add_argument("--no-record", action="store_true", help="don't append to results.jsonl")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        cases = {**url_cases(args.n), **password_cases(args.n), **pet_cases(args.n)}
+    print_cases(cases)
+    if not args.no_record:
+        record("micro", cases, {"n": args.n})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# backend/benchmarks/bench_offload.py
+#
+# /ws heartbeat latency while a large URL batch is analyzed. A WebSocket
+# client sends a message every few ms and times the echo; meanwhile one
+# POST /api/test/urls analyzes a batch of fresh look-alike URLs, once with
+# ?mode=inline (on the event loop, as before) and once with ?mode=pool
+# (detector processes). Fails unless the heartbeat stays flat during the
+# pooled batch: p99 within --flat-ms of the idle p99. Pool and inline
+# verdicts must also match. State files go to a temp dir.
+# Run from Backend/:  python -m benchmarks.bench_offload [--urls 20000 --processes 2]
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.bench_load import ASGIClient, ASGIWebSocket, lifespan
+from benchmarks.results import print_cases, record, summarize
+
+BRANDS = ['paypal', 'google', 'amazon', 'microsoft', 'github', 'linkedin']
+
+
+def look_alikes(n: int, seed: int) -> List[str]:
+    """Distinct URLs, a third of them one edit away from a protected brand"""
+    rng = random.Random(seed)
+    urls = []
+    for i in range(n):
+        if i % 3 == 0:
+            brand = list(rng.choice(BRANDS))
+            brand[rng.randrange(len(brand))] = rng.choice('abcdefghijklmnopqrstuvwxyz0123456789')
+            host = f"{''.join(brand)}{i}.com" if i % 2 else f"{''.join(brand)}.com"
+        else:
+            host = f"site{seed}-{i}.{rng.choice(['com', 'net', 'org', 'xyz', 'tk'])}"
+        urls.append(f"https://{host}/{rng.choice(['', 'login', 'verify/account', 'home'])}?n={i}")
+    return urls
+
+
+async def heartbeat(ws: ASGIWebSocket, samples: List[float], interval: float):
+    """Beats on a fixed schedule, like a client with its own clock: each
+    sample runs from when the beat was due to when its echo arrived, so
+    time the event loop spends blocked counts against it"""
+    with contextlib.suppress(ConnectionError, asyncio.CancelledError):
+        due = time.perf_counter()
+        seq = 0
+        while True:
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            seq += 1
+            ws.send_text(f"beat:{seq}")
+            while json.loads(await ws.receive_text()).get("echo") != f"beat:{seq}":
+                pass  # a broadcast, not our echo
+            samples.append(time.perf_counter() - due)
+            due += interval
+
+
+async def run(args) -> dict:
+    import main
+    client = ASGIClient(main.app)
+    cases, mismatches = {}, []
+
+    async with lifespan(main.app):
+        # Every pool process has loaded and warmed its detector
+        await asyncio.gather(*map(asyncio.wrap_future, main.offload.warm_up()))
+        main.security_detector.warm_up()
+        ws = ASGIWebSocket(main.app, "/ws")
+        await ws.accepted()
+
+        idle: List[float] = []
+        beat = asyncio.create_task(heartbeat(ws, idle, args.interval))
+        await asyncio.sleep(args.idle)
+        beat.cancel()
+        await beat
+        cases["heartbeat idle"] = summarize(idle)
+
+        for mode in ("inline", "pool"):
+            # Fresh hosts per mode, so neither run hits the other's verdict cache
+            urls = look_alikes(args.urls, seed=len(cases))
+            samples: List[float] = []
+            beat = asyncio.create_task(heartbeat(ws, samples, args.interval))
+            await asyncio.sleep(args.interval * 5)
+            started = time.perf_counter()
+            status, body = await client.request("POST", f"/api/test/urls?mode={mode}", {"urls": urls})
+            elapsed = time.perf_counter() - started
+            await asyncio.sleep(args.interval * 5)
+            beat.cancel()
+            await beat
+            assert status == 200, (status, body[:200])
+            cases[f"heartbeat during batch ({mode})"] = summarize(samples)
+            cases[f"POST /api/test/urls x{args.urls} ({mode})"] = summarize([elapsed])
+            # Same URLs again through the other path; compared now and
+            # dropped, so the next run doesn't pay GC time for our copies
+            other = "inline" if mode == "pool" else "pool"
+            _, again = await client.request("POST", f"/api/test/urls?mode={other}", {"urls": urls})
+            if json.loads(body) != json.loads(again):
+                mismatches.append(mode)
+            del body, again
+
+        await ws.close()
+        stats = main.offload.stats()
+
+    return {"cases": cases, "mismatches": mismatches, "offload": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=20000, help="URLs in the batch")
+    parser.add_argument("--processes", type=int, default=2, help="DETECTOR_PROCESSES")
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between heartbeats")
+    parser.add_argument("--idle", type=float, default=1.0, help="seconds of idle heartbeats")
+    parser.add_argument("--flat-ms", type=float, default=50, help="allowed p99 rise while pooled")
+    parser.add_argument("--no-record", action="store_true", help="don't append to results.jsonl")
+    args = parser.parse_args()
+
+    os.environ.update({"DETECTOR_PROCESSES": str(args.processes), "WARM_UP_ON_STARTUP": "0"})
+    os.environ.setdefault("LOG_MODE", "log")
+    os.environ.setdefault("LOG_LEVEL", "error")
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="cyberpet-offload-"))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(run(args))
+    cases = result["cases"]
+    print(f"{os.cpu_count()} CPUs, {args.processes} detector processes, "
+          f"{args.urls} URLs, heartbeat every {args.interval * 1000:.0f} ms\n")
+    print_cases(cases)
+    print(f"\noffload: {result['offload']}")
+
+    failures = []
+    for mode in result["mismatches"]:
+        failures.append(f"{mode} and the other mode disagree on the same URLs")
+    idle_p99 = cases["heartbeat idle"]["p99_ms"]
+    pooled_p99 = cases["heartbeat during batch (pool)"]["p99_ms"]
+    if pooled_p99 > idle_p99 + args.flat_ms:
+        failures.append(f"heartbeat p99 {pooled_p99:.1f} ms during the pooled batch "
+                        f"vs {idle_p99:.1f} ms idle")
+    if not args.no_record and not failures:
+        record("offload", cases, vars(args))
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
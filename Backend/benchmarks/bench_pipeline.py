@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_pipeline.py
+#
+# Verdicts per minute and capture -> verdict latency with the mock analyzer,
+# for the old one-check-at-a-time loop vs MonitorPipeline with a worker pool.
+# Every synthetic frame differs, so nothing is skipped by the frame differ.
+# Run from Backend/:  python -m benchmarks.bench_pipeline [--delay 2 --workers 4]
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from PIL import Image
+
+from analyzers import MockAnalyzer
+from gemini_computer_use import GeminiComputerUse
+from monitor_pipeline import MonitorPipeline
+from monitor_scheduler import MonitorScheduler
+
+
+def make_capture(capture_delay):
+    shade = iter(range(10 ** 9))
+
+    def capture():
+        time.sleep(capture_delay)
+        return Image.new('L', (640, 400), next(shade) * 37 % 256)
+    return capture
+
+
+def make_source(args):
+    source = GeminiComputerUse(
+        analyzer=MockAnalyzer(delay=args.delay, jitter=args.jitter),
+        capture=make_capture(args.capture_delay))
+    source.pool.workers = args.workers
+    source.pool.queue_size = args.workers * 2
+    return source
+
+
+def make_scheduler(interval):
+    return MonitorScheduler(interval=interval, min_interval=interval, max_interval=interval,
+                            jitter=0, calls_per_minute=10 ** 6)
+
+
+async def serial(args):
+    """The old monitor_loop: capture, analyze, update, then wait for the next tick"""
+    source, scheduler = make_source(args), make_scheduler(args.interval)
+    latencies = []
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        await scheduler.wait()
+        started = time.monotonic()
+        await source.analyze_and_act()
+        latencies.append(time.monotonic() - started)
+    await source.close()
+    return len(latencies) * 60 / args.seconds, latencies
+
+
+async def pipelined(args):
+    source, scheduler = make_source(args), make_scheduler(args.interval)
+
+    async def handle(result, elapsed):
+        pass
+
+    pipeline = MonitorPipeline(source, scheduler, handle, max_pending=args.workers * 2)
+    task = asyncio.create_task(pipeline.run())
+    await asyncio.sleep(args.seconds)
+    stats = pipeline.stats()
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    latencies = list(pipeline._latencies)
+    await source.close()
+    return stats["handled"] * 60 / args.seconds, latencies
+
+
+def report(name, per_minute, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    print(f"{name:<12} {per_minute:7.1f} verdicts/min   latency p50 "
+          f"{latencies[len(latencies) // 2]:5.2f}s  p95 {p95:5.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=2.0, help="mock analyzer seconds per call")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--capture-delay", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between captures")
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"mock delay {args.delay}s ±{args.jitter}, capture {args.capture_delay}s, "
+          f"one capture every {args.interval}s, {args.workers} workers, {args.seconds}s each\n")
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [("serial", asyncio.run(serial(args))),
+                   ("pipelined", asyncio.run(pipelined(args)))]
+    for name, (per_minute, latencies) in results:
+        report(name, per_minute, latencies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# backend/benchmarks/bench_scheduler.py
+#
+# Simulated workday of screen activity under the old fixed 30 s sleep and
+# under MonitorScheduler (with unchanged frames skipped, as FrameDiffer
+# does): analyzer calls per hour and real latency from a screen change to
+# the check that sees it. Runs on a virtual clock.
+# Run from Backend/:  python -m benchmarks.bench_scheduler
+
+import asyncio
+import random
+import statistics
+
+import monitor_scheduler
+from monitor_scheduler import MonitorScheduler
+
+HOURS = 8
+ANALYSIS_SECONDS = 2.0
+THREAT_RATE = 0.02  # chance a screen change is a threat
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+def activity(seed=7):
+    """(time, is_threat) screen changes: bursts of clicking between quiet reading"""
+    rng = random.Random(seed)
+    t, changes = 0.0, []
+    while t < HOURS * 3600:
+        t += rng.expovariate(1 / 300)
+        for _ in range(1 + int(rng.expovariate(1 / 4))):
+            t += rng.expovariate(1 / 10)
+            changes.append((t, rng.random() < THREAT_RATE))
+    return changes
+
+
+async def simulate(scheduler, clock, changes, fixed=None):
+    latencies, calls, skips, i = [], 0, 0, 0
+    while clock.now < HOURS * 3600:
+        if fixed is None:
+            await scheduler.wait()
+        elif clock.now:
+            # Old loop: sleep after the check, so analysis time adds to the gap
+            await clock.sleep(fixed)
+        start = i
+        while i < len(changes) and changes[i][0] <= clock.now:
+            i += 1
+        changed = i > start
+        threat = any(is_threat for _, is_threat in changes[start:i])
+        analyzed = fixed is not None or changed or skips >= 10
+        if analyzed:
+            clock.now += ANALYSIS_SECONDS
+            calls += 1
+            skips = 0
+        else:
+            skips += 1
+        latencies.extend(clock.now - t for t, _ in changes[start:i])
+        if fixed is None:
+            if analyzed:
+                scheduler.charge()
+            scheduler.record(threat=threat, changed=changed, large_change=changed)
+    return calls / HOURS, latencies
+
+
+def report(name, calls_per_hour, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * len(latencies))]
+    print(f"{name:<26} {calls_per_hour:>8.0f} calls/h   latency avg "
+          f"{statistics.mean(latencies):5.1f}s  p95 {p95:5.1f}s  max {latencies[-1]:5.1f}s")
+
+
+def main():
+    changes = activity()
+    print(f"{HOURS} h simulated, {len(changes)} screen changes, "
+          f"{sum(t for _, t in changes)} threats\n")
+
+    clock = VirtualClock()
+    monitor_scheduler.asyncio.sleep = clock.sleep
+    report("fixed 30s sleep", *asyncio.run(simulate(None, clock, changes, fixed=30)))
+
+    for budget in (6, 3):
+        clock = VirtualClock()
+        monitor_scheduler.asyncio.sleep = clock.sleep
+        scheduler = MonitorScheduler(interval=30, calls_per_minute=budget, clock=clock)
+        report(f"adaptive ({budget} calls/min)", *asyncio.run(simulate(scheduler, clock, changes)))
+        print(f"{'':<26} {scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    main()
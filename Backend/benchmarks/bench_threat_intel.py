@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_threat_intel.py
+#
+# Import time, disk size, resident memory and lookup latency of a threat
+# store at 1M+ entries. Run from Backend/:
+#   python -m benchmarks.bench_threat_intel [entries]
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from threat_intel import ThreatIntel, ThreatStore
+
+ENTRIES = 1_000_000
+LOOKUPS = 100_000
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux), or 0 where /proc isn't available"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def per_call_us(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else ENTRIES
+    rng = random.Random(5)
+    bad = [f"{rng.getrandbits(48):x}-login.com" for _ in range(entries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        blocklist = os.path.join(tmp, 'blocklist.txt')
+        with open(blocklist, 'w') as f:
+            for host in bad:
+                f.write(f"0.0.0.0 {host}\n")
+
+        # Import in a separate process so its peak memory doesn't skew ours
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'threat_intel', '--dir', tmp,
+                        'import-blocklist', 'bench', blocklist],
+                       check=True, stdout=subprocess.DEVNULL)
+        import_s = time.perf_counter() - start
+
+        before = rss_mb()
+        intel = ThreatIntel(tmp)
+        store = intel.stores['bench']
+
+        hits = rng.sample(bad, LOOKUPS)
+        misses = [f"{rng.getrandbits(48):x}-safe.org" for _ in range(LOOKUPS)]
+        hit_us = per_call_us(intel.lookup, hits)
+        miss_us = per_call_us(intel.lookup, misses)
+        assert all(intel.lookup(h) for h in hits[:1000])
+        false_positives = sum(1 for m in misses if intel.lookup(m))
+        after = rss_mb()
+
+        # Deltas and compaction go through a writable store, like the CLI
+        store = ThreatStore(store.base, writable=True)
+        start = time.perf_counter()
+        store.apply_delta(adds=[rng.getrandbits(64) for _ in range(1000)])
+        delta_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        store.compact()
+        compact_s = time.perf_counter() - start
+
+        stats = store.stats()
+        print(f"entries            {stats['entries']}")
+        print(f"import             {import_s:.2f} s (incl. interpreter start)")
+        print(f"disk               {stats['disk_bytes'] / 2**20:.1f} MB "
+              f"({stats['disk_bytes'] / entries:.1f} bytes/entry)")
+        print(f"rss after lookups  +{after - before:.1f} MB")
+        print(f"lookup hit         {hit_us:.2f} us")
+        print(f"lookup miss        {miss_us:.2f} us "
+              f"({false_positives} false positives in {LOOKUPS})")
+        print(f"delta (1k adds)    {delta_ms:.1f} ms")
+        print(f"compact            {compact_s:.2f} s")
+        intel.load()  # reopen against the compacted files
+        assert isinstance(intel.stores['bench'], ThreatStore)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# backend/benchmarks/bench_typosquat.py
+#
+# Per-URL typosquat lookup latency, plain linear Levenshtein scan vs
+# the length-bucketed TyposquatScan.
+# Run from Backend/:  python -m benchmarks.bench_typosquat
+
+import time
+
+import Levenshtein
+
+from benchmarks.synthetic import make_domains, make_urls
+from typosquat_scan import TyposquatScan
+
+SIZES = [8, 1000, 10000]
+QUERIES = 2000
+
+
+def linear_match(domain, protected):
+    """The original check 3: first brand with 0.75 < ratio < 1.0"""
+    if domain in protected:
+        return None
+    for legit in protected:
+        if 0.75 < Levenshtein.ratio(domain, legit) < 1.0:
+            return legit
+    return None
+
+
+def host(url):
+    return url.split('://', 1)[1].split('/', 1)[0].replace('www.', '')
+
+
+def timed(fn, domains):
+    start = time.perf_counter()
+    results = [fn(d) for d in domains]
+    return results, (time.perf_counter() - start) / len(domains) * 1e6
+
+
+def main():
+    print(f"{'brands':>8} {'build ms':>9} {'linear us':>10} {'scan us':>9} {'speedup':>8}")
+    for size in SIZES:
+        protected = make_domains(size)
+        protected_set = set(protected)
+        domains = [host(u) for u in make_urls(QUERIES, protected)]
+
+        start = time.perf_counter()
+        scan = TyposquatScan(protected)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        expected, linear_us = timed(
+            lambda d: linear_match(d, protected) if d not in protected_set else None,
+            domains)
+        actual, scan_us = timed(scan.match, domains)
+        assert actual == expected, "TyposquatScan disagrees with linear scan"
+
+        print(f"{size:>8} {build_ms:>9.1f} {linear_us:>10.1f} {scan_us:>9.1f} "
+              f"{linear_us / scan_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# backend/benchmarks/bench_workers.py
+#
+# Multi-worker check: starts N worker processes that share one
+# SHARED_STATE_DB (what `uvicorn main:app --workers N` does), each driving
+# its own copy of the app in-process like bench_load. Measures URL-check
+# throughput for each N and checks that
+#   - a /ws client on one worker receives events posted to another,
+#   - the shared pet ends up with every event applied exactly once,
+#   - exactly one worker runs screenshot monitoring.
+# Exits 1 if a check fails. State files go to a temp dir.
+# Run from Backend/:  python -m benchmarks.bench_workers [--workers 1 2 4 --seconds 5]
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_load import ASGIClient, ASGIWebSocket, lifespan, synthetic_capture
+from benchmarks.results import print_cases, record, summarize
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker(index: int, workdir: str, args, start, results):
+    os.environ.update({"SHARED_STATE_DB": os.path.join(workdir, "shared.db"), "ANALYZER": "mock",
+                       "ANALYZER_MOCK_DELAY": "0.05", "LOG_MODE": "log", "LOG_LEVEL": "error",
+                       "WARM_UP_ON_STARTUP": "0"})
+    sys.path.insert(0, BACKEND)
+    os.chdir(workdir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        results.put(asyncio.run(drive(index, args, start)))
+
+
+async def drive(index: int, args, start) -> dict:
+    import main
+    main.gemini_computer_use.capture = synthetic_capture()
+    client = ASGIClient(main.app)
+    received = []
+    times = []
+
+    async with lifespan(main.app):
+        ws = ASGIWebSocket(main.app, "/ws?tenant=shared")
+        await ws.accepted()
+
+        async def listen():
+            with contextlib.suppress(ConnectionError, asyncio.CancelledError):
+                while True:
+                    message = json.loads(await ws.receive_text())
+                    explanation = str(message.get("threat", {}).get("explanation", ""))
+                    if explanation.startswith("worker"):
+                        received.append(explanation)
+
+        listener = asyncio.create_task(listen())
+        await asyncio.get_running_loop().run_in_executor(None, start.wait)
+
+        # URL checks: CPU-bound, so throughput should grow with workers
+        deadline = time.perf_counter() + args.seconds
+        seq = 0
+        while time.perf_counter() < deadline:
+            seq += 1
+            started = time.perf_counter()
+            await client.request("POST", "/api/test/url", {"url": f"https://paypa1-{index}-{seq}.com/login"})
+            times.append(time.perf_counter() - started)
+
+        # Every worker asks for monitoring; only one may run it
+        await client.request("POST", "/api/monitoring/start")
+        for n in range(args.events):
+            event = {"type": "phishing", "severity": 1, "url": f"https://w{index}-{n}.com/",
+                     "metadata": {"reason": f"worker{index}:{n}"}}
+            await client.request("POST", "/api/security-event?tenant=shared", event)
+        await asyncio.sleep(args.settle)
+        running_here = main.monitoring_task is not None and not main.monitoring_task.done()
+        _, body = await client.request("GET", "/api/pet-state?tenant=shared")
+
+        await client.request("POST", "/api/monitoring/stop")
+        listener.cancel()
+        await ws.close()
+
+    return {"index": index, "url_checks": times, "received": sorted(set(received)),
+            "monitoring_here": running_here, "pet": json.loads(body)}
+
+
+def run(n: int, args) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    results = ctx.Queue()
+    with tempfile.TemporaryDirectory(prefix="cyberpet-workers-") as workdir:
+        procs = [ctx.Process(target=worker, args=(i, workdir, args, start, results)) for i in range(n)]
+        for proc in procs:
+            proc.start()
+        time.sleep(args.boot)  # every worker imported main and opened its socket
+        start.set()
+        outcomes = [results.get(timeout=args.seconds + args.settle + 120) for _ in procs]
+        for proc in procs:
+            proc.join()
+
+    url_times = [t for o in outcomes for t in o["url_checks"]]
+    posted = {f"worker{o['index']}:{e}" for o in outcomes for e in range(args.events)}
+    failures = []
+    for o in outcomes:
+        missing = posted - set(o["received"])
+        if missing:
+            failures.append(f"worker {o['index']}'s /ws client missed {len(missing)} of {len(posted)} events")
+    owners = sum(o["monitoring_here"] for o in outcomes)
+    if owners != 1:
+        failures.append(f"{owners} workers ran monitoring at once")
+    # Severity 1 costs 0.2 health, so a lost or doubled update shows up here
+    expected = round(100 - 0.2 * len(posted), 1)
+    healths = {o["pet"]["health"] for o in outcomes}
+    if healths != {expected}:
+        failures.append(f"pet health {sorted(healths)} on the workers, expected {expected}")
+    case = summarize(url_times, args.seconds, workers=n, monitoring_owners=owners,
+                     events_delivered=min(len(o["received"]) for o in outcomes))
+    return {"case": case, "failures": failures}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=5, help="URL checks per worker")
+    parser.add_argument("--events", type=int, default=20, help="security events posted per worker")
+    parser.add_argument("--settle", type=float, default=1.5, help="seconds for broadcasts and the lease")
+    parser.add_argument("--boot", type=float, default=3, help="seconds to let workers start")
+    parser.add_argument("--no-record", action="store_true", help="don't append to results.jsonl")
+    args = parser.parse_args()
+
+    cases, failures = {}, []
+    for n in args.workers:
+        result = run(n, args)
+        cases[f"POST /api/test/url x{n} workers"] = result["case"]
+        failures += [f"{n} workers: {f}" for f in result["failures"]]
+    print(f"{os.cpu_count()} CPUs, {args.seconds:.0f}s of URL checks, {args.events} events per worker\n")
+    print_cases(cases)
+    if not args.no_record and not failures:
+        record("workers", cases, vars(args))
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
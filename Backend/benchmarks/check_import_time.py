@@ -0,0 +1,89 @@
+# backend/benchmarks/check_import_time.py
+#
+# Cold-start check for the backend. Imports main in fresh interpreters with
+# -X importtime and fails (exit 1) when
+#   - a module that should only load lazily (numpy, Pillow, the analyzer and
+#     capture backends, threat-intel stores) is imported by `import main`, or
+#   - the median import time exceeds --budget-ms, or regressed by more than
+#     --max-regression against the last recorded run on this machine.
+# Prints the slowest modules and appends the run to benchmarks/results.jsonl.
+# Run from Backend/:  python -m benchmarks.check_import_time [--budget-ms 1500]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.results import load, record, summarize
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Loaded on first use or by the startup warm-up, never by the import itself
+LAZY = ["numpy", "PIL", "pyautogui", "google.generativeai", "playwright",
+        "frame_diff", "screen_cache", "threat_intel"]
+
+
+def import_times(module: str = "main") -> dict:
+    """{module: (self us, cumulative us)} for one cold interpreter"""
+    with tempfile.TemporaryDirectory() as cwd:
+        env = {**os.environ, "PYTHONPATH": BACKEND, "LOG_MODE": "log", "LOG_LEVEL": "error"}
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail above this median")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="fail if the median is this much slower than the last recorded run")
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--no-record", action="store_true")
+    args = parser.parse_args()
+
+    import_times()  # first run writes .pyc files; don't count it
+    runs = [import_times() for _ in range(args.runs)]
+    totals = [run["main"][1] / 1e6 for run in runs]
+    median_ms = statistics.median(totals) * 1000
+
+    last = runs[-1]
+    print(f"import main: median {median_ms:.0f} ms over {args.runs} runs\n")
+    print(f"{'module':<40} {'self ms':>8} {'cumulative ms':>14}")
+    for name, (own, cumulative) in sorted(last.items(), key=lambda kv: -kv[1][0])[:args.top]:
+        print(f"{name:<40} {own / 1000:>8.1f} {cumulative / 1000:>14.1f}")
+
+    failures = []
+    eager = [name for name in LAZY if name in last]
+    if eager:
+        failures.append(f"imported eagerly by `import main`: {', '.join(eager)}")
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        failures.append(f"median {median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+    previous = [r for r in load() if r["suite"] == "import"]
+    if previous:
+        before = previous[-1]["cases"]["import main"]["p50_ms"]
+        if median_ms > before * (1 + args.max_regression):
+            failures.append(f"median {median_ms:.0f} ms vs {before:.0f} ms at "
+                            f"{previous[-1]['commit']} (more than {args.max_regression:.0%} slower)")
+
+    if not args.no_record and not failures:
+        record("import", {"import main": summarize(totals)}, {"runs": args.runs})
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# backend/benchmarks/check_pet_bulk.py
+#
+# Property check for PetManager.advance / apply_events: random starting
+# pets (any health, stage, points, streak) and random backlogs of threats
+# and good-behavior tick runs, applied once in bulk and once a tick / an
+# event at a time through _apply_good_behavior and _apply_threat. Fails
+# (exit 1) unless health, stage, points, streak and the event history come
+# out identical and the bulk path journaled exactly one entry. Then times
+# a long catch-up both ways.
+# Run from Backend/:  python -m benchmarks.check_pet_bulk [--cases 2000 --seed 1]
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from pet_journal import PetJournal
+from pet_manager import PetManager
+
+FIELDS = ("health", "evolution_stage", "points", "good_behavior_streak")
+
+
+def random_state(rng: random.Random) -> dict:
+    health = rng.choice([100, 0, 69.8, 70, rng.uniform(0, 100), 100 - 0.2 * rng.randrange(500)])
+    return {"health": health, "evolution_stage": rng.randint(1, 4),
+            "points": rng.choice([0, rng.randrange(4000), 10 * rng.randrange(400)]),
+            "streak": rng.randrange(50), "event_history": []}
+
+
+def random_batch(rng: random.Random) -> list:
+    batch = []
+    for _ in range(rng.randint(0, 30)):
+        if rng.random() < 0.4:
+            batch.append(rng.choice([0, 1, rng.randrange(20), rng.randrange(400), rng.randrange(5000)]))
+        else:
+            batch.append((rng.randint(0, 100), rng.choice(["phishing", "weak_password", "malware"])))
+    return batch
+
+
+def one_at_a_time(pet: PetManager, batch: list):
+    for item in batch:
+        if isinstance(item, int):
+            for _ in range(item):
+                pet._apply_good_behavior()
+        else:
+            pet._apply_threat(*item)
+
+
+def snapshot(pet: PetManager) -> tuple:
+    history = [{k: v for k, v in e.items() if k != "timestamp"} for e in pet.event_history]
+    return tuple(getattr(pet, f) for f in FIELDS), history
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--ticks", type=int, default=100_000, help="catch-up length to time")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        bulk = PetManager(PetJournal(os.path.join(tmp, "a.json"), os.path.join(tmp, "a.journal")))
+        ref = PetManager(PetJournal(os.path.join(tmp, "b.json"), os.path.join(tmp, "b.journal")))
+        appended = []
+        append = bulk.journal.append
+        bulk.journal.append = lambda entry: (appended.append(entry), append(entry))
+
+        for case in range(args.cases):
+            state, batch = random_state(rng), random_batch(rng)
+            bulk._apply_loaded(state)
+            ref._apply_loaded(state)
+            appended.clear()
+            if batch and all(isinstance(item, int) for item in batch) and case % 2:
+                bulk.advance(sum(batch))
+            else:
+                bulk.apply_events(batch)
+            one_at_a_time(ref, batch)
+            if snapshot(bulk) != snapshot(ref):
+                failures.append(f"case {case}: start {state}, batch {batch}\n"
+                                f"  bulk {snapshot(bulk)[0]}\n  each {snapshot(ref)[0]}")
+            if len(appended) != 1:
+                failures.append(f"case {case}: {len(appended)} journal entries, expected 1")
+
+        # Catch-up timing: hours of safe checks after downtime
+        start = random_state(random.Random(0))
+        bulk._apply_loaded(start)
+        started = time.perf_counter()
+        bulk.advance(args.ticks)
+        bulk_s = time.perf_counter() - started
+        ref._apply_loaded(start)
+        started = time.perf_counter()
+        for _ in range(args.ticks):
+            ref.process_good_behavior(30)
+        each_s = time.perf_counter() - started
+        if snapshot(bulk) != snapshot(ref):
+            failures.append(f"catch-up of {args.ticks} ticks differs")
+        bulk.close()
+        ref.close()
+
+    print(f"{args.cases} random pets and backlogs, bulk vs one at a time")
+    print(f"catch-up of {args.ticks} ticks: advance {bulk_s * 1000:.3f} ms, "
+          f"process_good_behavior x{args.ticks} {each_s * 1000:.0f} ms")
+    for failure in failures[:10]:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
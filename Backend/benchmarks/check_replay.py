@@ -0,0 +1,60 @@
+# backend/benchmarks/check_replay.py
+#
+# replay.py on a small log mixing good events, URLs and bad records (JSON
+# that won't decode, non-objects, null and non-numeric severities). Fails
+# (exit 1) unless the replay runs to the end, applies exactly the good
+# events and counts every bad record instead of stopping on it.
+# Run from Backend/:  python -m benchmarks.check_replay
+
+import json
+import os
+import sys
+import tempfile
+
+from replay import replay
+
+LINES = [
+    {"type": "phishing", "severity": 80, "timestamp": "2025-11-02T10:15:00"},
+    {"type": "x", "severity": None},
+    {"type": "x", "severity": "high"},
+    {"type": "x", "severity": [1]},
+    {"type": "malware", "severity": "60", "timestamp": 1730542500},
+    {"url": "https://www.google.com/", "timestamp": 1730542501},
+    ["not", "an", "object"],
+    {"note": "no type or url"},
+]
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.jsonl")
+        with open(path, "w") as f:
+            for line in LINES:
+                f.write(json.dumps(line) + "\n")
+            f.write("{not json\n")
+            f.write(json.dumps({"type": "weak_password", "severity": 40}) + "\n")
+
+        try:
+            report = replay(path, batch_size=3, state_dir=tmp)
+        except Exception as e:
+            report = None
+            failures.append(f"replay stopped: {type(e).__name__}: {e}")
+
+    if report is not None:
+        counts = report["counts"]
+        print(json.dumps(counts, indent=2))
+        expected = {"lines": 10, "events": 3, "bad_lines": 4, "skipped": 2, "urls_safe": 1}
+        for key, value in expected.items():
+            if counts.get(key, 0) != value:
+                failures.append(f"counts[{key!r}] is {counts.get(key, 0)}, expected {value}")
+
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# backend/benchmarks/check_ws_streams.py
+#
+# Delta /ws stream checks against the in-process app (state in a temp dir):
+#   - a tenant's last client leaves, the pet changes, a delta client
+#     reconnects: its snapshot must show the current state under a seq
+#     higher than any it was sent before,
+#   - a resync from a seq seen before the reconnect must still bring the
+#     client to the current state,
+#   - a resync with a bad 'since' gets an error frame and the socket keeps
+#     working; once it closes, no client is left registered,
+#   - a handshake that fails in accept() leaves no client or stream behind.
+# Exits 1 if a check fails.
+# Run from Backend/:  python -m benchmarks.check_ws_streams
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.bench_load import ASGIClient, ASGIWebSocket, lifespan
+
+TENANT = "wscheck"
+
+
+async def next_state(ws: ASGIWebSocket) -> dict:
+    """The next snapshot or delta message, skipping anything else; {} if
+    none arrives within 5 s"""
+    try:
+        while True:
+            message = json.loads(await asyncio.wait_for(ws.receive_text(), 5))
+            if message.get("type") in ("pet_snapshot", "pet_delta"):
+                return message
+    except asyncio.TimeoutError:
+        return {}
+
+
+async def next_message(ws: ASGIWebSocket) -> dict:
+    """The next message that isn't a state update; {} if none within 5 s"""
+    try:
+        while True:
+            message = json.loads(await asyncio.wait_for(ws.receive_text(), 5))
+            if message.get("type") not in ("pet_snapshot", "pet_delta"):
+                return message
+    except asyncio.TimeoutError:
+        return {}
+
+
+class FailingHandshake:
+    """A socket whose accept() fails, as when the client drops mid-handshake"""
+
+    async def accept(self):
+        raise RuntimeError("handshake failed")
+
+
+async def run() -> list:
+    import main
+    client = ASGIClient(main.app)
+    failures = []
+    path = f"/ws?stream=delta&tenant={TENANT}"
+
+    async with lifespan(main.app):
+        await client.request("POST", f"/api/demo/reset-pet?tenant={TENANT}")
+        ws = ASGIWebSocket(main.app, path)
+        await ws.accepted()
+        first = await next_state(ws)
+        await ws.close()
+
+        # Last client gone; the pet changes while nobody listens
+        await client.request("POST", f"/api/demo/set-health?tenant={TENANT}", {"health": 42})
+
+        ws = ASGIWebSocket(main.app, path)
+        await ws.accepted()
+        second = await next_state(ws)
+        if second.get("pet_state", {}).get("health") != 42:
+            failures.append(f"reconnect snapshot shows {second.get('pet_state')}, expected health 42")
+        if second.get("seq", -1) <= first["seq"]:
+            failures.append(f"seq {second['seq']} after reconnect reuses one sent before ({first['seq']})")
+
+        # A client resuming from what it saw before the reconnect
+        ws.send_text(json.dumps({"type": "resync", "since": first["seq"]}))
+        resumed = await next_state(ws)
+        state = dict(first["pet_state"])
+        state.update(resumed.get("pet_state") or resumed.get("changes") or {})
+        if state.get("health") != 42 or resumed.get("seq") != second.get("seq"):
+            failures.append(f"resync from seq {first['seq']} gave {resumed}")
+
+        for since in ("abc", None, 1.5, True, -7):
+            ws.send_text(json.dumps({"type": "resync", "since": since}))
+            reply = await next_message(ws)
+            if reply.get("type") != "error":
+                failures.append(f"resync with since={since!r} gave {reply or 'nothing'}")
+        ws.send_text("still there?")
+        if (await next_message(ws)).get("echo") != "still there?":
+            failures.append("socket stopped answering after bad resync requests")
+        await ws.close()
+        await asyncio.sleep(0.1)
+        if main.manager.clients:
+            failures.append(f"{len(main.manager.clients)} clients still registered after close")
+
+        lost = "wscheck-lost"
+        with contextlib.suppress(RuntimeError):
+            await main.manager.connect(FailingHandshake(), mode="delta", tenant=lost,
+                                       state={"health": 1})
+        if main.manager.clients or lost in main.manager.groups or lost in main.manager.streams:
+            failures.append("a failed handshake left a client or stream registered")
+
+    return failures
+
+
+def main():
+    os.environ.setdefault("LOG_MODE", "log")
+    os.environ.setdefault("LOG_LEVEL", "error")
+    os.environ["WARM_UP_ON_STARTUP"] = "0"
+    sys.path.insert(0, os.getcwd())
+    os.chdir(tempfile.mkdtemp(prefix="cyberpet-ws-"))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        failures = asyncio.run(run())
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
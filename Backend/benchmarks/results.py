@@ -0,0 +1,130 @@
+# backend/benchmarks/results.py
+#
+# Shared results file for the benchmark suite. Each run appends one JSON
+# line (suite, git commit, time, and p50/p95/p99 + throughput per case) to
+# benchmarks/results.jsonl, so numbers can be compared across commits.
+#
+# Compare the last two runs of every suite (or --suite NAME, --runs N):
+#   python -m benchmarks.results
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Optional, Sequence
+
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results.jsonl")
+
+
+def summarize(samples: Sequence[float], elapsed: Optional[float] = None, **extra) -> dict:
+    """Latency percentiles in ms for per-operation samples in seconds
+
+    Throughput is operations per second over elapsed wall time when given
+    (e.g. many concurrent requests), else over the summed sample time.
+    """
+    samples = sorted(samples)
+    if not samples:
+        return {"n": 0, **extra}
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 4)
+    total = elapsed if elapsed is not None else sum(samples)
+    return {
+        "n": len(samples),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples[-1] * 1000, 4),
+        "ops_per_sec": round(len(samples) / total, 1) if total else None,
+        **extra
+    }
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def record(suite: str, cases: Dict[str, dict], params: Optional[dict] = None,
+           path: str = RESULTS_FILE) -> dict:
+    """Appends one run to the results file and returns it"""
+    run = {
+        "suite": suite,
+        "commit": _git("rev-parse", "--short", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": params or {},
+        "cases": cases
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    return run
+
+
+def print_cases(cases: Dict[str, dict]):
+    print(f"{'case':<38} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for name, case in cases.items():
+        if not case.get("n"):
+            print(f"{name:<38} {0:>7}")
+            continue
+        print(f"{name:<38} {case['n']:>7} {case['p50_ms']:>9.4f} {case['p95_ms']:>9.4f} "
+              f"{case['p99_ms']:>9.4f} {case['ops_per_sec'] or 0:>10,.1f}")
+
+
+def load(path: str = RESULTS_FILE) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _change(old, new) -> str:
+    if not old or new is None:
+        return ""
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def compare(runs: List[dict]):
+    """p95 and throughput of each case, oldest run first, with % change vs the oldest"""
+    base = runs[0]
+    labels = [f"{r['commit'] or '?'}{'+' if r['dirty'] else ''}" for r in runs]
+    print(f"{'case':<38}" + "".join(f"{label:>26}" for label in labels))
+    for name in base["cases"]:
+        row = f"{name:<38}"
+        for run in runs:
+            case = run["cases"].get(name, {})
+            p95, ops = case.get("p95_ms"), case.get("ops_per_sec")
+            if p95 is None:
+                row += f"{'-':>26}"
+                continue
+            old = base["cases"].get(name, {})
+            cell = f"{p95:.3f}ms {_change(old.get('p95_ms'), p95)} {ops or 0:,.0f}/s"
+            row += f"{cell:>26}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare benchmark runs across commits")
+    parser.add_argument("--suite", default=None)
+    parser.add_argument("--runs", type=int, default=2, help="latest runs to compare per suite")
+    parser.add_argument("--file", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    runs = load(args.file)
+    suites = [args.suite] if args.suite else list(dict.fromkeys(r["suite"] for r in runs))
+    if not runs:
+        print(f"No results in {args.file} yet")
+    for suite in suites:
+        latest = [r for r in runs if r["suite"] == suite][-args.runs:]
+        if not latest:
+            continue
+        print(f"\n== {suite} ({len(latest)} runs)")
+        compare(latest)
+
+
+if __name__ == "__main__":
+    main()
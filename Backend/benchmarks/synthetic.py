@@ -0,0 +1,78 @@
+# backend/benchmarks/synthetic.py
+
+import random
+from typing import List
+
+# Rough English letter frequencies, so names look like names and not noise
+LETTERS = 'eeeeeeeeeeeettttttttaaaaaaaaooooooooiiiiiiinnnnnnnsssssshhhhhhrrrrrr' \
+          'ddddlllluuucccmmmwwffggyyppbbvkjxqz'
+TLDS = ['.com', '.com', '.com', '.net', '.org', '.io', '.co.uk', '.de']
+BRANDS = [
+    'google.com', 'facebook.com', 'amazon.com', 'paypal.com',
+    'microsoft.com', 'apple.com', 'github.com', 'linkedin.com'
+]
+
+
+def make_domains(n: int, seed: int = 0) -> List[str]:
+    """Deterministic list of n distinct brand-like domains"""
+    rng = random.Random(seed)
+    domains = list(BRANDS[:n])
+    seen = set(domains)
+    while len(domains) < n:
+        name = ''.join(rng.choice(LETTERS) for _ in range(rng.randint(4, 12)))
+        domain = name + rng.choice(TLDS)
+        if domain not in seen:
+            seen.add(domain)
+            domains.append(domain)
+    return domains
+
+
+def typo(domain: str, rng: random.Random) -> str:
+    """Single-character edit of a domain's name part"""
+    name, dot, tld = domain.partition('.')
+    i = rng.randrange(len(name))
+    c = rng.choice('abcdefghijklmnopqrstuvwxyz0123456789')
+    edit = rng.choice(['sub', 'ins', 'del'])
+    if edit == 'sub':
+        name = name[:i] + c + name[i + 1:]
+    elif edit == 'ins':
+        name = name[:i] + c + name[i:]
+    elif len(name) > 2:
+        name = name[:i] + name[i + 1:]
+    return name + dot + tld
+
+
+def make_urls(n: int, protected: List[str], seed: int = 1) -> List[str]:
+    """Mix of real brands, typosquats and unrelated sites, mostly https"""
+    rng = random.Random(seed)
+    unrelated = make_domains(2000, seed=seed + 100)
+    paths = ['', '/', '/login', '/account/verify', '/search?q=cats',
+             '/secure/update-banking', '/news/today']
+    urls = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.3:
+            domain = rng.choice(protected)
+        elif roll < 0.5:
+            domain = typo(rng.choice(protected), rng)
+        else:
+            domain = rng.choice(unrelated)
+        scheme = 'http://' if rng.random() < 0.05 else 'https://'
+        host = ('www.' + domain) if rng.random() < 0.3 else domain
+        urls.append(scheme + host + rng.choice(paths))
+    return urls
+
+
+def make_history(n: int, protected: List[str], sites: int = 1500,
+                 seed: int = 2) -> List[str]:
+    """Browser-history-like URLs: a Zipf-ish spread over a fixed set of sites"""
+    rng = random.Random(seed)
+    pool = make_urls(sites, protected, seed=seed)
+    hosts = [url.split('/', 3)[:3] for url in pool]
+    weights = [1 / (rank + 1) for rank in range(len(hosts))]
+    paths = ['', '/', '/login', '/inbox', '/account/verify', '/search?q=news',
+             '/secure/update-banking', '/watch?v=abc', '/settings']
+    urls = []
+    for scheme, _, host in rng.choices(hosts, weights=weights, k=n):
+        urls.append(f"{scheme}//{host}{rng.choice(paths)}")
+    return urls
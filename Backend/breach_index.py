@@ -0,0 +1,279 @@
+# backend/breach_index.py
+#
+# Offline breached-password lookups with k-anonymity, the same way the Pwned
+# Passwords range API works: a client sends only the first 5 hex digits of a
+# password's SHA-1, gets back every breached hash under that prefix and
+# matches its own suffix locally.
+#
+#   <file>.bpidx  header, offset table (one record number per 5-hex-digit
+#                 prefix, 2^20 + 1 of them), then fixed-size records sorted
+#                 by hash: SHA-1 bytes 2-19 + big-endian uint32 breach count
+#
+# The file is memory-mapped: a range is one contiguous slice of the mapping
+# and a lookup is a binary search inside it, so memory stays flat and
+# lookups stay in the millisecond range however big the corpus is.
+#
+# Usage (from Backend/):
+#   python -m breach_index import FILE [--plaintext]   (lines: SHA1[:COUNT], any order)
+#   python -m breach_index lookup PASSWORD|SHA1
+#   python -m breach_index stats
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Tuple
+
+from config import settings
+
+HEADER = struct.Struct('<4sBBxxQ')  # magic, prefix hex digits, record size, count
+MAGIC = b'CPBR'
+PREFIX_DIGITS = 5
+PREFIXES = 16 ** PREFIX_DIGITS
+OFFSETS = struct.Struct(f'<{PREFIXES + 1}Q')
+KEY_SIZE = 18  # SHA-1 bytes 2-19; byte 2's high nibble is the prefix's last digit
+RECORD_SIZE = KEY_SIZE + 4
+BUCKET_RECORD = struct.Struct('>20sI')  # full hash + count, import scratch files
+MAX_COUNT = 2 ** 32 - 1
+HEX_DIGITS = set('0123456789abcdefABCDEF')
+
+
+def sha1_hex(password: str) -> str:
+    return hashlib.sha1(password.encode()).hexdigest().upper()
+
+
+def parse_prefix(prefix: str) -> int:
+    """Prefix number for 5 hex digits; ValueError for anything else"""
+    if len(prefix) != PREFIX_DIGITS or not set(prefix) <= HEX_DIGITS:
+        raise ValueError(f"Hash prefix must be {PREFIX_DIGITS} hex digits")
+    return int(prefix, 16)
+
+
+class IndexClosed(RuntimeError):
+    """The index was closed (replaced by a newer file) before this call began"""
+
+
+class BreachIndex:
+    """Read side of a .bpidx file: ranges by prefix and counts by full hash
+
+    close() waits for nobody: calls already reading the mapping finish
+    first and the last one out unmaps it; calls that start afterwards raise
+    IndexClosed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        magic, digits, record_size, self.count = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC or digits != PREFIX_DIGITS or record_size != RECORD_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} is not a breached-password index")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Record numbers straight off the mapping; only touched pages get loaded
+        self._offsets = memoryview(self._mm)[HEADER.size:HEADER.size + OFFSETS.size].cast('Q')
+        self._records = HEADER.size + OFFSETS.size
+        self.mtime = os.path.getmtime(path)
+        self._lock = threading.Lock()
+        self._readers = 0
+        self._retired = False
+        self.closed = False
+
+    def close(self):
+        """Unmaps the index now, or once the calls reading it have finished"""
+        with self._lock:
+            self._retired = True
+            unmap = self._last_out()
+        if unmap:
+            self._unmap()
+
+    def _last_out(self) -> bool:
+        if self._retired and not self._readers and not self.closed:
+            self.closed = True
+            return True
+        return False
+
+    def _unmap(self):
+        self._offsets.release()
+        self._mm.close()
+        self._file.close()
+
+    @contextmanager
+    def _reading(self):
+        with self._lock:
+            if self.closed:
+                raise IndexClosed(f"{self.path} was closed")
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._readers -= 1
+                unmap = self._last_out()
+            if unmap:
+                self._unmap()
+
+    def changed_on_disk(self) -> bool:
+        return not os.path.exists(self.path) or os.path.getmtime(self.path) != self.mtime
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _bounds(self, prefix: int) -> Tuple[int, int]:
+        return self._offsets[prefix], self._offsets[prefix + 1]
+
+    def range_bytes(self, prefix: str) -> bytes:
+        """The raw records under a prefix: one copy out of the mapping"""
+        number = parse_prefix(prefix)
+        with self._reading():
+            lo, hi = self._bounds(number)
+            return self._mm[self._records + lo * RECORD_SIZE:self._records + hi * RECORD_SIZE]
+
+    def range_text(self, prefix: str) -> str:
+        """Pwned Passwords format: one SUFFIX:COUNT line per breached hash"""
+        number = parse_prefix(prefix)
+        with self._reading():
+            lo, hi = self._bounds(number)
+            with memoryview(self._mm)[self._records + lo * RECORD_SIZE:
+                                      self._records + hi * RECORD_SIZE] as view:
+                digits = view.hex().upper()
+        step = RECORD_SIZE * 2
+        key_digits = KEY_SIZE * 2
+        return ''.join(f"{digits[i + 1:i + key_digits]}:{int(digits[i + key_digits:i + step], 16)}\r\n"
+                       for i in range(0, len(digits), step))
+
+    def lookup(self, sha1: str) -> int:
+        """Times a full SHA-1 (hex) was seen in breaches, 0 if never"""
+        if len(sha1) != 40:
+            raise ValueError("SHA-1 must be 40 hex digits")
+        digest = bytes.fromhex(sha1)
+        number = parse_prefix(sha1[:PREFIX_DIGITS])
+        key = digest[2:]
+        with self._reading():
+            lo, hi = self._bounds(number)
+            mm, base = self._mm, self._records
+            i = bisect_left(range(lo, hi), key,
+                            key=lambda n: mm[base + n * RECORD_SIZE:base + n * RECORD_SIZE + KEY_SIZE])
+            if i < hi - lo:
+                at = base + (lo + i) * RECORD_SIZE
+                if mm[at:at + KEY_SIZE] == key:
+                    return int.from_bytes(mm[at + KEY_SIZE:at + RECORD_SIZE], 'big')
+        return 0
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "hashes": self.count,
+            "disk_bytes": os.path.getsize(self.path),
+            "record_bytes": RECORD_SIZE
+        }
+
+
+def read_corpus(path: str, plaintext: bool = False) -> Iterator[Tuple[bytes, int]]:
+    """(SHA-1 digest, count) per line of a SHA1[:COUNT] dump or a password list"""
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b'\r\n')
+            if not line:
+                continue
+            if plaintext:
+                yield hashlib.sha1(line).digest(), 1
+                continue
+            digest, _, count = line.partition(b':')
+            if len(digest) != 40:
+                continue  # header or malformed line
+            try:
+                yield bytes.fromhex(digest.decode()), int(count or 1)
+            except ValueError:
+                continue
+
+
+def build(path: str, entries: Iterable[Tuple[bytes, int]]) -> BreachIndex:
+    """Writes a new index from (digest, count) pairs in any order, summing duplicates
+
+    Pairs are spilled into 256 scratch files by first byte, then each one is
+    sorted on its own, so memory use is bounded by the largest 1/256th of the
+    corpus rather than the whole thing.
+    """
+    import numpy as np
+
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryDirectory(dir=directory, prefix='.bpidx-') as scratch:
+        buckets = [open(os.path.join(scratch, f'{b:02x}'), 'wb', buffering=1 << 20)
+                   for b in range(256)]
+        for digest, count in entries:
+            buckets[digest[0]].write(BUCKET_RECORD.pack(digest, min(count, MAX_COUNT)))
+        for bucket in buckets:
+            bucket.close()
+
+        per_prefix = np.zeros(PREFIXES, dtype=np.uint64)
+        total = 0
+        with open(path + '.tmp', 'wb') as out:
+            out.seek(HEADER.size + OFFSETS.size)
+            for b in range(256):
+                raw = np.fromfile(os.path.join(scratch, f'{b:02x}'),
+                                  dtype=np.dtype([('hi', '>u8'), ('mid', '>u8'),
+                                                  ('lo', '>u4'), ('count', '>u4')]))
+                if not len(raw):
+                    continue
+                raw = raw[np.lexsort((raw['lo'], raw['mid'], raw['hi']))]
+                first = np.ones(len(raw), dtype=bool)
+                first[1:] = ((raw['hi'][1:] != raw['hi'][:-1]) | (raw['mid'][1:] != raw['mid'][:-1])
+                             | (raw['lo'][1:] != raw['lo'][:-1]))
+                starts = np.flatnonzero(first)
+                counts = np.minimum(np.add.reduceat(raw['count'].astype(np.uint64), starts), MAX_COUNT)
+                unique = raw[starts]
+                unique['count'] = counts
+
+                records = unique.view(np.uint8).reshape(-1, BUCKET_RECORD.size)[:, 2:]
+                out.write(records.tobytes())
+                per_prefix += np.bincount((unique['hi'] >> np.uint64(44)).astype(np.int64),
+                                          minlength=PREFIXES).astype(np.uint64)
+                total += len(unique)
+
+            offsets = np.zeros(PREFIXES + 1, dtype='<u8')
+            np.cumsum(per_prefix, out=offsets[1:])
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, PREFIX_DIGITS, RECORD_SIZE, total))
+            out.write(offsets.tobytes())
+            out.flush()
+            os.fsync(out.fileno())
+    os.replace(path + '.tmp', path)
+    return BreachIndex(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local breached-password index")
+    parser.add_argument('--file', default=settings.BREACH_INDEX_FILE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('import')
+    p.add_argument('corpus')
+    p.add_argument('--plaintext', action='store_true', help="one password per line instead of SHA1[:COUNT]")
+    p = sub.add_parser('lookup')
+    p.add_argument('password')
+    sub.add_parser('stats')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'import':
+        index = build(args.file, read_corpus(args.corpus, args.plaintext))
+        print(f"✅ import: {index.stats()} in {time.perf_counter() - start:.2f}s")
+        return
+
+    index = BreachIndex(args.file)
+    if args.command == 'lookup':
+        value = args.password
+        is_hash = len(value) == 40 and set(value) <= HEX_DIGITS
+        count = index.lookup(value if is_hash else sha1_hex(value))
+        print(f"{count} breach(es) in {(time.perf_counter() - start) * 1000:.2f} ms")
+    else:
+        print(index.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,95 @@ class Settings:
     SAFE_BROWSING_API_KEY = os.getenv("SAFE_BROWSING_API_KEY", "")
     PORT = int(os.getenv("PORT", 8000))
     SCREENSHOT_INTERVAL = 30  # 30 seconds = 2 per minute
+    # Adaptive monitoring schedule around SCREENSHOT_INTERVAL
+    MONITOR_MIN_INTERVAL = 5  # seconds between checks right after a threat or big change
+    MONITOR_MAX_INTERVAL = 60  # longest gap after backing off during safe streaks
+    MONITOR_BACKOFF_FACTOR = 2.0
+    MONITOR_SAFE_STREAK = 5  # safe checks in a row before each backoff step
+    MONITOR_CALLS_PER_MINUTE = 6  # analyzer budget
+    MONITOR_JITTER = 0.1  # +/- fraction of each sleep
     DEBUG_MODE = True
     AUTO_START_MONITORING = False  # Don't auto-start on server startup
+    # One domain per line, added to the built-in typosquatting brands
+    PROTECTED_DOMAINS_FILE = os.getenv("PROTECTED_DOMAINS_FILE", "")
+    # One keyword per line with an optional weight; replaces the built-in list
+    # and is re-read whenever the file changes
+    PHISHING_KEYWORDS_FILE = os.getenv("PHISHING_KEYWORDS_FILE", "")
+    KEYWORDS_RELOAD_INTERVAL = 5  # seconds between keyword file mtime checks
+    KEYWORD_SCORE_THRESHOLD = 2.0  # summed keyword weight that flags a URL
+    # URL threat rules (checks, severities, reasons); empty = the bundled url_rules.json
+    URL_RULES_FILE = os.getenv("URL_RULES_FILE", "")
+    URL_RULES_RELOAD_INTERVAL = 5  # seconds between rule file mtime checks
+    VERDICT_CACHE_SIZE = 10000  # domains with a cached TLD/typosquat verdict
+    VERDICT_CACHE_TTL = 3600  # seconds before a cached verdict is recomputed
+    # Public Suffix List for splitting hosts; empty = the bundled public_suffix_list.dat
+    PUBLIC_SUFFIX_FILE = os.getenv("PUBLIC_SUFFIX_FILE", "")
+    DOMAIN_PARSE_CACHE_SIZE = 10000  # parsed hosts kept
+    # Offline known-bad domain stores (see threat_intel.py)
+    THREAT_INTEL_DIR = os.getenv("THREAT_INTEL_DIR", "threat_intel_data")
+    THREAT_INTEL_RELOAD_INTERVAL = 30  # seconds between store mtime checks
+    THREAT_INTEL_BLOOM_FP_RATE = 0.01
+    THREAT_INTEL_COMPACT_MIN = 10000  # pending delta entries before compaction
+    # Breached-password hashes for /api/breach-range (see breach_index.py)
+    BREACH_INDEX_FILE = os.getenv("BREACH_INDEX_FILE", "breached_passwords.bpidx")
+    PET_STATE_FILE = "pet_state.json"  # compacted snapshot
+    PET_JOURNAL_FILE = "pet_state.journal"  # changes since the snapshot
+    PET_JOURNAL_FLUSH_INTERVAL = 0.2  # seconds a write batch may wait
+    PET_SNAPSHOT_EVERY = 1000  # journal entries between snapshots
+    EVENT_DB_FILE = os.getenv("EVENT_DB_FILE", "events.db")  # full event history
+    EVENT_MAX_PENDING = 100_000  # queued history rows kept while writes fail; oldest dropped past this
+    # Per-user/device pets; the default tenant keeps the two files above
+    PET_TENANT_DIR = os.getenv("PET_TENANT_DIR", "pets")
+    PET_MAX_LOADED = 1000  # pets kept in memory before LRU eviction
+    PET_IDLE_TIMEOUT = 600  # seconds before an untouched pet is unloaded
+    MONITOR_TENANT = os.getenv("MONITOR_TENANT", "default")  # whose pet screen checks feed
+    # Extension events are queued and applied to the pet in batches
+    INGEST_QUEUE_SIZE = 1000  # queued events before new ones get a 429
+    INGEST_MAX_BATCH = 500  # events applied in one PetManager update
+    INGEST_TICK = 0.05  # seconds a burst may pile up before it's applied
+    WS_SEND_QUEUE_SIZE = 100  # queued messages per WebSocket before dropping
+    WS_SEND_TIMEOUT = 5  # seconds a single send may take before eviction
+    # Screenshot analyzer: "mock" or "package.module:ClassName" (an analyzers.Analyzer)
+    ANALYZER = os.getenv("ANALYZER", "mock")
+    ANALYZER_WORKERS = 2  # analyzer calls running at once
+    ANALYZER_QUEUE_SIZE = 4  # screenshots waiting before the oldest is dropped
+    ANALYZER_TIMEOUT = 30  # seconds before an analyzer call is cancelled
+    ANALYZER_MOCK_DELAY = float(os.getenv("ANALYZER_MOCK_DELAY", 2.0))  # seconds per mock call
+    ANALYZER_MOCK_JITTER = float(os.getenv("ANALYZER_MOCK_JITTER", 0.0))
+    MONITOR_MAX_PENDING = 4  # captured frames awaiting a verdict before capture waits
+    # Verdicts for screens seen before, keyed by perceptual hash
+    SCREEN_CACHE_SIZE = 2000
+    SCREEN_CACHE_TTL = 24 * 3600  # seconds
+    SCREEN_CACHE_THRESHOLD = 4  # dHash bits (of 64) that still count as the same screen
+    SCREEN_CACHE_FILE = os.getenv("SCREEN_CACHE_FILE", "")  # set to keep verdicts across restarts
+    # Screenshot change detection in front of the analyzer
+    FRAME_GRID = (4, 4)  # columns, rows of the per-region diff
+    FRAME_HASH_THRESHOLD = 4  # dHash bits (of 64) that count as a change
+    FRAME_REGION_THRESHOLD = 6.0  # mean gray-level difference for a changed cell
+    FRAME_MAX_SKIPS = 10  # re-analyze at least this often even if unchanged
+    # Console output: "print" (every message, inline) or "log" (leveled,
+    # rate-limited, written by a background thread)
+    LOG_MODE = os.getenv("LOG_MODE", "print")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "info")  # only used when LOG_MODE is "log"
+    LOG_RATE_LIMIT = 20  # messages per call site per window before suppressing
+    LOG_RATE_WINDOW = 10  # seconds
+    # Analyzer, screen cache and threat-intel stores load on first use; with
+    # this on they are loaded in the background right after startup instead
+    WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "1") != "0"
+    # Several worker processes (uvicorn --workers N): pet state, broadcasts
+    # and the monitoring lease go through this SQLite file. Empty = one process
+    SHARED_STATE_DB = os.getenv("SHARED_STATE_DB", "")
+    SHARED_POLL_INTERVAL = 0.05  # seconds between checks for other workers' broadcasts
+    SHARED_MESSAGE_RETENTION = 60  # seconds broadcasts stay in the shared log
+    SHARED_BUSY_TIMEOUT = 2.0  # seconds a call waits for another worker's write lock
+    MONITOR_LEASE_TTL = 10  # seconds before a silent monitoring worker loses the lease
+    # Big URL batches are analyzed in worker processes so they don't stall
+    # /ws and monitoring (per server worker); 0 = always on the event loop
+    DETECTOR_PROCESSES = int(os.getenv("DETECTOR_PROCESSES", 2))
+    DETECTOR_MAX_PENDING = 8  # pool jobs submitted at once; later ones wait
+    DETECTOR_INLINE_MAX_URLS = 20  # batches up to this size run inline (mode=auto)
+    DETECTOR_JOB_URLS = 1000  # URLs per pool job; bigger batches are split
+    IO_THREADS = 4  # threads for blocking file and database reads
 
 
 settings = Settings()
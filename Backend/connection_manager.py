@@ -0,0 +1,248 @@
+# backend/connection_manager.py
+
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+from fastapi import WebSocket
+
+import console
+from metrics import BROADCAST_RECIPIENTS, BROADCAST_SECONDS
+from state_stream import StateStream
+
+# Queued in place of a message for delta clients; rendered at send time as
+# whatever snapshot or merged delta brings that client up to date
+STATE_SYNC = object()
+STATE_KEY = "pet_state"
+DEFAULT_TENANT = "default"
+
+
+class _Client:
+    """One socket's pending messages, drained by its own writer task"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int, mode: str = "full",
+                 tenant: str = DEFAULT_TENANT):
+        self.websocket = websocket
+        self.tenant = tenant
+        self.max_queue = max_queue
+        self.mode = mode  # "full": pet_state in every message, "delta": versioned stream
+        self.sent_seq = -1  # last state seq a delta client was brought up to
+        # key -> serialized message (or STATE_SYNC); coalescible messages share a key
+        self.pending: "OrderedDict[Hashable, object]" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+        self.coalesced = 0
+
+    def enqueue(self, key: Hashable, text):
+        if key in self.pending:
+            # Only the newest copy matters, and it belongs at the back
+            del self.pending[key]
+            self.coalesced += 1
+        self.pending[key] = text
+        while len(self.pending) > self.max_queue:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.ready.set()
+
+
+class ConnectionManager:
+    """WebSocket fan-out with a bounded send queue and writer task per client
+
+    broadcast serializes the message once and only queues it, so a slow or
+    stuck client never holds up the caller or the other clients. Messages
+    sent with a coalesce_key replace any still-queued message with the same
+    key (e.g. only the latest pet_state is worth sending); when a queue is
+    full anyway, the oldest message is dropped. A socket whose send fails or
+    takes longer than send_timeout is closed and removed.
+
+    Clients connected in "delta" mode get the pet state as a versioned
+    stream instead: a seq-numbered snapshot on connect, then only the
+    fields that changed. Their state updates are rendered at send time
+    relative to what that client last received, so coalescing or dropping
+    never loses a change. Pure state updates (coalesce_key="pet_state")
+    that change nothing are skipped for every client.
+
+    Every client belongs to one tenant's group, and broadcasts only reach
+    that group. Each tenant with connected clients has its own state
+    stream; the group and its stream are dropped when its last client
+    leaves, so memory follows connected tenants, not all tenants. A new
+    stream carries on from the highest seq any dropped stream reached, so a
+    seq a client saw before reconnecting is never reused for another state.
+
+    With a bus (several worker processes), broadcast also publishes the
+    message for the other workers, which pass it to their own deliver().
+    """
+
+    def __init__(self, max_queue: int = 100, send_timeout: float = 5.0, bus=None):
+        self.max_queue = max_queue
+        self.bus = bus
+        self.send_timeout = send_timeout
+        self.clients: Dict[WebSocket, _Client] = {}
+        self.groups: Dict[str, Dict[WebSocket, _Client]] = {}
+        self.evicted = 0
+        self._dropped = 0  # totals from clients that have since left
+        self._coalesced = 0
+        self._seq = itertools.count()
+        self.streams: Dict[str, StateStream] = {}
+        self._seq_floor = 0  # highest seq of any dropped stream
+        self._rendered: Dict[tuple, str] = {}  # (tenant, base_seq, seq) -> serialized delta
+
+    @property
+    def active_connections(self):
+        return list(self.clients)
+
+    def _stream(self, tenant: str) -> StateStream:
+        stream = self.streams.get(tenant)
+        if stream is None:
+            stream = self.streams[tenant] = StateStream(start=self._seq_floor)
+        return stream
+
+    async def connect(self, websocket: WebSocket, mode: str = "full",
+                      tenant: str = DEFAULT_TENANT, state: Optional[dict] = None):
+        """Accepts the socket, then registers it; state is the tenant's current
+        pet state, recorded in its stream so a delta client's first snapshot
+        is up to date. Nothing is registered if the handshake fails."""
+        await websocket.accept()
+        client = _Client(websocket, self.max_queue, mode, tenant)
+        client.task = asyncio.create_task(self._writer(client))
+        self.clients[websocket] = client
+        self.groups.setdefault(tenant, {})[websocket] = client
+        if state is not None:
+            self._stream(tenant).update(state)
+        if mode == "delta":
+            client.enqueue(STATE_KEY, STATE_SYNC)
+        console.debug(f"🔌 WebSocket connected (total: {len(self.clients)})")
+
+    def disconnect(self, websocket: WebSocket):
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        group = self.groups.get(client.tenant, {})
+        group.pop(websocket, None)
+        if not group:
+            self.groups.pop(client.tenant, None)
+            self._drop_stream(client.tenant)
+        self._dropped += client.dropped
+        self._coalesced += client.coalesced
+        if client.task and client.task is not asyncio.current_task():
+            client.task.cancel()
+        console.debug("🔌 WebSocket disconnected")
+
+    def _drop_stream(self, tenant: str):
+        stream = self.streams.pop(tenant, None)
+        if stream is not None:
+            self._seq_floor = max(self._seq_floor, stream.seq)
+        for key in [key for key in self._rendered if key[0] == tenant]:
+            del self._rendered[key]
+
+    async def broadcast(self, message: dict, coalesce_key: Optional[str] = None,
+                        tenant: str = DEFAULT_TENANT):
+        """Queue a message for every client of a tenant without waiting on any of them"""
+        if self.bus is not None:
+            await self.bus.publish(tenant, message, coalesce_key)
+        await self.deliver(message, coalesce_key, tenant)
+
+    async def deliver(self, message: dict, coalesce_key: Optional[str] = None,
+                      tenant: str = DEFAULT_TENANT):
+        """broadcast() to this process's clients only"""
+        group = self.groups.get(tenant)
+        if not group:
+            return
+        started = time.perf_counter()
+        stream = self._stream(tenant)
+        state = message.get("pet_state")
+        if state is not None:
+            changed = stream.update(state)
+            if changed is None and coalesce_key == STATE_KEY:
+                return
+
+        text = json.dumps(message)
+        lean_text = None
+        for client in list(group.values()):
+            if client.mode != "delta" or state is None:
+                client.enqueue(coalesce_key or next(self._seq), text)
+                continue
+            if coalesce_key != STATE_KEY:
+                # e.g. a threat alert: send it without the state, then the delta
+                if lean_text is None:
+                    lean = {k: v for k, v in message.items() if k != "pet_state"}
+                    lean_text = json.dumps({**lean, "seq": stream.seq})
+                client.enqueue(next(self._seq), lean_text)
+            client.enqueue(STATE_KEY, STATE_SYNC)
+        BROADCAST_RECIPIENTS.inc(len(group))
+        BROADCAST_SECONDS.observe(time.perf_counter() - started)
+
+    async def resync(self, websocket: WebSocket, since: int):
+        """Bring a delta client up to date from the given seq (snapshot if too old)"""
+        client = self.clients.get(websocket)
+        if client:
+            client.sent_seq = since
+            client.enqueue(STATE_KEY, STATE_SYNC)
+
+    async def send_personal(self, websocket: WebSocket, message: dict):
+        """Queue a message for one client, in order with its broadcasts"""
+        client = self.clients.get(websocket)
+        if client:
+            client.enqueue(next(self._seq), json.dumps(message))
+
+    async def _writer(self, client: _Client):
+        try:
+            while True:
+                while not client.pending:
+                    client.ready.clear()
+                    await client.ready.wait()
+                _, text = client.pending.popitem(last=False)
+                if text is STATE_SYNC:
+                    text = self._render_state(client)
+                    if text is None:
+                        continue
+                await asyncio.wait_for(
+                    client.websocket.send_text(text), self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            console.warning(f"🔌 Dropping dead WebSocket: {e!r}")
+            self.evicted += 1
+            self.disconnect(client.websocket)
+            try:
+                await client.websocket.close()
+            except Exception:
+                pass
+
+    def _render_state(self, client: _Client) -> Optional[str]:
+        """Snapshot or merged delta taking this client to the current seq"""
+        stream = self.streams.get(client.tenant)
+        if stream is None:
+            return None
+        seq = stream.seq
+        base = client.sent_seq
+        changes = stream.since(base)
+        if changes == {}:
+            return None
+        key = (client.tenant, base if changes is not None else -1, seq)
+        text = self._rendered.get(key)
+        if text is None:
+            if len(self._rendered) > 256:
+                self._rendered.clear()
+            message = (stream.snapshot_message() if changes is None
+                       else stream.delta_message(base, changes))
+            text = self._rendered[key] = json.dumps(message)
+        client.sent_seq = seq
+        return text
+
+    def stats(self) -> dict:
+        clients = list(self.clients.values())
+        return {
+            "connections": len(clients),
+            "queued": sum(len(c.pending) for c in clients),
+            "max_queue_depth": max((len(c.pending) for c in clients), default=0),
+            "dropped": self._dropped + sum(c.dropped for c in clients),
+            "coalesced": self._coalesced + sum(c.coalesced for c in clients),
+            "evicted": self.evicted,
+            "tenants": len(self.groups),
+            "state_seq": self.streams[DEFAULT_TENANT].seq if DEFAULT_TENANT in self.streams else 0
+        }
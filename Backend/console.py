@@ -0,0 +1,95 @@
+# backend/console.py
+
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Dict, Tuple
+
+from config import settings
+
+logger = logging.getLogger("cyberpet")
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `limit` records per call site through every `window` seconds
+
+    A call site that floods (e.g. one line per event in a 500-event batch)
+    is cut off for the rest of the window; the next record that gets through
+    says how many were suppressed.
+    """
+
+    def __init__(self, limit: int = 20, window: float = 10.0, clock=time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self._sites: Dict[Tuple[str, int], list] = {}  # site -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        now = self.clock()
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            entry = self._sites.get(site)
+            if entry is None or now - entry[0] >= self.window:
+                suppressed = entry[2] if entry else 0
+                entry = self._sites[site] = [now, 0, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} (+{suppressed} similar suppressed)"
+            if entry[1] >= self.limit:
+                entry[2] += 1
+                return False
+            entry[1] += 1
+            return True
+
+
+def setup():
+    """Switches console output to logging when settings.LOG_MODE is "log"
+
+    Records pass the level check and the rate limit on the calling thread,
+    then go through a queue to a listener thread that does the actual
+    console write, so hot paths never block on stdout.
+    """
+    if settings.LOG_MODE != "log" or logger.handlers:
+        return
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT, settings.LOG_RATE_WINDOW))
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(message)s"))
+    listener = logging.handlers.QueueListener(records, output)
+    listener.start()
+    logger.addHandler(handler)
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    logger.propagate = False
+
+
+def _emit(level: int, message: str):
+    if settings.LOG_MODE != "log":
+        print(message)
+    elif logger.isEnabledFor(level):
+        # stacklevel 3: the rate limit keys on the caller of info()/warning()
+        logger.log(level, message.strip("\n"), stacklevel=3)
+
+
+def debug(message: str):
+    _emit(logging.DEBUG, message)
+
+
+def info(message: str):
+    _emit(logging.INFO, message)
+
+
+def warning(message: str):
+    _emit(logging.WARNING, message)
+
+
+def error(message: str):
+    _emit(logging.ERROR, message)
+
+
+setup()
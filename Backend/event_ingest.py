@@ -0,0 +1,143 @@
+# backend/event_ingest.py
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+import console
+from metrics import EVENTS_INGESTED, INGEST_BATCH_SECONDS
+
+BatchHandler = Callable[[list], Awaitable[dict]]
+
+
+class QueueFull(Exception):
+    """Raised by offer() when the events don't fit; retry_after is in seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"event queue full, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class EventIngestor:
+    """Bounded in-process queue between the event endpoints and PetManager
+
+    offer() only queues; a single consumer task wakes on the first queued
+    event, waits `tick` seconds so a burst can pile up, and hands everything
+    queued (up to max_batch) to handle_batch in one call. The handler's
+    return value resolves the future of every event in that batch, so a
+    caller that wants the resulting pet state can await it. A batch that
+    doesn't fit in the queue is refused as a whole with QueueFull.
+    """
+
+    def __init__(self, handle_batch: BatchHandler, max_queue: int = 1000,
+                 max_batch: int = 500, tick: float = 0.05):
+        self.handle_batch = handle_batch
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.tick = tick
+        self.accepted = 0
+        self.rejected = 0
+        self.applied = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self._queue = deque()  # (event, future)
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def offer(self, events: Sequence, track: bool = True) -> List[asyncio.Future]:
+        """Queues events in order; returns one future per event for its batch
+        result, or none if track is False (fire and forget)"""
+        if len(events) > self.max_queue:
+            raise ValueError(f"at most {self.max_queue} events per batch")
+        if len(self._queue) + len(events) > self.max_queue:
+            self.rejected += len(events)
+            EVENTS_INGESTED.labels("rejected").inc(len(events))
+            raise QueueFull(self.retry_after(len(events)))
+        if self._task is None:
+            self._ready = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._consume())
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for event in events:
+            future = loop.create_future() if track else None
+            self._queue.append((event, future))
+            if track:
+                futures.append(future)
+        self.accepted += len(events)
+        EVENTS_INGESTED.labels("accepted").inc(len(events))
+        self._ready.set()
+        return futures
+
+    def retry_after(self, count: int = 1) -> float:
+        """Rough time until `count` more events would fit, from the drain rate"""
+        excess = len(self._queue) + count - self.max_queue
+        batches = max(1, -(-excess // self.max_batch))
+        return round(batches * self.tick + self.tick, 2)
+
+    async def _consume(self):
+        while True:
+            while not self._queue and not self._stopping:
+                self._ready.clear()
+                await self._ready.wait()
+            if self._stopping:
+                return
+            # Let the rest of the burst arrive so it lands in one batch
+            await asyncio.sleep(self.tick)
+            await self._apply_next_batch()
+
+    async def _apply_next_batch(self):
+        batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+        self.batches += 1
+        self.applied += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        started = time.perf_counter()
+        try:
+            result = await self.handle_batch([event for event, _ in batch])
+        except asyncio.CancelledError:
+            # Nobody will apply these events now; don't leave callers waiting
+            stopped = RuntimeError("event ingestor stopped before the batch was applied")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(stopped)
+            raise
+        except Exception as e:
+            console.error(f"❌ Failed to apply {len(batch)} queued events: {e}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            INGEST_BATCH_SECONDS.observe(time.perf_counter() - started)
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    async def stop(self):
+        """Stops the consumer after applying whatever is still queued
+
+        A batch the consumer is in the middle of is finished, not cancelled,
+        so every future it holds gets its result.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._ready.set()
+            await self._task
+            self._task = None
+        while self._queue:
+            await self._apply_next_batch()
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "max_queue": self.max_queue,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "applied": self.applied,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "avg_batch": round(self.applied / self.batches, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,239 @@
+# backend/event_store.py
+
+import atexit
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import console
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    ts REAL NOT NULL,
+    type TEXT NOT NULL,
+    threat_type TEXT,
+    severity INTEGER NOT NULL DEFAULT 0,
+    damage REAL NOT NULL DEFAULT 0
+);
+-- Covers time-range pages and the severity filter without touching rows
+CREATE INDEX IF NOT EXISTS events_by_time
+    ON events (tenant, ts, severity, threat_type);
+CREATE INDEX IF NOT EXISTS events_by_type
+    ON events (tenant, threat_type, ts);
+-- Hourly rollup kept in step with inserts, so aggregates don't scan events
+CREATE TABLE IF NOT EXISTS event_hours (
+    tenant TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    threat_type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    severity_sum INTEGER NOT NULL,
+    PRIMARY KEY (tenant, hour, threat_type)
+) WITHOUT ROWID;
+"""
+
+
+def _epoch(timestamp) -> float:
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+class EventStore:
+    """Every pet event ever recorded, in SQLite, queryable by time/type/severity
+
+    add() only queues rows; a daemon thread inserts whatever has queued up in
+    one transaction every flush_interval seconds, so the event loop never
+    waits on disk. Each insert also bumps a per-tenant, per-hour, per-type
+    rollup, which answers the aggregate queries in time proportional to the
+    number of hours asked for rather than the number of events. Pages are
+    keyset-paginated on (ts, id), newest first, so deep pages cost the same
+    as the first one.
+
+    Rows a failed insert (database locked, disk full) didn't write go back
+    to the front of the queue and are retried; past max_pending queued rows
+    the oldest are dropped and counted.
+    """
+
+    def __init__(self, path: str = 'events.db', flush_interval: float = 0.2,
+                 max_pending: int = 100_000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._write_lock = threading.Lock()
+        self._write = self._connect()
+        self._write.executescript(SCHEMA)
+        self._read = self._connect()
+        self._read_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def add(self, tenant: str, events: List[dict]):
+        """Queues PetManager event dicts for insertion"""
+        rows = [(tenant, _epoch(e["timestamp"]), e.get("type", "threat"),
+                 e.get("threat_type") or e.get("type", "threat"),
+                 int(e.get("severity", 0)), float(e.get("damage", 0)))
+                for e in events]
+        if not rows:
+            return
+        with self._lock:
+            self._pending.extend(rows)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="event-store", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        self._wakeup.set()
+
+    def flush(self) -> bool:
+        """Inserts every queued row; False (rows requeued) if the write failed"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return True
+        try:
+            self._insert(rows)
+        except sqlite3.Error as e:
+            with self._lock:
+                self._pending = rows + self._pending
+                excess = len(self._pending) - self.max_pending
+                if excess > 0:
+                    del self._pending[:excess]
+                    self.dropped += excess
+            console.error(f"⚠️  Failed to write {len(rows)} events to the event history, "
+                          f"will retry: {e}" + (f" ({excess} oldest dropped)" if excess > 0 else ""))
+            return False
+        return True
+
+    def _insert(self, rows: List[tuple]):
+        hours = {}
+        for tenant, ts, _, threat_type, severity, _ in rows:
+            key = (tenant, int(ts // 3600), threat_type)
+            count, total = hours.get(key, (0, 0))
+            hours[key] = (count + 1, total + severity)
+        with self._write_lock, self._write:
+            self._write.executemany(
+                "INSERT INTO events (tenant, ts, type, threat_type, severity, damage) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._write.executemany(
+                "INSERT INTO event_hours VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (tenant, hour, threat_type) DO UPDATE SET "
+                "count = count + excluded.count, severity_sum = severity_sum + excluded.severity_sum",
+                [(*key, count, total) for key, (count, total) in hours.items()])
+
+    def query(self, tenant: str, start: Optional[float] = None, end: Optional[float] = None,
+              threat_type: Optional[str] = None, min_severity: Optional[int] = None,
+              max_severity: Optional[int] = None, limit: int = 50,
+              cursor: Optional[str] = None) -> dict:
+        """One page of events, newest first; pass next_cursor back for the next page"""
+        where, args = ["tenant = ?"], [tenant]
+        if start is not None:
+            where.append("ts >= ?")
+            args.append(start)
+        if end is not None:
+            where.append("ts < ?")
+            args.append(end)
+        if threat_type:
+            where.append("threat_type = ?")
+            args.append(threat_type)
+        if min_severity is not None:
+            where.append("severity >= ?")
+            args.append(min_severity)
+        if max_severity is not None:
+            where.append("severity <= ?")
+            args.append(max_severity)
+        if cursor:
+            ts, _, row_id = cursor.partition(":")
+            where.append("(ts, id) < (?, ?)")
+            args += [float(ts), int(row_id)]
+
+        with self._read_lock:
+            rows = self._read.execute(
+                "SELECT id, ts, type, threat_type, severity, damage FROM events "
+                f"WHERE {' AND '.join(where)} ORDER BY ts DESC, id DESC LIMIT ?",
+                args + [limit + 1]).fetchall()
+
+        events = [{
+            "id": row_id,
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "type": kind,
+            "threat_type": threat,
+            "severity": severity,
+            "damage": damage
+        } for row_id, ts, kind, threat, severity, damage in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last_id, last_ts = rows[limit - 1][0], rows[limit - 1][1]
+            next_cursor = f"{last_ts!r}:{last_id}"
+        return {"events": events, "next_cursor": next_cursor}
+
+    def counts_by_type(self, tenant: str, start: Optional[float] = None,
+                       end: Optional[float] = None) -> dict:
+        """Event count and average severity per threat type, at hour granularity"""
+        where, args = self._hour_range(tenant, start, end)
+        with self._read_lock:
+            rows = self._read.execute(
+                "SELECT threat_type, SUM(count), SUM(severity_sum) FROM event_hours "
+                f"WHERE {where} GROUP BY threat_type ORDER BY SUM(count) DESC", args).fetchall()
+        return {threat_type: {"count": count, "avg_severity": round(total / count, 1)}
+                for threat_type, count, total in rows}
+
+    def counts_by_hour(self, tenant: str, start: Optional[float] = None,
+                       end: Optional[float] = None,
+                       threat_type: Optional[str] = None) -> List[dict]:
+        where, args = self._hour_range(tenant, start, end)
+        if threat_type:
+            where += " AND threat_type = ?"
+            args.append(threat_type)
+        with self._read_lock:
+            rows = self._read.execute(
+                "SELECT hour, SUM(count) FROM event_hours "
+                f"WHERE {where} GROUP BY hour ORDER BY hour", args).fetchall()
+        return [{"hour": datetime.fromtimestamp(hour * 3600).isoformat(), "count": count}
+                for hour, count in rows]
+
+    @staticmethod
+    def _hour_range(tenant: str, start: Optional[float], end: Optional[float]):
+        where, args = "tenant = ?", [tenant]
+        if start is not None:
+            where += " AND hour >= ?"
+            args.append(int(start // 3600))
+        if end is not None:
+            where += " AND hour < ?"
+            args.append(-int(-end // 3600))
+        return where, args
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                break
+            # Let a burst pile up so it goes in as one transaction
+            time.sleep(self.flush_interval)
+            try:
+                if not self.flush():
+                    self._wakeup.set()  # try again after the next interval
+            except Exception as e:
+                console.error(f"⚠️  Failed to write event history: {e}")
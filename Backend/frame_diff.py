@@ -0,0 +1,94 @@
+# backend/frame_diff.py
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+Box = Tuple[int, int, int, int]  # left, upper, right, lower (PIL crop order)
+
+
+def dhash(gray: np.ndarray, size: int = 8) -> int:
+    """64-bit difference hash of a grayscale array: is each pixel brighter than its right neighbour"""
+    small = np.asarray(Image.fromarray(gray).resize((size + 1, size), Image.BILINEAR),
+                       dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+@dataclass
+class FrameChange:
+    changed: bool
+    hash: int
+    distance: int  # dHash bits that differ from the reference frame
+    regions: List[Box] = field(default_factory=list)  # changed grid cells, in frame pixels
+    bbox: Optional[Box] = None  # smallest box covering them; None means the whole frame
+
+
+class FrameDiffer:
+    """Decides whether a screenshot differs from the last one that was analyzed
+
+    Each frame is reduced once to a small grayscale thumbnail. A dHash of the
+    thumbnail catches global changes; a per-cell mean absolute difference
+    over a grid catches local ones (a new dialog, a changed form) that are
+    too small to move the hash. The reference only advances when the caller
+    accepts a frame, so slow drift still adds up to a change.
+    """
+
+    def __init__(self, grid: Tuple[int, int] = (4, 4), hash_threshold: int = 4,
+                 region_threshold: float = 6.0, thumb_width: int = 256,
+                 full_frame_ratio: float = 0.6):
+        self.cols, self.rows = grid
+        self.hash_threshold = hash_threshold
+        self.region_threshold = region_threshold
+        self.thumb_width = thumb_width
+        self.full_frame_ratio = full_frame_ratio
+        self._ref_thumb: Optional[np.ndarray] = None
+        self._ref_hash: Optional[int] = None
+        self._pending: Optional[Tuple[np.ndarray, int]] = None
+
+    def compare(self, frame: Image.Image) -> FrameChange:
+        width, height = frame.size
+        thumb_height = max(self.rows, round(self.thumb_width * height / max(width, 1)))
+        thumb = np.asarray(frame.convert('L').resize(
+            (self.thumb_width, thumb_height), Image.BILINEAR), dtype=np.uint8)
+        frame_hash = dhash(thumb)
+        self._pending = (thumb, frame_hash)
+
+        if self._ref_thumb is None or self._ref_thumb.shape != thumb.shape:
+            return FrameChange(True, frame_hash, 64)
+
+        distance = hamming(frame_hash, self._ref_hash)
+        diff = np.abs(thumb.astype(np.int16) - self._ref_thumb.astype(np.int16))
+
+        regions = []
+        row_edges = np.linspace(0, thumb.shape[0], self.rows + 1).astype(int)
+        col_edges = np.linspace(0, thumb.shape[1], self.cols + 1).astype(int)
+        sx, sy = width / thumb.shape[1], height / thumb.shape[0]
+        for r in range(self.rows):
+            for c in range(self.cols):
+                cell = diff[row_edges[r]:row_edges[r + 1], col_edges[c]:col_edges[c + 1]]
+                if cell.size and cell.mean() > self.region_threshold:
+                    regions.append((int(col_edges[c] * sx), int(row_edges[r] * sy),
+                                    int(col_edges[c + 1] * sx), int(row_edges[r + 1] * sy)))
+
+        changed = distance > self.hash_threshold or bool(regions)
+        bbox = None
+        if regions and len(regions) < self.full_frame_ratio * self.rows * self.cols:
+            bbox = (min(b[0] for b in regions), min(b[1] for b in regions),
+                    max(b[2] for b in regions), max(b[3] for b in regions))
+        return FrameChange(changed, frame_hash, distance, regions, bbox)
+
+    def accept(self):
+        """Makes the last compared frame the reference for future comparisons"""
+        if self._pending is not None:
+            self._ref_thumb, self._ref_hash = self._pending
+            self._pending = None
+
+    def reset(self):
+        self._ref_thumb = self._ref_hash = self._pending = None
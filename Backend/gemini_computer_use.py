@@ -1,32 +1,203 @@
 # gemini_computer_use.py - SIMPLE MOCK VERSION
 import asyncio
-import random
-from typing import Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
+import console
+from config import settings
+from analyzer_pool import AnalyzerPool
+from analyzers import Analyzer, load_analyzer
+
+if TYPE_CHECKING:
+    from frame_diff import FrameChange, FrameDiffer
+    from screen_cache import ScreenVerdictCache
+
+
+def capture_screen():
+    """Full-screen PIL image, or None when there is no display to capture"""
+    try:
+        import pyautogui
+        return pyautogui.screenshot()
+    except Exception as e:
+        console.warning(f"⚠️  Screen capture unavailable: {e}")
+        return None
+
 
 class GeminiComputerUse:
-    def __init__(self):
-        print("✅ GeminiComputerUse initialized in MOCK mode")
-    
-    async def analyze_screenshot(self) -> Dict[str, Any]:
-        """Simple mock analysis that always works"""
-        # Simulate some processing time
-        await asyncio.sleep(2)
-        
-        # For demo purposes, randomly detect threats sometimes
-        if random.random() < 0.4:  # 40% chance of threat for demo
-            threat_type = random.choice(["phishing_email", "suspicious_website", "fake_login"])
-            return {
-                "threat_detected": True,
-                "threat_type": threat_type,
-                "confidence": random.randint(70, 95),
-                "explanation": f"Mock {threat_type} detected for demo purposes",
-                "user_friendly_message": f"⚠️ Mock {threat_type.replace('_', ' ')} detected!"
-            }
-        else:
-            return {
-                "threat_detected": False,
-                "threat_type": "none",
-                "confidence": 0,
-                "explanation": "No threats detected - running in mock mode",
-                "user_friendly_message": "✅ Everything looks secure!"
-            }
\ No newline at end of file
+    """Screenshot monitoring: capture, frame diff, screen cache and analyzer pool
+
+    The analyzer, the analyzer pool, the frame differ and the screen cache
+    (with numpy and Pillow behind them) are only built on first use, or by
+    warm_up(), so importing this module costs nothing for the URL and pet
+    endpoints.
+    """
+
+    def __init__(self, analyzer: Optional[Analyzer] = None, capture=capture_screen):
+        self.capture = capture
+        # One capture thread: frames must be diffed in the order they were taken
+        self.capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+        self._analyzer = analyzer
+        self._pool: Optional[AnalyzerPool] = None
+        self._frame_differ: Optional["FrameDiffer"] = None
+        self._verdict_cache: Optional["ScreenVerdictCache"] = None
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.last_verdict: Optional[asyncio.Future] = None
+        self.last_change: Optional["FrameChange"] = None  # for the latest capture, if any
+        self.last_analyzed = False  # whether the latest frame went to the analyzer
+        self.frames_analyzed = 0
+        self.frames_skipped = 0
+        self._skips_in_a_row = 0
+
+    def warm_up(self):
+        """Loads the analyzer and builds the pool, frame differ and screen cache
+
+        Safe to call from any thread; does nothing once loaded.
+        """
+        with self._load_lock:
+            if self.loaded:
+                return
+            from frame_diff import FrameDiffer
+            from screen_cache import ScreenVerdictCache
+
+            self._analyzer = self._analyzer or load_analyzer(settings.ANALYZER)
+            self._pool = AnalyzerPool(
+                self._analyzer,
+                workers=settings.ANALYZER_WORKERS,
+                queue_size=settings.ANALYZER_QUEUE_SIZE,
+                timeout=settings.ANALYZER_TIMEOUT
+            )
+            self._frame_differ = FrameDiffer(
+                grid=settings.FRAME_GRID,
+                hash_threshold=settings.FRAME_HASH_THRESHOLD,
+                region_threshold=settings.FRAME_REGION_THRESHOLD
+            )
+            self._verdict_cache = ScreenVerdictCache(
+                max_size=settings.SCREEN_CACHE_SIZE,
+                ttl=settings.SCREEN_CACHE_TTL,
+                threshold=settings.SCREEN_CACHE_THRESHOLD,
+                path=settings.SCREEN_CACHE_FILE
+            )
+            self.loaded = True
+        console.info(f"✅ GeminiComputerUse initialized with the {self._analyzer.name} analyzer")
+
+    @property
+    def analyzer(self) -> Analyzer:
+        if not self.loaded:
+            self.warm_up()
+        return self._analyzer
+
+    @property
+    def pool(self) -> AnalyzerPool:
+        if not self.loaded:
+            self.warm_up()
+        return self._pool
+
+    @property
+    def frame_differ(self) -> "FrameDiffer":
+        if not self.loaded:
+            self.warm_up()
+        return self._frame_differ
+
+    @property
+    def verdict_cache(self) -> "ScreenVerdictCache":
+        if not self.loaded:
+            self.warm_up()
+        return self._verdict_cache
+
+    async def analyze_and_act(self) -> Dict[str, Any]:
+        """Capture the screen and analyze it, reusing the last verdict if nothing changed"""
+        return await (await self.submit_frame())
+
+    async def submit_frame(self) -> asyncio.Future:
+        """Captures and diffs a frame off the event loop, then queues it for analysis
+
+        Returns a future for its verdict without waiting on the analyzer. An
+        unchanged frame gets the previous frame's verdict future instead.
+        """
+        if not self.loaded:
+            await asyncio.to_thread(self.warm_up)
+        previous = self.last_verdict
+        may_skip = (previous is not None and not previous.cancelled()
+                    and (not previous.done() or previous.exception() is None)
+                    and self._skips_in_a_row < settings.FRAME_MAX_SKIPS)
+        loop = asyncio.get_running_loop()
+        image, key, change, analyze = await loop.run_in_executor(
+            self.capture_executor, self._prepare_frame, may_skip)
+        self.last_change = change
+        self.last_analyzed = False
+        if not analyze:
+            self.frames_skipped += 1
+            self._skips_in_a_row += 1
+            console.debug(f"💤 Screen unchanged (dHash distance {change.distance}) - reusing last verdict")
+            return self.last_verdict
+
+        self._skips_in_a_row = 0
+        cached = self.verdict_cache.get(key) if key is not None else None
+        if cached is not None:
+            console.debug("♻️  Seen this screen before - using its cached verdict")
+            self.last_verdict = loop.create_future()
+            self.last_verdict.set_result(cached)
+            return self.last_verdict
+
+        self.frames_analyzed += 1
+        self.last_analyzed = True
+        self.last_verdict = self.pool.submit(image)
+        if key is not None:
+            self.last_verdict.add_done_callback(
+                lambda f: f.cancelled() or f.exception() or self.verdict_cache.put(key, f.result()))
+        return self.last_verdict
+
+    def _prepare_frame(self, may_skip: bool) -> Tuple[Any, Optional[tuple], Optional["FrameChange"], bool]:
+        """(image to analyze, its cache key, change vs the reference, whether to analyze it)"""
+        from screen_cache import screen_key
+        frame = self.capture()
+        if frame is None:
+            return None, None, None, True
+
+        change = self.frame_differ.compare(frame)
+        if not change.changed and may_skip:
+            return None, None, change, False
+
+        # The reference moves as soon as a frame is sent off, so the next
+        # capture is compared against what the analyzer is looking at
+        self.frame_differ.accept()
+        # Only the part of the screen that changed goes to the analyzer
+        image = frame.crop(change.bbox) if change.changed and change.bbox else frame
+        return image, screen_key(image), change, True
+
+    def frame_stats(self) -> Dict[str, Any]:
+        cached = self._verdict_cache.cache.hits if self.loaded else 0
+        total = self.frames_analyzed + self.frames_skipped + cached
+        return {
+            "analyzed": self.frames_analyzed,
+            "skipped": self.frames_skipped,
+            "cached": cached,
+            "skip_rate": round(self.frames_skipped / total, 4) if total else 0.0,
+            # Every frame the analyzer didn't see is a call saved
+            "analyzer_calls_saved": self.frames_skipped + cached
+        }
+
+    async def analyze_current_screen(self) -> Dict[str, Any]:
+        """One capture straight to the analyzer, outside of monitoring
+
+        Leaves the frame differ's reference, the screen cache, the pool's
+        queue and the frame counters alone, and always gets a fresh verdict.
+        """
+        if not self.loaded:
+            await asyncio.to_thread(self.warm_up)
+        image = await asyncio.get_running_loop().run_in_executor(self.capture_executor, self.capture)
+        return await asyncio.wait_for(self.analyzer.analyze(image), settings.ANALYZER_TIMEOUT)
+
+    async def analyze_screenshot(self, image=None) -> Dict[str, Any]:
+        """Analyze one screenshot through the analyzer pool"""
+        if not self.loaded:
+            await asyncio.to_thread(self.warm_up)
+        return await self.pool.analyze(image)
+
+    async def close(self):
+        if self.loaded:
+            await self._pool.stop()
+            self._verdict_cache.save()
+            await self._analyzer.close()
+        self.capture_executor.shutdown(wait=False)
@@ -0,0 +1,135 @@
+# backend/keyword_matcher.py
+
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional
+
+import console
+
+SMALL_LIST = 32  # below this, plain substring checks beat the regex scan
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a keyword trie; greedy, so the longest keyword is tried first"""
+    branches = [re.escape(c) + _trie_pattern(child)
+                for c, child in sorted(node.items()) if c]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return '(?:' + body + ')?' if '' in node else body
+
+
+class KeywordMatcher:
+    """Finds every phishing keyword in a string with one compiled regex scan
+
+    The keywords are compiled into a trie-shaped regex inside a lookahead, so
+    a single finditer pass reports the longest keyword starting at each
+    position (overlapping hits included). Shorter keywords that are prefixes
+    of that hit are added from a precomputed table, which gives exactly the
+    same set as testing `kw in text` for every keyword.
+
+    Keyword files have one term per line with an optional weight after it
+    ("verify 1.5"); blank lines and lines starting with # are ignored.
+    """
+
+    def __init__(self, keywords: Iterable = (), path: Optional[str] = None,
+                 reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.version = 0
+        self._mtime = None
+        self._checked_at = time.monotonic()
+        if path:
+            self.load(path)
+        else:
+            self.set_keywords(keywords)
+
+    @property
+    def keywords(self) -> List[str]:
+        return list(self._compiled[2])
+
+    def set_keywords(self, keywords: Iterable):
+        """Compiles a list of terms or (term, weight) pairs"""
+        weights: Dict[str, float] = {}
+        for kw in keywords:
+            term, weight = (kw, 1.0) if isinstance(kw, str) else kw
+            term = term.strip().lower()
+            if term and term not in weights:
+                weights[term] = float(weight)
+
+        trie: dict = {}
+        for term in weights:
+            node = trie
+            for c in term:
+                node = node.setdefault(c, {})
+            node[''] = True
+
+        pattern = re.compile('(?=(' + _trie_pattern(trie) + '))') if weights else None
+        prefixes = {term: [term[:i] for i in range(1, len(term)) if term[:i] in weights]
+                    for term in weights}
+        rank = {term: i for i, term in enumerate(weights)}
+
+        # Swapped in as one tuple so a concurrent find never sees a mix
+        self._compiled = (pattern, prefixes, rank, weights)
+        self.version += 1
+
+    def find(self, text: str) -> List[str]:
+        """All keywords contained in text, in keyword list order"""
+        pattern, prefixes, rank, weights = self._compiled
+        if len(weights) < SMALL_LIST:
+            return [kw for kw in weights if kw in text]
+
+        found = set()
+        for m in pattern.finditer(text):
+            kw = m.group(1)
+            if kw not in found:
+                found.add(kw)
+                found.update(prefixes[kw])
+        return sorted(found, key=rank.__getitem__)
+
+    def score(self, found: List[str]) -> float:
+        """Summed weight of the keywords returned by find"""
+        weights = self._compiled[3]
+        return sum(weights[kw] for kw in found)
+
+    def load(self, path: str):
+        """Replaces the keywords with the contents of a keyword file"""
+        terms = []
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.rsplit(None, 1)
+                if len(parts) == 2:
+                    try:
+                        terms.append((parts[0], float(parts[1])))
+                        continue
+                    except ValueError:
+                        pass
+                terms.append((line, 1.0))
+
+        self._mtime = os.path.getmtime(path)
+        self.set_keywords(terms)
+
+    def maybe_reload(self) -> bool:
+        """Reloads the keyword file if it changed, checking at most once per interval"""
+        if not self.path:
+            return False
+
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+
+        try:
+            if os.path.getmtime(self.path) == self._mtime:
+                return False
+            self.load(self.path)
+        except Exception as e:
+            console.warning(f"⚠️  Failed to reload phishing keywords: {e}")
+            return False
+
+        console.info(f"🔄 Reloaded {len(self._compiled[3])} phishing keywords")
+        return True
@@ -1,14 +1,30 @@
 # backend/main.py
 
+from connection_manager import DEFAULT_TENANT, ConnectionManager
+from event_ingest import EventIngestor, QueueFull
+from event_store import EventStore
+from shared_state import Lease, SharedBus, SharedState
+from tenants import PetRegistry, valid_tenant
 from pet_manager import PetManager
 from gemini_computer_use import GeminiComputerUse
+from monitor_pipeline import MonitorPipeline
+from monitor_scheduler import MonitorScheduler
+from offload import Offloader
 from security_detector import SecurityDetector
+from breach_index import IndexClosed, parse_prefix
 from models import SecurityEvent
+import console
+import metrics
 from config import settings
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, List, Optional, TypeVar
 import asyncio
+import json
+import math
+import time
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
 
 app = FastAPI(title="CyberPet - Gemini 2.5 Computer Use")
@@ -23,88 +39,228 @@ app.add_middleware(
 
 # Initialize
 security_detector = SecurityDetector()
+# Big URL batches run in worker processes, blocking reads in threads
+offload = Offloader(
+    security_detector,
+    processes=settings.DETECTOR_PROCESSES,
+    max_pending=settings.DETECTOR_MAX_PENDING,
+    io_threads=settings.IO_THREADS,
+    inline_max_urls=settings.DETECTOR_INLINE_MAX_URLS,
+    job_urls=settings.DETECTOR_JOB_URLS
+)
 gemini_computer_use = GeminiComputerUse()
-pet_manager = PetManager()
+event_store = EventStore(settings.EVENT_DB_FILE, max_pending=settings.EVENT_MAX_PENDING)
+# Set for multi-worker deployments; None keeps everything in this process
+shared = (SharedState(settings.SHARED_STATE_DB, busy_timeout=settings.SHARED_BUSY_TIMEOUT)
+          if settings.SHARED_STATE_DB else None)
+bus = SharedBus(shared, poll_interval=settings.SHARED_POLL_INTERVAL,
+                retention=settings.SHARED_MESSAGE_RETENTION) if shared else None
+monitor_lease = Lease(shared, "monitoring", ttl=settings.MONITOR_LEASE_TTL) if shared else None
+pets = PetRegistry(
+    directory=settings.PET_TENANT_DIR,
+    max_loaded=settings.PET_MAX_LOADED,
+    idle_timeout=settings.PET_IDLE_TIMEOUT,
+    event_store=event_store,
+    shared=shared
+)
 
-# WebSocket manager
+manager = ConnectionManager(
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT,
+    bus=bus
+)
+scheduler = MonitorScheduler(
+    interval=settings.SCREENSHOT_INTERVAL,
+    min_interval=settings.MONITOR_MIN_INTERVAL,
+    max_interval=settings.MONITOR_MAX_INTERVAL,
+    backoff_factor=settings.MONITOR_BACKOFF_FACTOR,
+    safe_streak=settings.MONITOR_SAFE_STREAK,
+    calls_per_minute=settings.MONITOR_CALLS_PER_MINUTE,
+    jitter=settings.MONITOR_JITTER
+)
+monitoring_active = False  # single process only; workers share a flag instead
+monitoring_task: Optional[asyncio.Task] = None
 
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        print(f"🔌 WebSocket connected (total: {len(self.active_connections)})")
+def get_tenant(tenant: Optional[str] = None,
+               x_tenant_id: Optional[str] = Header(None)) -> str:
+    """Whose pet a request is for: ?tenant= or X-Tenant-ID, else the default pet"""
+    tenant = tenant or x_tenant_id or DEFAULT_TENANT
+    if not valid_tenant(tenant):
+        raise HTTPException(status_code=400, detail="Invalid tenant id")
+    return tenant
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-        print(f"🔌 WebSocket disconnected")
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+T = TypeVar("T")
 
 
-manager = ConnectionManager()
-monitoring_active = False
-monitoring_task: Optional[asyncio.Task] = None
+async def with_pet(tenant: str, action: Callable[[PetManager], T]) -> T:
+    """action(pet) for a tenant's pet. With shared state, loading, refreshing
+    and updating a pet are database calls, so they run on the database
+    thread instead of the event loop"""
+    if shared is None:
+        return action(pets.get(tenant))
+    return await shared.run(lambda: action(pets.get(tenant)))
 
 # ==================== API ENDPOINTS ====================
 
 
 @app.get("/")
-async def root():
+async def root(tenant: str = Depends(get_tenant)):
     return {
         "status": "running",
         "message": "CyberPet - Gemini 2.5 Computer Use",
-        "pet_state": pet_manager.get_state(),
-        "monitoring_active": monitoring_active,
+        "pet_state": await with_pet(tenant, PetManager.get_state),
+        "monitoring_active": await monitoring_wanted(),
         "screenshot_interval": settings.SCREENSHOT_INTERVAL
     }
 
 
+def _threat_message(event: SecurityEvent) -> dict:
+    return {
+        "threat_type": event.type,
+        "confidence": event.severity,
+        "explanation": event.metadata.get("reason", "Threat detected"),
+        "user_friendly_message": f"⚠️ {event.type.replace('_', ' ').title()}!"
+    }
+
+
+async def apply_event_batch(batch: List[tuple]) -> dict:
+    """Ingestion consumer: one PetManager update and one broadcast per tenant per tick"""
+    by_tenant = {}
+    for tenant, event in batch:
+        by_tenant.setdefault(tenant, []).append(event)
+    console.info(f"\n📨 {len(batch)} event(s) from extension for {len(by_tenant)} pet(s)")
+
+    pet_states = {}
+    for tenant, events in by_tenant.items():
+        pet_state = await with_pet(tenant, lambda pet: pet.apply_events(
+            [(event.severity, event.type) for event in events]))
+
+        worst = max(events, key=lambda event: event.severity)
+        await manager.broadcast({
+            "type": "threat_detected",
+            "threat": _threat_message(worst),
+            "batch_size": len(events),
+            "pet_state": pet_state
+        }, tenant=tenant)
+        pet_states[tenant] = pet_state
+    return pet_states
+
+
+ingestor = EventIngestor(
+    apply_event_batch,
+    max_queue=settings.INGEST_QUEUE_SIZE,
+    max_batch=settings.INGEST_MAX_BATCH,
+    tick=settings.INGEST_TICK
+)
+
+
+def _queue_full(error: QueueFull) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(error), "retry_after": error.retry_after},
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+
 @app.post("/api/security-event")
-async def log_security_event(event: SecurityEvent):
-    print(
+async def log_security_event(event: SecurityEvent, tenant: str = Depends(get_tenant)):
+    console.info(
         f"\n📨 Event from extension: {event.type} (severity: {event.severity})")
 
-    pet_state = pet_manager.process_threat_event(event.severity, event.type)
-
-    await manager.broadcast({
-        "type": "threat_detected",
-        "threat": {
-            "threat_type": event.type,
-            "confidence": event.severity,
-            "explanation": event.metadata.get("reason", "Threat detected"),
-            "user_friendly_message": f"⚠️ {event.type.replace('_', ' ').title()}!"
-        },
-        "pet_state": pet_state
-    })
+    try:
+        [applied] = ingestor.offer([(tenant, event)])
+    except QueueFull as e:
+        return _queue_full(e)
+    pet_state = (await applied)[tenant]
 
     return {"pet_state": pet_state, "should_popup": event.severity > 50}
 
 
+@app.post("/api/security-events", status_code=202)
+async def log_security_events(events: List[SecurityEvent],
+                              tenant: str = Depends(get_tenant)):
+    """Queue a batch of events (e.g. the extension's offline backlog) in one request"""
+    try:
+        ingestor.offer([(tenant, event) for event in events], track=False)
+    except QueueFull as e:
+        return _queue_full(e)
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return {"accepted": len(events), "queued": ingestor.stats()["queued"]}
+
+
+@app.get("/api/ingest/stats")
+async def get_ingest_stats():
+    """Queue depth and batching counters for the event ingestion queue"""
+    return ingestor.stats()
+
+
 @app.get("/api/pet-state")
-async def get_pet_state():
-    return pet_manager.get_state()
+async def get_pet_state(tenant: str = Depends(get_tenant)):
+    return await with_pet(tenant, PetManager.get_state)
 
 
 @app.post("/api/good-behavior")
-async def log_good_behavior(data: dict):
+async def log_good_behavior(data: dict, tenant: str = Depends(get_tenant)):
     time_safe = data.get("time_safe", 60)
-    pet_state = pet_manager.process_good_behavior(time_safe)
-    await manager.broadcast({"type": "health_update", "pet_state": pet_state})
+    ticks = data.get("ticks", 1)  # > 1 catches up on checks missed while offline
+    if isinstance(ticks, int) and ticks > 1:
+        pet_state = await with_pet(tenant, lambda pet: pet.advance(ticks))
+    else:
+        pet_state = await with_pet(tenant, lambda pet: pet.process_good_behavior(time_safe))
+    await manager.broadcast({"type": "health_update", "pet_state": pet_state},
+                            coalesce_key="pet_state", tenant=tenant)
     return pet_state
 
 
 @app.get("/api/events/recent")
-async def get_recent_events():
-    return {"events": pet_manager.event_history[-10:]}
+async def get_recent_events(tenant: str = Depends(get_tenant)):
+    return {"events": await with_pet(tenant, lambda pet: list(pet.event_history)[-10:])}
+
+
+def _epoch(moment: Optional[datetime]) -> Optional[float]:
+    return moment.timestamp() if moment is not None else None
+
+
+@app.get("/api/events")
+async def query_events(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       type: Optional[str] = None,
+                       min_severity: Optional[int] = None, max_severity: Optional[int] = None,
+                       limit: int = Query(50, ge=1, le=500), cursor: Optional[str] = None,
+                       tenant: str = Depends(get_tenant)):
+    """Event history newest first; follow next_cursor for older pages"""
+    try:
+        return await offload.io(
+            event_store.query, tenant, _epoch(start), _epoch(end), type,
+            min_severity, max_severity, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/api/events/stats/by-type")
+async def event_counts_by_type(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               tenant: str = Depends(get_tenant)):
+    """Events and average severity per threat type (whole hours)"""
+    return await offload.io(
+        event_store.counts_by_type, tenant, _epoch(start), _epoch(end))
+
+
+@app.get("/api/events/stats/by-hour")
+async def event_counts_by_hour(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               type: Optional[str] = None,
+                               tenant: str = Depends(get_tenant)):
+    """Events per hour, optionally for one threat type"""
+    return {"hours": await offload.io(
+        event_store.counts_by_hour, tenant, _epoch(start), _epoch(end), type)}
+
+
+@app.get("/api/tenants/stats")
+async def get_tenant_stats():
+    """Loaded pets, loads from disk and LRU/idle evictions"""
+    return {**pets.stats(), "connected_tenants": len(manager.groups)}
 
 # ==================== MONITORING CONTROL ENDPOINTS ====================
 
@@ -112,17 +268,15 @@ async def get_recent_events():
 @app.post("/api/monitoring/start")
 async def start_monitoring_endpoint():
     """Start continuous screenshot monitoring"""
-    global monitoring_active, monitoring_task
-
-    if monitoring_active:
+    if await monitoring_wanted():
         return {
             "status": "already_running",
             "message": "Monitoring is already active",
             "interval": settings.SCREENSHOT_INTERVAL
         }
 
-    monitoring_active = True
-    monitoring_task = asyncio.create_task(monitor_loop())
+    await set_monitoring_wanted(True)
+    await sync_monitoring()
 
     return {
         "status": "started",
@@ -134,22 +288,14 @@ async def start_monitoring_endpoint():
 @app.post("/api/monitoring/stop")
 async def stop_monitoring_endpoint():
     """Stop continuous screenshot monitoring"""
-    global monitoring_active, monitoring_task
-
-    if not monitoring_active:
+    if not await monitoring_wanted():
         return {
             "status": "not_running",
             "message": "Monitoring is not active"
         }
 
-    monitoring_active = False
-
-    if monitoring_task:
-        monitoring_task.cancel()
-        try:
-            await monitoring_task
-        except asyncio.CancelledError:
-            pass
+    await set_monitoring_wanted(False)
+    await sync_monitoring()
 
     return {
         "status": "stopped",
@@ -161,36 +307,128 @@ async def stop_monitoring_endpoint():
 async def get_monitoring_status():
     """Check if monitoring is active"""
     return {
-        "monitoring_active": monitoring_active,
+        "monitoring_active": await monitoring_wanted(),
+        "monitoring_here": monitoring_task is not None and not monitoring_task.done(),
+        "monitoring_owner": await shared.run(monitor_lease.owner) if monitor_lease else None,
         "screenshot_interval": settings.SCREENSHOT_INTERVAL,
-        "pet_state": pet_manager.get_state()
+        "schedule": scheduler.stats(),
+        "frames": gemini_computer_use.frame_stats(),
+        "pipeline": pipeline.stats(),
+        "analyzer": gemini_computer_use.pool.stats() if gemini_computer_use.loaded else None,
+        "pet_state": await with_pet(settings.MONITOR_TENANT, PetManager.get_state)
     }
 
 # ==================== TEST ENDPOINTS ====================
 
 
+def _check_mode(mode: str):
+    try:
+        offload.mode_for(1, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/api/test/url")
-async def test_url(data: dict):
+async def test_url(data: dict, mode: str = "auto"):
+    """?mode=inline|pool overrides where the check runs (default: auto)"""
+    _check_mode(mode)
     url = data.get("url", "")
-    result = security_detector.analyze_url(url)
-    print(f"\n🧪 URL TEST: {url} → {result['threat_type']}")
+    result = await offload.analyze_url(url, mode)
+    console.info(f"\n🧪 URL TEST: {url} → {result['threat_type']}")
     return result
 
 
+@app.post("/api/test/urls")
+async def test_urls(data: dict, mode: str = "auto"):
+    """Analyze a whole batch of URLs (e.g. a history scan) in one request;
+    batches over DETECTOR_INLINE_MAX_URLS go to the detector processes"""
+    _check_mode(mode)
+    urls = data.get("urls", [])
+    results = await offload.analyze_urls(urls, mode)
+    threats = sum(1 for r in results if r["is_threat"])
+    console.info(f"\n🧪 URL BATCH TEST: {len(urls)} URLs → {threats} threats")
+    return Response(await offload.io(_encode_results, results), media_type="application/json")
+
+
+def _encode_results(results: List[dict]) -> bytes:
+    """{"results": [...]} a slice at a time, run on a thread: FastAPI would
+    encode a big batch on the event loop, and one json.dumps call holds the
+    GIL (so the loop too) until it's done"""
+    parts = (json.dumps(results[i:i + 500], separators=(",", ":"))[1:-1]
+             for i in range(0, len(results), 500))
+    return ('{"results":[' + ",".join(parts) + "]}").encode()
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the URL and screenshot verdict caches"""
+    return {
+        **security_detector.verdict_cache.stats(),
+        "hosts": security_detector.public_suffixes.cache_info(),
+        "screens": {
+            **(gemini_computer_use.verdict_cache.stats() if gemini_computer_use.loaded else {}),
+            "analyzer_calls_saved": gemini_computer_use.frame_stats()["analyzer_calls_saved"]
+        }
+    }
+
+
+@app.get("/api/rules/stats")
+async def get_rule_stats():
+    """Per-rule evaluation counts, matches and time, in plan order"""
+    return security_detector.rule_engine.stats()
+
+
+@app.get("/api/threat-intel/stats")
+async def get_threat_intel_stats():
+    """Entries, delta backlog and disk size of the local threat-intel stores"""
+    return security_detector.threat_intel.stats()
+
+
+@app.get("/api/breach-range/{prefix}")
+async def get_breach_range(prefix: str, format: str = "text"):
+    """Breached SHA-1 suffixes under a 5-hex-digit prefix, from the local index
+    (Pwned Passwords range format, or the raw 22-byte records with format=binary)"""
+    try:
+        parse_prefix(prefix)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # An index replaced on disk is closed under us at most once in a row;
+    # the second attempt reads the new one
+    for attempt in range(2):
+        index = security_detector.breach_index
+        if index is None:
+            raise HTTPException(status_code=503, detail="No breached-password index imported")
+        try:
+            # Reads from the mapping can fault pages in from disk
+            if format == "binary":
+                return Response(await offload.io(index.range_bytes, prefix),
+                                media_type="application/octet-stream")
+            return PlainTextResponse(await offload.io(index.range_text, prefix))
+        except IndexClosed:
+            continue
+    raise HTTPException(status_code=503, detail="Breached-password index is being replaced, retry")
+
+
+@app.get("/api/offload/stats")
+async def get_offload_stats():
+    """Detector calls run inline vs in the process pool, pool jobs queued and running"""
+    return offload.stats()
+
+
 @app.post("/api/test/screenshot")
 async def test_screenshot():
     """Manually trigger ONE screenshot analysis (doesn't count as monitoring)"""
-    print("\n🧪 MANUAL SCREENSHOT TEST")
-    result = await gemini_computer_use.analyze_and_act()
+    console.info("\n🧪 MANUAL SCREENSHOT TEST")
+    result = await gemini_computer_use.analyze_current_screen()
     return result
 
 
 @app.post("/api/test/trigger-threat")
-async def test_trigger_threat(data: dict):
+async def test_trigger_threat(data: dict, tenant: str = Depends(get_tenant)):
     severity = data.get("severity", 75)
     threat_type = data.get("threat_type", "test_threat")
 
-    pet_state = pet_manager.process_threat_event(severity, threat_type)
+    pet_state = await with_pet(tenant, lambda pet: pet.process_threat_event(severity, threat_type))
 
     await manager.broadcast({
         "type": "threat_detected",
@@ -201,7 +439,7 @@ async def test_trigger_threat(data: dict):
             "user_friendly_message": "Test!"
         },
         "pet_state": pet_state
-    })
+    }, tenant=tenant)
 
     return {"success": True, "pet_state": pet_state}
 
@@ -209,119 +447,271 @@ async def test_trigger_threat(data: dict):
 
 
 @app.post("/api/demo/reset-pet")
-async def reset_pet():
+async def reset_pet(tenant: str = Depends(get_tenant)):
     """Reset pet to full health for fresh demo"""
-    pet_manager.health = 100
-    pet_manager.evolution_stage = 1
-    pet_manager.points = 0
-    pet_manager.good_behavior_streak = 0
-    pet_manager.event_history = []
-    pet_manager._save_state()
+    pet_state = await with_pet(tenant, PetManager.reset)
 
     # Broadcast the reset to all connected clients
     await manager.broadcast({
         "type": "health_update",
-        "pet_state": pet_manager.get_state()
-    })
+        "pet_state": pet_state
+    }, coalesce_key="pet_state", tenant=tenant)
 
-    print("\n🔄 Pet reset to default state")
+    console.info("\n🔄 Pet reset to default state")
 
-    return {"status": "reset", "pet_state": pet_manager.get_state()}
+    return {"status": "reset", "pet_state": pet_state}
 
 
 @app.post("/api/demo/set-health")
-async def set_health(data: dict):
+async def set_health(data: dict, tenant: str = Depends(get_tenant)):
     """Manually set pet health for demo scenarios"""
     health = data.get("health", 100)
-    pet_manager.health = max(0, min(100, health))  # Clamp between 0-100
-    pet_manager._save_state()
+    pet_state = await with_pet(tenant, lambda pet: pet.set_health(health))  # Clamped between 0-100
 
     await manager.broadcast({
         "type": "health_update",
-        "pet_state": pet_manager.get_state()
-    })
+        "pet_state": pet_state
+    }, coalesce_key="pet_state", tenant=tenant)
 
-    print(f"\n💊 Pet health manually set to {health}")
+    console.info(f"\n💊 Pet health manually set to {health}")
 
-    return {"status": "updated", "pet_state": pet_manager.get_state()}
+    return {"status": "updated", "pet_state": pet_state}
 
 # ==================== WEBSOCKET ====================
 
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, stream: str = "full",
+                             tenant: str = DEFAULT_TENANT):
+    """/ws?stream=delta gets a seq-numbered snapshot, then field-level deltas.
+    Send {"type": "resync", "since": <seq>} to catch up after a gap.
+    ?tenant=<id> joins that pet's broadcast group."""
+    if not valid_tenant(tenant):
+        await websocket.close(code=1008)
+        return
+    state = await with_pet(tenant, PetManager.get_state)
+    await manager.connect(websocket, mode="delta" if stream == "delta" else "full",
+                          tenant=tenant, state=state)
     try:
         while True:
             data = await websocket.receive_text()
-            await websocket.send_json({"echo": data})
+            request = _parse_ws_request(data)
+            if request.get("type") == "resync":
+                since = _resync_since(request)
+                if since is None:
+                    await manager.send_personal(websocket, {
+                        "type": "error", "error": "resync 'since' must be an integer seq"})
+                else:
+                    await manager.resync(websocket, since)
+            else:
+                await manager.send_personal(websocket, {"echo": data})
     except WebSocketDisconnect:
+        pass
+    finally:
         manager.disconnect(websocket)
 
+
+def _parse_ws_request(data: str) -> dict:
+    try:
+        request = json.loads(data)
+    except ValueError:
+        return {}
+    return request if isinstance(request, dict) else {}
+
+
+def _resync_since(request: dict) -> Optional[int]:
+    """The seq to resync from (-1, a fresh snapshot, when left out); None if invalid"""
+    since = request.get("since", -1)
+    if isinstance(since, bool) or not isinstance(since, int) or since < -1:
+        return None
+    return since
+
+
+@app.get("/api/ws/stats")
+async def get_ws_stats():
+    """Connections, queued/dropped/coalesced messages and evicted sockets"""
+    return {**manager.stats(), "bus": bus.stats() if bus else None}
+
+# ==================== METRICS ====================
+
+# Queue depths, read when /metrics is scraped
+metrics.Gauge("cyberpet_ws_connections", "Open WebSocket connections",
+              lambda: len(manager.clients))
+metrics.Gauge("cyberpet_ws_queued_messages", "Messages waiting in WebSocket send queues",
+              lambda: manager.stats()["queued"])
+metrics.Gauge("cyberpet_ingest_queued_events", "Extension events waiting to be applied",
+              lambda: ingestor.stats()["queued"])
+metrics.Gauge("cyberpet_analyzer_queued", "Screenshots waiting for an analyzer worker",
+              lambda: gemini_computer_use.pool.stats()["queued"] if gemini_computer_use.loaded else 0)
+metrics.Gauge("cyberpet_analyzer_in_flight", "Analyzer calls running",
+              lambda: gemini_computer_use.pool.in_flight if gemini_computer_use.loaded else 0)
+metrics.Gauge("cyberpet_monitor_pending", "Captured frames awaiting a verdict",
+              lambda: pipeline.stats()["pending"])
+metrics.Gauge("cyberpet_offload_waiting", "Detector pool jobs waiting for a slot",
+              lambda: offload.waiting)
+metrics.Gauge("cyberpet_offload_in_flight", "Detector pool jobs running or queued in the pool",
+              lambda: offload.in_flight)
+metrics.Gauge("cyberpet_pets_loaded", "Pets held in memory",
+              lambda: pets.stats()["loaded"])
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Counters, latency histograms and queue depths in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # ==================== BACKGROUND MONITORING ====================
 
 
-async def monitor_loop():
-    """Gemini 2.5 Computer Use monitoring loop"""
-    global monitoring_active
+async def handle_check_result(result: dict, elapsed: float):
+    """Update stage of the monitoring pipeline: one verdict -> pet + frontend"""
+    console.info(f"\n{'='*60}\n🔍 Check #{pipeline.handled + 1}\n{'='*60}")
 
-    print("\n" + "="*60)
-    print("🚀 GEMINI 2.5 COMPUTER USE - MONITORING STARTED")
-    print(f"   Interval: {settings.SCREENSHOT_INTERVAL} seconds")
-    print("="*60)
+    if result["threat_detected"]:
+        pet_state = await with_pet(settings.MONITOR_TENANT, lambda pet: pet.process_threat_event(
+            severity=result["confidence"],
+            threat_type=result["threat_type"]
+        ))
 
-    check_count = 0
+        await manager.broadcast({
+            "type": "threat_detected",
+            "threat": result,
+            "pet_state": pet_state
+        }, tenant=settings.MONITOR_TENANT)
 
-    try:
-        while monitoring_active:
-            check_count += 1
-            print(f"\n{'='*60}")
-            print(f"🔍 Check #{check_count}")
-            print(f"{'='*60}")
-
-            try:
-                # Gemini Computer Use analysis
-                result = await gemini_computer_use.analyze_and_act()
-
-                if result["threat_detected"]:
-                    pet_state = pet_manager.process_threat_event(
-                        severity=result["confidence"],
-                        threat_type=result["threat_type"]
-                    )
-
-                    await manager.broadcast({
-                        "type": "threat_detected",
-                        "threat": result,
-                        "pet_state": pet_state
-                    })
-
-                    print(f"\n🚨 ALERT SENT TO FRONTEND")
-                else:
-                    pet_state = pet_manager.process_good_behavior(
-                        settings.SCREENSHOT_INTERVAL)
+        console.info(f"\n🚨 ALERT SENT TO FRONTEND")
+    else:
+        pet_state = await with_pet(settings.MONITOR_TENANT,
+                                   lambda pet: pet.process_good_behavior(round(elapsed)))
+
+        await manager.broadcast({
+            "type": "health_update",
+            "pet_state": pet_state
+        }, coalesce_key="pet_state", tenant=settings.MONITOR_TENANT)
 
-                    await manager.broadcast({
-                        "type": "health_update",
-                        "pet_state": pet_state
-                    })
+    console.info(f"\n⏳ Next check in ~{scheduler.interval:.0f} seconds...")
 
-                print(
-                    f"\n⏳ Next check in {settings.SCREENSHOT_INTERVAL} seconds...")
-                await asyncio.sleep(settings.SCREENSHOT_INTERVAL)
 
-            except Exception as e:
-                print(f"❌ Check error: {e}")
-                await asyncio.sleep(5)
+pipeline = MonitorPipeline(gemini_computer_use, scheduler, handle_check_result,
+                           max_pending=settings.MONITOR_MAX_PENDING)
 
+
+async def monitor_loop():
+    """Gemini 2.5 Computer Use monitoring loop"""
+    # Analyzer, numpy and Pillow load off the event loop if warm-up hasn't yet
+    await asyncio.to_thread(gemini_computer_use.warm_up)
+    console.info("\n" + "="*60 + "\n"
+                 "🚀 GEMINI 2.5 COMPUTER USE - MONITORING STARTED\n"
+                 f"   Interval: {settings.SCREENSHOT_INTERVAL} seconds "
+                 f"(adaptive {settings.MONITOR_MIN_INTERVAL}-{settings.MONITOR_MAX_INTERVAL}s)\n"
+                 f"   Analyzer: {gemini_computer_use.analyzer.name} "
+                 f"x{settings.ANALYZER_WORKERS} workers\n" + "="*60)
+
+    scheduler.restart()
+    try:
+        await pipeline.run()
     except asyncio.CancelledError:
-        print("\n⏹️  Monitoring stopped by user")
+        console.info("\n⏹️  Monitoring stopped by user")
         raise
 
 
+async def monitoring_wanted() -> bool:
+    if shared is not None:
+        return await shared.run(shared.get_flag, "monitoring") == "1"
+    return monitoring_active
+
+
+async def set_monitoring_wanted(wanted: bool):
+    global monitoring_active
+    if shared is not None:
+        await shared.run(shared.set_flag, "monitoring", "1" if wanted else "0")
+    else:
+        monitoring_active = wanted
+
+
+async def sync_monitoring():
+    """Starts or stops the monitoring task in this process: it runs while
+    monitoring is wanted and this worker holds the monitoring lease (a
+    single process always does)"""
+    global monitoring_task
+    wanted = await monitoring_wanted()
+    owner = True
+    if monitor_lease is not None:
+        owner = wanted and await shared.run(monitor_lease.hold)
+        if not wanted:
+            await shared.run(monitor_lease.release)
+
+    running = monitoring_task is not None and not monitoring_task.done()
+    if wanted and owner and not running:
+        monitoring_task = asyncio.create_task(monitor_loop())
+    elif running and not (wanted and owner):
+        monitoring_task.cancel()
+        try:
+            await monitoring_task
+        except asyncio.CancelledError:
+            pass
+
+
+async def coordinate_monitoring():
+    """Multi-worker only: follows the shared on/off flag and renews the lease"""
+    while True:
+        try:
+            await sync_monitoring()
+        except Exception as e:
+            console.error(f"❌ Monitoring lease check failed: {e}")
+        await asyncio.sleep(settings.MONITOR_LEASE_TTL / 3)
+
+
+async def warm_up():
+    """Loads the optional backends in a thread while the server already answers"""
+    started = time.perf_counter()
+    try:
+        offload.warm_up()  # pool processes load their own detectors meanwhile
+        await asyncio.to_thread(security_detector.warm_up)
+        await asyncio.to_thread(gemini_computer_use.warm_up)
+    except Exception as e:
+        console.error(f"❌ Warm-up failed (will retry on first use): {e}")
+        return
+    console.info(f"🔥 Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+
+warm_up_task: Optional[asyncio.Task] = None
+shared_tasks: List[asyncio.Task] = []
+
+
 @app.on_event("startup")
 async def startup_event():
     """Server startup - monitoring is OFF by default"""
-    print("\n✅ Gemini 2.5 Computer Use initialized")
-    print("💡 Monitoring is OFF - Use POST /api/monitoring/start to begin")
-    print(
-        f"💡 Will check every {settings.SCREENSHOT_INTERVAL} seconds when enabled")
+    global warm_up_task
+    offload.start()
+    if settings.WARM_UP_ON_STARTUP:
+        warm_up_task = asyncio.create_task(warm_up())
+    if shared is not None:
+        shared_tasks.append(asyncio.create_task(bus.run(manager.deliver)))
+        shared_tasks.append(asyncio.create_task(coordinate_monitoring()))
+        console.info(f"🤝 Worker {shared.worker} sharing state through {shared.path}")
+    console.info("\n✅ Gemini 2.5 Computer Use initialized\n"
+                 "💡 Monitoring is OFF - Use POST /api/monitoring/start to begin\n"
+                 f"💡 Will check every {settings.SCREENSHOT_INTERVAL} seconds when enabled")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the analyzer pool, flush every pet journal and leave fresh snapshots"""
+    if warm_up_task is not None:
+        await warm_up_task  # a thread can't be interrupted; let it finish first
+    for task in shared_tasks:
+        task.cancel()
+    await asyncio.gather(*shared_tasks, return_exceptions=True)
+    if monitoring_task is not None:
+        monitoring_task.cancel()
+        await asyncio.gather(monitoring_task, return_exceptions=True)
+    if monitor_lease is not None:
+        await shared.run(monitor_lease.release)  # another worker can take over right away
+    await ingestor.stop()
+    await gemini_computer_use.close()
+    await asyncio.to_thread(offload.close)
+    pets.close()
+    event_store.close()
+    if shared is not None:
+        shared.close()
@@ -0,0 +1,170 @@
+# backend/metrics.py
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; spans a cached URL verdict (~µs) to a slow analyzer call (~s)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, object] = {}
+        REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._child()
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(_labels(self.labelnames, values), child))
+        return lines
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _child = _CounterValue
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def inc(self, amount: float = 1.0):
+        self._default.value += amount
+
+    def _render_child(self, labels, child):
+        return [f"{self.name}{labels} {child.value}"]
+
+
+class Gauge(_Metric):
+    """Read at scrape time from a callback, e.g. a queue's current depth"""
+    kind = "gauge"
+
+    def __init__(self, name, help, fn: Callable[[], float]):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.fn())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {value}"]
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, labels, child):
+        inner = labels[1:-1] + "," if labels else ""
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{self.name}_bucket{{{inner}le="{le}"}} {cumulative}')
+        lines.append(f"{self.name}_sum{labels} {child.sum}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Hot-path metrics, shared by the modules that record them
+ANALYZE_URL_SECONDS = Histogram(
+    "cyberpet_analyze_url_seconds", "SecurityDetector.analyze_url latency")
+URL_VERDICTS = Counter(
+    "cyberpet_url_verdicts_total", "URL verdicts by threat type", ["threat_type"])
+ANALYZER_CALL_SECONDS = Histogram(
+    "cyberpet_analyzer_call_seconds", "Screenshot analyzer call latency", ["outcome"])
+SAVE_STATE_SECONDS = Histogram(
+    "cyberpet_pet_save_state_seconds", "PetManager._save_state latency (queueing the journal entry)")
+JOURNAL_FLUSH_SECONDS = Histogram(
+    "cyberpet_pet_journal_flush_seconds", "Pet journal group-commit write + fsync latency")
+BROADCAST_SECONDS = Histogram(
+    "cyberpet_ws_broadcast_seconds", "ConnectionManager.broadcast fan-out latency")
+BROADCAST_RECIPIENTS = Counter(
+    "cyberpet_ws_messages_queued_total", "Messages queued for WebSocket clients")
+EVENTS_INGESTED = Counter(
+    "cyberpet_events_ingested_total", "Extension events accepted or rejected", ["result"])
+INGEST_BATCH_SECONDS = Histogram(
+    "cyberpet_ingest_batch_seconds", "Applying one ingestion batch to the pets")
+OFFLOAD_SECONDS = Histogram(
+    "cyberpet_offload_seconds", "Work sent off the event loop, queueing included", ["pool"])
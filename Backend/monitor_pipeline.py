@@ -0,0 +1,113 @@
+# backend/monitor_pipeline.py
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import console
+from monitor_scheduler import MonitorScheduler
+
+ResultHandler = Callable[[dict, float], Awaitable[None]]
+
+
+class MonitorPipeline:
+    """Screen monitoring as capture -> analyze -> update stages
+
+    The capture stage runs on the scheduler's deadlines: each frame is
+    captured and diffed in a thread, handed to the analyzer pool, and its
+    verdict future goes into a bounded queue. Frames sent to the analyzer
+    are charged to the scheduler's budget right away. The update stage takes
+    verdicts from that queue in capture order and passes them to
+    handle_result (pet update and broadcast). A slow analyzer call therefore only delays its
+    own verdict; capture keeps its cadence until max_pending verdicts are
+    outstanding, at which point it waits for the update stage to catch up.
+    """
+
+    def __init__(self, source, scheduler: MonitorScheduler, handle_result: ResultHandler,
+                 max_pending: int = 4):
+        self.source = source  # GeminiComputerUse, or anything with submit_frame()
+        self.scheduler = scheduler
+        self.handle_result = handle_result
+        self.max_pending = max_pending
+        self.captured = 0
+        self.handled = 0
+        self.errors = 0
+        self._pending: Optional[asyncio.Queue] = None
+        self._capture_times = deque(maxlen=256)
+        self._latencies = deque(maxlen=256)  # capture -> handled, seconds
+        self._started_at: Optional[float] = None
+
+    async def run(self):
+        self._pending = asyncio.Queue(maxsize=self.max_pending)
+        self._started_at = time.monotonic()
+        updater = asyncio.create_task(self._update_stage())
+        try:
+            while True:
+                elapsed = await self.scheduler.wait()
+                window = self.scheduler.window()
+                started = time.monotonic()
+                try:
+                    verdict = await self.source.submit_frame()
+                except Exception as e:
+                    self.errors += 1
+                    console.error(f"❌ Capture error: {e}")
+                    continue
+                if self.source.last_analyzed:
+                    self.scheduler.charge()
+                self.captured += 1
+                self._capture_times.append(time.monotonic() - started)
+                await self._pending.put((started, elapsed, verdict, window,
+                                         self.source.last_change))
+        finally:
+            updater.cancel()
+            while not self._pending.empty():
+                self._pending.get_nowait()[2].cancel()
+
+    async def _update_stage(self):
+        while True:
+            started, elapsed, verdict, window, change = await self._pending.get()
+            # wait() rather than await, so a cancelled verdict isn't mistaken
+            # for this task being cancelled
+            await asyncio.wait([verdict])
+            if verdict.cancelled():
+                console.info("⏭️  Analysis superseded by a newer screenshot")
+                continue
+            if verdict.exception() is not None:
+                self.errors += 1
+                console.error(f"❌ Check error: {verdict.exception()}")
+                continue
+
+            result = verdict.result()
+            changed = change is not None and change.changed
+            self.scheduler.record(
+                threat=result["threat_detected"],
+                changed=changed,
+                # Most of the screen changed: a new page or window
+                large_change=changed and change.bbox is None,
+                window=window
+            )
+            try:
+                await self.handle_result(result, elapsed)
+            except Exception as e:
+                self.errors += 1
+                console.error(f"❌ Check error: {e}")
+                continue
+            self.handled += 1
+            self._latencies.append(time.monotonic() - started)
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3)
+        capture = self._capture_times
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "captured": self.captured,
+            "handled": self.handled,
+            "errors": self.errors,
+            "pending": self._pending.qsize() if self._pending else 0,
+            "capture_avg": round(sum(capture) / len(capture), 3) if capture else None,
+            "latency_p50": pick(0.5) if latencies else None,
+            "latency_p95": pick(0.95) if latencies else None,
+            "throughput_per_min": round(self.handled * 60 / uptime, 2) if uptime else 0.0
+        }
@@ -0,0 +1,146 @@
+# backend/monitor_scheduler.py
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+
+class MonitorScheduler:
+    """Fixed-rate deadlines for the screenshot monitor, with an adaptive interval
+
+    Checks are due on a grid of deadlines (each one interval after the last
+    deadline, not after the last check finished), so analysis time and
+    timer lateness don't add up into drift. A check that overruns its
+    deadline moves the grid to now instead of firing a burst of catch-up
+    checks. Jitter is applied to each sleep only, never to the grid.
+
+    The interval drops to min_interval after a threat or a large screen
+    change, returns to the base interval on the next ordinary check, and
+    grows by backoff_factor (up to max_interval) for every safe_streak safe
+    checks in a row. A token bucket caps analyzer calls at calls_per_minute
+    whatever the interval says; charge() spends a token when a call is made,
+    not when its verdict comes back, so calls still in flight count too.
+    """
+
+    def __init__(self, interval: float = 30.0, min_interval: float = 5.0,
+                 max_interval: float = 60.0, backoff_factor: float = 2.0,
+                 safe_streak: int = 5, calls_per_minute: float = 6.0,
+                 jitter: float = 0.1, clock=time.monotonic):
+        self.base_interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.safe_streak = safe_streak
+        self.calls_per_minute = calls_per_minute
+        self.jitter = jitter
+        self.clock = clock
+
+        self.interval = interval
+        self.streak = 0
+        self.checks = 0
+        self.overruns = 0  # deadlines missed by more than an interval
+        self.budget_waits = 0  # checks delayed because the budget was spent
+        self._deadline: Optional[float] = None  # when the last check was due
+        self._tokens = calls_per_minute
+        self._refilled = clock()
+        self._calls = deque()  # analyzer call times over the last hour
+        self._latencies = deque(maxlen=256)  # seconds from screen change to verdict
+        self._last_check: Optional[float] = None
+        self._previous_check: Optional[float] = None
+
+    async def wait(self) -> float:
+        """Sleeps until the next check is due; returns seconds since the last check"""
+        now = self.clock()
+        if self._deadline is None:
+            due = now
+        else:
+            due = self._deadline + self.interval
+            if now - due > self.interval:
+                self.overruns += 1
+                due = now
+        due = max(due, now + self._budget_delay(now))
+
+        delay = due - now
+        if delay > 0 and self.jitter:
+            delay += random.uniform(-self.jitter, self.jitter) * min(delay, self.interval)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        # The grid advances from the deadline, not from when the timer fired
+        self._deadline = due
+        now = self.clock()
+        self._previous_check, self._last_check = self._last_check, now
+        self.checks += 1
+        return now - self._previous_check if self._previous_check is not None else 0.0
+
+    def restart(self):
+        """Starts a new run: the next check is due immediately"""
+        self._deadline = self._last_check = self._previous_check = None
+        self.interval = self.base_interval
+        self.streak = 0
+
+    def window(self) -> Tuple[Optional[float], Optional[float]]:
+        """(previous check, latest check) times, to stamp a capture with"""
+        return self._previous_check, self._last_check
+
+    def charge(self):
+        """Spends one analyzer call from the budget"""
+        now = self.clock()
+        self._refill(now)
+        self._tokens = max(0.0, self._tokens - 1)
+        self._calls.append(now)
+
+    def record(self, threat: bool = False, changed: bool = False, large_change: bool = False,
+               window: Optional[Tuple[Optional[float], Optional[float]]] = None):
+        """Feeds one check's outcome back into the interval and the metrics
+
+        window is what window() returned when the check's frame was
+        captured; by default the latest check's.
+        """
+        now = self.clock()
+        previous, last = window if window is not None else self.window()
+        if changed and previous is not None:
+            # The screen changed somewhere between the previous check and
+            # this one; assume the middle of that window
+            self._latencies.append(now - (previous + last) / 2)
+
+        if threat or large_change:
+            self.streak = 0
+            self.interval = self.min_interval
+        else:
+            self.streak += 1
+            if self.streak % self.safe_streak == 0:
+                self.interval = min(self.max_interval,
+                                    max(self.interval, self.base_interval) * self.backoff_factor)
+            elif self.interval < self.base_interval:
+                self.interval = self.base_interval
+
+    def _budget_delay(self, now: float) -> float:
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        self.budget_waits += 1
+        return (1 - self._tokens) * 60.0 / self.calls_per_minute
+
+    def _refill(self, now: float):
+        self._tokens = min(self.calls_per_minute,
+                           self._tokens + (now - self._refilled) * self.calls_per_minute / 60.0)
+        self._refilled = now
+
+    def stats(self) -> dict:
+        now = self.clock()
+        while self._calls and now - self._calls[0] > 3600:
+            self._calls.popleft()
+        latencies = sorted(self._latencies)
+        return {
+            "interval": round(self.interval, 2),
+            "safe_streak": self.streak,
+            "checks": self.checks,
+            "analyzer_calls_last_hour": len(self._calls),
+            "detection_latency_avg": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "detection_latency_p95": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else None,
+            "overruns": self.overruns,
+            "budget_waits": self.budget_waits
+        }
@@ -0,0 +1,201 @@
+# backend/offload.py
+#
+# Keeps CPU-heavy detector work off the event loop. Big URL batches go to a
+# pool of worker processes, each holding its own SecurityDetector that is
+# loaded and warmed up once when the process starts; blocking file and
+# database reads go to a thread pool. Small inputs still run inline, where
+# a round trip to another process would cost more than the work itself.
+#
+#   mode="auto"    inline up to inline_max_urls URLs, else the process pool
+#   mode="inline"  on the event loop, as every call used to run
+#   mode="pool"    always the process pool
+#
+# Pool processes keep their own verdict caches and pick up rule, keyword
+# and threat-intel file changes on their own, like uvicorn workers do.
+
+import asyncio
+import multiprocessing
+import signal
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Optional
+
+import console
+from metrics import OFFLOAD_SECONDS, URL_VERDICTS
+
+MODES = ('auto', 'inline', 'pool')
+
+_detector = None  # this pool process's SecurityDetector
+
+
+def _init_process():
+    global _detector
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is the parent's to handle
+    from security_detector import SecurityDetector
+    _detector = SecurityDetector()
+    _detector.warm_up()
+
+
+def _ready() -> bool:
+    return _detector is not None
+
+
+def _call(method: str, *args):
+    return getattr(_detector, method)(*args)
+
+
+class Offloader:
+    """Process pool for detector calls, thread pool for blocking I/O
+
+    At most `max_pending` pool jobs are submitted at once; further ones wait
+    their turn on the event loop instead of piling up in the pool's queue.
+    processes=0 runs every detector call inline.
+    """
+
+    def __init__(self, detector, processes: int = 2, max_pending: int = 8,
+                 io_threads: int = 4, inline_max_urls: int = 20, job_urls: int = 1000):
+        self.detector = detector
+        self.processes = processes
+        self.max_pending = max_pending
+        self.io_threads = io_threads
+        self.inline_max_urls = inline_max_urls
+        self.job_urls = job_urls
+        self.inline_calls = 0
+        self.pool_calls = 0
+        self.pool_jobs = 0
+        self.io_calls = 0
+        self.waiting = 0
+        self.in_flight = 0
+        self.restarts = 0
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def start(self):
+        if self._threads is not None:
+            return
+        self._threads = ThreadPoolExecutor(self.io_threads, thread_name_prefix='offload-io')
+        self._slots = asyncio.Semaphore(self.max_pending)
+        if self.processes > 0:
+            self._processes = self._process_pool()
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        # Spawned, not forked: this process runs journal, log and bus threads,
+        # and a fork taken while one of them holds a lock can deadlock
+        return ProcessPoolExecutor(self.processes, initializer=_init_process,
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    def warm_up(self) -> List[Future]:
+        """Starts every pool process now instead of on the first big batch"""
+        self.start()
+        if self._processes is None:
+            return []
+        return [self._processes.submit(_ready) for _ in range(self.processes)]
+
+    def close(self):
+        if self._processes is not None:
+            self._processes.shutdown(wait=True, cancel_futures=True)
+            self._processes = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+            self._threads = None
+
+    def mode_for(self, size: int, mode: str = 'auto') -> str:
+        """'inline' or 'pool' for an input of `size` items; ValueError for an unknown mode"""
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of: {', '.join(MODES)}")
+        if mode == 'auto':
+            mode = 'inline' if size <= self.inline_max_urls else 'pool'
+        return 'pool' if mode == 'pool' and self.processes > 0 else 'inline'
+
+    async def analyze_url(self, url: str, mode: str = 'auto') -> dict:
+        if self.mode_for(1, mode) == 'inline':
+            self.inline_calls += 1
+            return self.detector.analyze_url(url)
+        [verdict] = await self._pool_urls([url])
+        return verdict
+
+    async def analyze_urls(self, urls: List[str], mode: str = 'auto') -> List[dict]:
+        """Same verdicts as SecurityDetector.analyze_urls, in input order"""
+        if self.mode_for(len(urls), mode) == 'inline':
+            self.inline_calls += 1
+            return self.detector.analyze_urls(urls)
+        distinct = list(dict.fromkeys(urls))
+        verdicts = dict(zip(distinct, await self._pool_urls(distinct)))
+        if len(distinct) == len(urls):
+            return [verdicts[url] for url in urls]
+        # Copies, so callers can't mutate a verdict shared between URLs
+        return [{**verdicts[url], "findings": [dict(f) for f in verdicts[url]["findings"]]}
+                for url in urls]
+
+    async def _pool_urls(self, urls: List[str]) -> List[dict]:
+        """Spreads distinct URLs over the processes and counts the verdicts here
+        (a pool process's metrics never reach /metrics)
+
+        Jobs hold at most job_urls URLs: a job's verdicts are unpickled in one
+        go while holding the GIL, which stalls the event loop for that long.
+        """
+        self.pool_calls += 1
+        size = max(1, min(self.job_urls, -(-len(urls) // self.processes)))
+
+        async def job(part: List[str]) -> List[dict]:
+            verdicts = await self.run('analyze_urls', part)
+            for verdict in verdicts:
+                URL_VERDICTS.labels(verdict["threat_type"]).inc()
+            return verdicts
+
+        parts = await asyncio.gather(*(job(urls[i:i + size]) for i in range(0, len(urls), size)))
+        return [verdict for part in parts for verdict in part]
+
+    async def run(self, method: str, *args):
+        """detector.<method>(*args) in a pool process (inline with processes=0)"""
+        self.start()
+        if self._processes is None:
+            return getattr(self.detector, method)(*args)
+        self.waiting += 1
+        async with self._slots:
+            self.waiting -= 1
+            self.in_flight += 1
+            self.pool_jobs += 1
+            pool = self._processes
+            started = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(pool, _call, method, *args)
+            except BrokenProcessPool:
+                # A process died (killed, out of memory); replace the pool once
+                # and answer this call here rather than failing the request
+                if self._processes is pool:
+                    console.warning("⚠️  Detector process pool broke, restarting it")
+                    self._processes = self._process_pool()
+                    self.restarts += 1
+                return getattr(self.detector, method)(*args)
+            finally:
+                self.in_flight -= 1
+                OFFLOAD_SECONDS.labels("process").observe(time.perf_counter() - started)
+
+    async def io(self, fn: Callable, *args):
+        """fn(*args) on the I/O thread pool"""
+        self.start()
+        self.io_calls += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._threads, fn, *args)
+        finally:
+            OFFLOAD_SECONDS.labels("thread").observe(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {
+            "processes": self.processes,
+            "max_pending": self.max_pending,
+            "inline_max_urls": self.inline_max_urls,
+            "job_urls": self.job_urls,
+            "inline_calls": self.inline_calls,
+            "pool_calls": self.pool_calls,
+            "pool_jobs": self.pool_jobs,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "restarts": self.restarts,
+            "io_threads": self.io_threads,
+            "io_calls": self.io_calls
+        }
@@ -0,0 +1,252 @@
+# backend/pet_journal.py
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import console
+from metrics import JOURNAL_FLUSH_SECONDS
+
+HISTORY_LIMIT = 50  # events kept in snapshots, same as the old pet_state.json
+
+
+def fold(state: dict, entry: dict) -> dict:
+    """Applies one journal entry to a snapshot-shaped state dict"""
+    history = [] if entry.get("clear_history") else state.get("event_history", [])
+    events = entry.get("events", [])
+    if events:
+        history = (history + events)[-HISTORY_LIMIT:]
+    return {**state, **entry["state"], "event_history": history, "seq": entry["seq"]}
+
+
+class PetJournal:
+    """Append-only JSONL journal plus compacted snapshots for PetManager state
+
+    Every state change is appended as one JSON line holding the resulting
+    pet fields and any new events. Callers only queue the line; a daemon
+    thread writes whatever has queued up with a single write + fsync
+    (group commit), so the event loop never waits on disk. Every
+    snapshot_every entries the flusher folds the journal into an atomic
+    snapshot (same format as the old pet_state.json, plus "seq") and starts
+    a fresh journal. Recovery loads the snapshot and replays newer lines,
+    ignoring a torn last line from a crash mid-write.
+    """
+
+    def __init__(self, snapshot_path: str = 'pet_state.json',
+                 journal_path: str = 'pet_state.journal',
+                 flush_interval: float = 0.2, snapshot_every: int = 1000,
+                 flusher: Optional["JournalFlusher"] = None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self.seq = 0
+        self._folded: dict = {}  # last flushed state, built from the journal alone
+        self._since_snapshot = 0
+        self._pending: List[dict] = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.flusher = flusher  # shared flusher thread instead of our own
+
+    def load(self) -> Optional[dict]:
+        """Latest durable state: the snapshot plus every journal entry after it"""
+        state = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r') as f:
+                state = json.load(f)
+            state.setdefault("seq", 0)
+
+        entries = 0
+        if os.path.exists(self.journal_path):
+            good_bytes = 0
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn write from a crash; drop it and anything after
+                    good_bytes += len(line)
+                    if entry["seq"] > (state or {}).get("seq", 0):
+                        state = fold(state or {}, entry)
+                        entries += 1
+            if good_bytes < os.path.getsize(self.journal_path):
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good_bytes)
+
+        if state is not None:
+            self.seq = state["seq"]
+            self._folded = state
+            self._since_snapshot = entries
+        return state
+
+    def fresh_state(self) -> Optional[dict]:
+        """Nothing else writes this journal, so the in-memory pet is never stale"""
+        return None
+
+    @contextmanager
+    def transaction(self):
+        yield None
+
+    def append(self, entry: dict):
+        """Queues one state change; returns without touching the disk"""
+        with self._lock:
+            self.seq += 1
+            self._pending.append({"seq": self.seq, **entry})
+        if self.flusher is not None:
+            self.flusher.mark(self)
+            return
+        if self._thread is None:
+            self._start()
+        self._wakeup.set()
+
+    def flush(self):
+        """Writes queued entries (one write + fsync) and snapshots if due"""
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+
+            data = ''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in pending)
+            with JOURNAL_FLUSH_SECONDS.time(), open(self.journal_path, 'a') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            for entry in pending:
+                self._folded = fold(self._folded, entry)
+            self._since_snapshot += len(pending)
+            if self._since_snapshot >= self.snapshot_every:
+                self._snapshot()
+
+    def _snapshot(self):
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._folded, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        # Everything in the journal is now covered by the snapshot's seq
+        open(self.journal_path, 'w').close()
+        self._since_snapshot = 0
+
+    def close(self):
+        """Stops the flusher and leaves a fresh snapshot behind"""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        with self._io_lock:
+            if self._since_snapshot:
+                self._snapshot()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="pet-journal", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                break
+            # Let a burst pile up so it goes out as one write
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                console.error(f"⚠️  Failed to write pet journal: {e}")
+
+
+class JournalFlusher:
+    """One group-commit thread shared by many journals (e.g. one per tenant)
+
+    Journals created with this flusher don't start threads of their own;
+    append() marks them dirty and the flusher writes every dirty journal
+    once per flush_interval. retire() closes a journal on the same thread,
+    after its last flush.
+    """
+
+    def __init__(self, flush_interval: float = 0.2):
+        self.flush_interval = flush_interval
+        self._dirty = set()
+        self._retiring: List[tuple] = []  # (journal, done) to close
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def mark(self, journal: PetJournal):
+        with self._lock:
+            self._dirty.add(journal)
+            self._start()
+        self._wakeup.set()
+
+    def retire(self, journal: PetJournal, done: Optional[Callable[[], None]] = None):
+        """Closes the journal (flush, fsync, snapshot) on the flusher thread
+        instead of the caller's, then calls done() there"""
+        with self._lock:
+            if not self._closed:
+                self._retiring.append((journal, done))
+                self._start()
+                journal = None
+        if journal is None:
+            self._wakeup.set()
+            return
+        journal.close()  # flusher already stopped
+        if done is not None:
+            done()
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="pet-journal-flusher", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            retiring, self._retiring = self._retiring, []
+        for journal in dirty:
+            try:
+                journal.flush()
+            except Exception as e:
+                console.error(f"⚠️  Failed to write pet journal {journal.journal_path}: {e}")
+        for journal, done in retiring:
+            try:
+                journal.close()
+            except Exception as e:
+                console.error(f"⚠️  Failed to close pet journal {journal.journal_path}: {e}")
+            if done is not None:
+                done()
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                break
+            # Let a burst pile up so each journal gets one write
+            time.sleep(self.flush_interval)
+            self.flush()
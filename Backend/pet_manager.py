@@ -1,52 +1,87 @@
 # backend/pet_manager.py
 
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
-import os
-import json
+from typing import Optional
+import console
+from config import settings
+from event_store import EventStore
+from metrics import SAVE_STATE_SECONDS
+from pet_journal import HISTORY_LIMIT, PetJournal
+
+EVOLUTION_THRESHOLDS = {1: 500, 2: 1500, 3: 3000}  # points to leave each stage
 
 
 class PetManager:
-    def __init__(self):
+    def __init__(self, journal: Optional[PetJournal] = None,
+                 event_store: Optional[EventStore] = None, tenant: str = "default"):
         self.health = 100
         self.evolution_stage = 1  # 1=baby, 2=teen, 3=adult, 4=master
         self.points = 0
         self.good_behavior_streak = 0
-        self.event_history = []
+        # Recent events only; the full history goes to event_store
+        self.event_history = deque(maxlen=HISTORY_LIMIT)
+        self.event_store = event_store
+        self.tenant = tenant
+        self.journal = journal or PetJournal(
+            snapshot_path=settings.PET_STATE_FILE,
+            journal_path=settings.PET_JOURNAL_FILE,
+            flush_interval=settings.PET_JOURNAL_FLUSH_INTERVAL,
+            snapshot_every=settings.PET_SNAPSHOT_EVERY
+        )
         self._load_state()
 
     def process_threat_event(self, severity: int, threat_type: str) -> dict:
         """Called when bad behavior detected"""
-        print(f"\n💥 THREAT EVENT: {threat_type} (severity: {severity})")
+        return self.process_threat_events([(severity, threat_type)])
 
-        damage = severity / 5  # Scale 0-100 to 0-20
+    def process_threat_events(self, threats) -> dict:
+        """Applies (severity, threat_type) pairs in order, journaled as one change"""
+        with self._transaction():
+            events = [self._apply_threat(severity, threat_type) for severity, threat_type in threats]
+            self._save_state(events=events)
+        return self.get_state()
+
+    def _apply_threat(self, severity: int, threat_type: str) -> dict:
         old_health = self.health
-        self.health = max(0, self.health - damage)
+        old_stage = self.evolution_stage
+        event = self._threat(severity, threat_type, datetime.now().isoformat())
 
-        print(
-            f"   Health: {old_health:.1f} → {self.health:.1f} (-{damage:.1f})")
+        console.info(f"\n💥 THREAT EVENT: {threat_type} (severity: {severity})\n"
+                     f"   Health: {old_health:.1f} → {self.health:.1f} (-{event['damage']:.1f})")
+        if self.evolution_stage != old_stage:
+            console.info(f"   😢 DEVOLVED: Stage {old_stage} → {self.evolution_stage}")
+        return event
 
+    def _threat(self, severity: int, threat_type: str, timestamp: str) -> dict:
+        damage = severity / 5  # Scale 0-100 to 0-20
+        self.health = max(0, self.health - damage)
         self.good_behavior_streak = 0
 
         # Check devolution
         if self.health < 70 and self.evolution_stage > 1:
-            old_stage = self.evolution_stage
             self.evolution_stage -= 1
-            print(f"   😢 DEVOLVED: Stage {old_stage} → {self.evolution_stage}")
 
         # Log event
-        self.event_history.append({
+        event = {
             "type": "threat",
             "threat_type": threat_type,
             "severity": severity,
             "damage": damage,
-            "timestamp": datetime.now().isoformat()
-        })
-
-        self._save_state()
-        return self.get_state()
+            "timestamp": timestamp
+        }
+        self.event_history.append(event)
+        return event
 
     def process_good_behavior(self, time_safe: int) -> dict:
         """Called periodically when no threats detected"""
+        with self._transaction():
+            self._apply_good_behavior()
+            self._save_state()
+        return self.get_state()
+
+    def _apply_good_behavior(self):
         self.good_behavior_streak += 1
         self.points += 10
 
@@ -54,25 +89,99 @@ class PetManager:
         self.health = min(100, self.health + 1)
 
         if self.good_behavior_streak % 10 == 0:
-            print(
-                f"\n✨ Good behavior: {self.good_behavior_streak} checks, {self.points} points")
+            message = f"\n✨ Good behavior: {self.good_behavior_streak} checks, {self.points} points"
             if old_health != self.health:
-                print(f"   Health: {old_health:.1f} → {self.health:.1f} (+1)")
+                message += f"\n   Health: {old_health:.1f} → {self.health:.1f} (+1)"
+            console.info(message)
 
         # Check evolution
         if self.evolution_stage < 4:
-            thresholds = {1: 500, 2: 1500, 3: 3000}
-            next_threshold = thresholds.get(self.evolution_stage, 9999)
+            next_threshold = EVOLUTION_THRESHOLDS.get(self.evolution_stage, 9999)
 
             if self.points >= next_threshold:
                 old_stage = self.evolution_stage
                 self.evolution_stage += 1
-                print(
+                console.info(
                     f"\n🎉 EVOLVED: Stage {old_stage} → {self.evolution_stage}!")
 
-        if self.good_behavior_streak % 5 == 0:
+    def advance(self, ticks: int) -> dict:
+        """`ticks` good-behavior checks at once (e.g. catching up after
+        downtime): the state process_good_behavior would reach after that
+        many calls, saved once"""
+        with self._transaction():
+            old = (self.health, self.evolution_stage)
+            self._advance(ticks)
+            self._log_bulk(old, ticks=ticks)
             self._save_state()
+        return self.get_state()
+
+    def apply_events(self, batch) -> dict:
+        """A backlog in order, saved once: each item is a (severity,
+        threat_type) threat or an int number of good-behavior ticks. Same
+        final state and history as applying them one call at a time"""
+        with self._transaction():
+            old = (self.health, self.evolution_stage)
+            timestamp = datetime.now().isoformat()
+            events = []
+            ticks = 0
+            for item in batch:
+                if isinstance(item, int):
+                    self._advance(item)
+                    ticks += max(0, item)
+                else:
+                    events.append(self._threat(*item, timestamp))
+            self._log_bulk(old, ticks=ticks, threats=len(events))
+            self._save_state(events=events)
+        return self.get_state()
+
+    def _advance(self, ticks: int):
+        """_apply_good_behavior `ticks` times, in closed form"""
+        if ticks <= 0:
+            return
+        start_points = self.points
+        self.good_behavior_streak += ticks
+        self.points += 10 * ticks
+        # +1 per tick up to 100 is reached within 100 ticks; adding one at a
+        # time keeps the float bit-for-bit equal to the per-tick result
+        for _ in range(min(ticks, 100)):
+            self.health = min(100, self.health + 1)
+        # One stage per tick at most, on the first tick whose points reach
+        # the current stage's threshold
+        tick = 0
+        while self.evolution_stage < 4:
+            needed = EVOLUTION_THRESHOLDS[self.evolution_stage] - start_points
+            tick = max(tick + 1, -(-needed // 10))
+            if tick > ticks:
+                break
+            self.evolution_stage += 1
+
+    def _log_bulk(self, old: tuple, ticks: int = 0, threats: int = 0):
+        """One message for a bulk update instead of one per tick or event"""
+        old_health, old_stage = old
+        message = (f"\n📦 {threats} threat(s), {ticks} good tick(s) applied\n"
+                   f"   Health: {old_health:.1f} → {self.health:.1f}, {self.points} points")
+        if self.evolution_stage > old_stage:
+            message += f"\n   🎉 EVOLVED: Stage {old_stage} → {self.evolution_stage}"
+        elif self.evolution_stage < old_stage:
+            message += f"\n   😢 DEVOLVED: Stage {old_stage} → {self.evolution_stage}"
+        console.info(message)
+
+    def reset(self) -> dict:
+        """Back to a fresh baby pet with no history"""
+        with self._transaction():
+            self.health = 100
+            self.evolution_stage = 1
+            self.points = 0
+            self.good_behavior_streak = 0
+            self.event_history.clear()
+            self._save_state(clear_history=True)
+        return self.get_state()
 
+    def set_health(self, health: float) -> dict:
+        """Sets health directly, clamped to 0-100"""
+        with self._transaction():
+            self.health = max(0, min(100, health))
+            self._save_state()
         return self.get_state()
 
     def get_state(self) -> dict:
@@ -96,29 +205,57 @@ class PetManager:
         else:
             return "critical"
 
-    def _save_state(self):
-        """Save pet state to file"""
-        state = {
-            "health": self.health,
-            "evolution_stage": self.evolution_stage,
-            "points": self.points,
-            "streak": self.good_behavior_streak,
-            "event_history": self.event_history[-50:]
-        }
-        with open('pet_state.json', 'w') as f:
-            json.dump(state, f, indent=2)
+    def _save_state(self, events=(), clear_history=False):
+        """Journal the current pet state; a background thread writes it to disk"""
+        with SAVE_STATE_SECONDS.time():
+            if events and self.event_store is not None:
+                self.event_store.add(self.tenant, events)
+            self.journal.append({
+                "state": {
+                    "health": self.health,
+                    "evolution_stage": self.evolution_stage,
+                    "points": self.points,
+                    "streak": self.good_behavior_streak
+                },
+                "events": list(events),
+                "clear_history": clear_history
+            })
 
     def _load_state(self):
-        """Load pet state from file"""
-        if os.path.exists('pet_state.json'):
-            try:
-                with open('pet_state.json', 'r') as f:
-                    state = json.load(f)
-                    self.health = state.get('health', 100)
-                    self.evolution_stage = state.get('evolution_stage', 1)
-                    self.points = state.get('points', 0)
-                    self.good_behavior_streak = state.get('streak', 0)
-                    self.event_history = state.get('event_history', [])
-                    print("📂 Loaded previous pet state")
-            except Exception as e:
-                print(f"⚠️  Failed to load pet state: {e}")
+        """Load pet state from the last snapshot plus the journal after it"""
+        try:
+            state = self.journal.load()
+        except Exception as e:
+            console.warning(f"⚠️  Failed to load pet state: {e}")
+            return
+
+        if state:
+            self._apply_loaded(state)
+            console.info("📂 Loaded previous pet state")
+
+    def _apply_loaded(self, state: dict):
+        self.health = state.get('health', 100)
+        self.evolution_stage = state.get('evolution_stage', 1)
+        self.points = state.get('points', 0)
+        self.good_behavior_streak = state.get('streak', 0)
+        self.event_history.clear()
+        self.event_history.extend(state.get('event_history', []))
+
+    def refresh(self):
+        """Picks up changes other worker processes made (shared state only)"""
+        state = self.journal.fresh_state()
+        if state:
+            self._apply_loaded(state)
+
+    @contextmanager
+    def _transaction(self):
+        """One read-modify-write of the pet; with shared state, other workers
+        wait and the pet is reloaded first if one of them changed it"""
+        with self.journal.transaction() as state:
+            if state:
+                self._apply_loaded(state)
+            yield
+
+    def close(self):
+        """Flush pending state and write a final snapshot"""
+        self.journal.close()
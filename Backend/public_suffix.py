@@ -0,0 +1,155 @@
+# backend/public_suffix.py
+#
+# URL -> (host, subdomain, registrable domain, public suffix) using the
+# Public Suffix List (public_suffix_list.dat, bundled next to this file,
+# MPL 2.0). The list is compiled once into a trie of labels keyed from the
+# TLD down, so a host is split in one pass over its labels; parsed hosts
+# are cached.
+#
+#   https://user@login.Example.co.uk:8443/x  ->  host login.example.co.uk,
+#   subdomain login, domain example.co.uk, suffix co.uk
+
+import ipaddress
+import os
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+BUNDLED_LIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public_suffix_list.dat')
+RULE = '.'  # trie key marking the end of a rule; labels never contain a dot
+# scheme://authority, where the authority ends at / ? # or \ (browsers read a
+# backslash as a slash, so "https://evil.com\@bank.com" is evil.com)
+AUTHORITY = re.compile(r'(?:([A-Za-z][A-Za-z0-9+.-]*):)?//([^/?#\\]*)')
+OPAQUE = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:(?!\d)')  # mailto:, data:, about: ...
+STRIP = str.maketrans('', '', '\t\r\n')
+
+
+class ParsedURL(NamedTuple):
+    scheme: str
+    host: str  # lowercase, IDN labels in punycode, no port/userinfo/trailing dot
+    port: Optional[int]
+    subdomain: str  # labels left of the registrable domain ('' if none)
+    domain: str  # registrable domain; the host itself for IPs and bare suffixes
+    suffix: str  # public suffix ('' for IPs and single-label hosts)
+
+    @property
+    def domain_unicode(self) -> str:
+        """The registrable domain with punycode labels decoded (for look-alike checks)"""
+        if 'xn--' not in self.domain:
+            return self.domain
+        try:
+            return self.domain.encode('ascii').decode('idna')
+        except UnicodeError:
+            return self.domain
+
+
+def split_url(url: str) -> Tuple[str, str]:
+    """(scheme, authority) of a URL; a bare "host[:port][/path]" has no scheme"""
+    url = url.strip().translate(STRIP)
+    match = AUTHORITY.match(url)
+    if match:
+        return (match.group(1) or '').lower(), match.group(2)
+    if OPAQUE.match(url):
+        return url.split(':', 1)[0].lower(), ''
+    return '', re.split(r'[/?#\\]', url, 1)[0]
+
+
+def split_netloc(netloc: str) -> Tuple[str, Optional[int]]:
+    """(host, port) of a URL authority, without userinfo or IPv6 brackets"""
+    hostport = netloc.rpartition('@')[2]
+    if hostport.startswith('['):
+        host, _, rest = hostport[1:].partition(']')
+        port = rest[1:] if rest.startswith(':') else ''
+    else:
+        host, _, port = hostport.partition(':')
+    if port.isdigit() and int(port) <= 65535:
+        return host, int(port)
+    return host, None
+
+
+def to_ascii(host: str) -> str:
+    """Lowercase ACE (punycode) form of a host name; unchanged if it isn't valid IDNA"""
+    host = host.strip().rstrip('.').lower()
+    if host.isascii():
+        return host
+    try:
+        return host.encode('idna').decode('ascii')
+    except UnicodeError:
+        return host
+
+
+def _is_ip(host: str) -> bool:
+    # Only hosts ending in a digit (IPv4) or containing ':' (IPv6) can be
+    # addresses; skipping the parse attempt for names keeps this cheap
+    if not (host[-1].isdigit() or ':' in host):
+        return False
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class PublicSuffixList:
+    """Compiled Public Suffix List: split hosts into subdomain / domain / suffix"""
+
+    def __init__(self, path: str = BUNDLED_LIST, cache_size: int = 10000):
+        self.path = path
+        self.rules = 0
+        self._root: Dict[str, dict] = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                rule = line.split(None, 1)[0] if line.strip() else ''
+                if rule and not rule.startswith('//'):
+                    self._add(rule)
+        self.split_host = lru_cache(maxsize=cache_size)(self._split_host)
+
+    def _add(self, rule: str):
+        exception = rule.startswith('!')
+        labels = to_ascii(rule.lstrip('!')).split('.')
+        node = self._root
+        for label in reversed(labels[1:] if exception else labels):
+            node = node.setdefault(label, {})
+        if exception:
+            node = node.setdefault('!' + labels[0], {})
+        node[RULE] = True
+        self.rules += 1
+
+    def suffix_length(self, labels) -> int:
+        """How many trailing labels form the public suffix (the implicit '*' rule gives 1)"""
+        length = 1
+        node = self._root
+        for depth, label in enumerate(reversed(labels), 1):
+            if '!' + label in node:
+                return depth - 1  # exception: the rule minus its leftmost label
+            node = node.get(label) or node.get('*')
+            if node is None:
+                break
+            if RULE in node:
+                length = depth
+        return length
+
+    def _split_host(self, host: str) -> Tuple[str, str, str]:
+        if not host or _is_ip(host):
+            return '', host, ''
+        labels = host.split('.')
+        if len(labels) == 1:
+            return '', host, ''  # localhost, intranet names
+        n = self.suffix_length(labels)
+        suffix = '.'.join(labels[-n:])
+        if n >= len(labels):
+            return '', host, suffix  # the host is itself a public suffix
+        return '.'.join(labels[:-n - 1]), '.'.join(labels[-n - 1:]), suffix
+
+    def parse_url(self, url: str) -> ParsedURL:
+        """Scheme, host and domain parts of a URL (a bare host name works too)"""
+        scheme, netloc = split_url(url)
+        hostname, port = split_netloc(netloc)
+        host = to_ascii(hostname)
+        subdomain, domain, suffix = self.split_host(host)
+        return ParsedURL(scheme, host, port, subdomain, domain, suffix)
+
+    def cache_info(self) -> dict:
+        info = self.split_host.cache_info()
+        return {"rules": self.rules, "hits": info.hits, "misses": info.misses,
+                "size": info.currsize, "max_size": info.maxsize}
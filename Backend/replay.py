@@ -0,0 +1,185 @@
+# backend/replay.py
+#
+# Offline replay of recorded security events through SecurityDetector and
+# PetManager, e.g. to see how a threshold change would have played out.
+# One JSON object per line (plain or .gz):
+#
+#   {"type": "phishing", "severity": 80, "timestamp": "2025-11-02T10:15:00"}
+#   {"url": "http://paypa1.com/login", "timestamp": 1730542500}
+#
+# Lines with a type and severity are applied as they are; lines with only a
+# url go through SecurityDetector.analyze_urls first and count as an event
+# if it calls them a threat. Anything else (e.g. other JSONL records) is
+# skipped and counted; lines that aren't JSON or whose severity isn't a
+# number count as bad_lines. The replay uses its own throwaway pet state,
+# never the server's pet_state.json.
+#
+# Usage (from Backend/):
+#   python -m replay FILE [--batch 1000] [--speed 60] [--min-severity 0]
+
+import argparse
+import contextlib
+import gzip
+import itertools
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+
+def read_lines(path: str) -> Iterator[str]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        yield from f
+
+
+def parse(lines: Iterable[str], counts: Counter) -> Iterator[dict]:
+    for line in lines:
+        counts["lines"] += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            counts["bad_lines"] += 1
+            continue
+        if isinstance(record, dict):
+            yield record
+        else:
+            counts["skipped"] += 1
+
+
+def batched(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def timestamp(record: dict) -> Optional[float]:
+    value = record.get("timestamp")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def classify(batches: Iterable[List[dict]], detector, counts: Counter,
+             min_severity: int = 0) -> Iterator[List[dict]]:
+    """Turns each batch of records into a batch of threat events"""
+    for batch in batches:
+        urls = [r["url"] for r in batch
+                if "severity" not in r and isinstance(r.get("url"), str)]
+        verdicts = iter(detector.analyze_urls(urls)) if urls else iter(())
+        counts["urls_analyzed"] += len(urls)
+
+        events = []
+        for record in batch:
+            if "type" in record and "severity" in record:
+                try:
+                    severity = int(record["severity"])
+                except (TypeError, ValueError):
+                    counts["bad_lines"] += 1  # e.g. "severity": null or "high"
+                    continue
+                event = {"type": str(record["type"]), "severity": severity,
+                         "timestamp": timestamp(record)}
+            elif "severity" not in record and isinstance(record.get("url"), str):
+                verdict = next(verdicts)
+                if not verdict["is_threat"]:
+                    counts["urls_safe"] += 1
+                    continue
+                event = {"type": verdict["threat_type"], "severity": verdict["severity"],
+                         "timestamp": timestamp(record)}
+            else:
+                counts["skipped"] += 1
+                continue
+            if event["severity"] < min_severity:
+                counts["below_threshold"] += 1
+                continue
+            events.append(event)
+        yield events
+
+
+def paced(batches: Iterable[List[dict]], speed: Optional[float]) -> Iterator[List[dict]]:
+    """Holds each batch back until its first event is due at `speed` x real time"""
+    origin = started = None
+    for events in batches:
+        if speed and events and events[0]["timestamp"] is not None:
+            if origin is None:
+                origin, started = events[0]["timestamp"], time.monotonic()
+            delay = (events[0]["timestamp"] - origin) / speed - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+        yield events
+
+
+def replay(path: str, batch_size: int = 1000, speed: Optional[float] = None,
+           min_severity: int = 0, state_dir: Optional[str] = None, quiet: bool = True) -> dict:
+    from pet_journal import PetJournal
+    from pet_manager import PetManager
+    from security_detector import SecurityDetector
+
+    state_dir = state_dir or tempfile.mkdtemp(prefix="cyberpet-replay-")
+    counts = Counter()
+    types = Counter()
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+        detector = SecurityDetector()
+        pet = PetManager(journal=PetJournal(
+            snapshot_path=os.path.join(state_dir, 'pet_state.json'),
+            journal_path=os.path.join(state_dir, 'pet_state.journal')))
+
+        started = time.perf_counter()
+        pipeline = paced(classify(batched(parse(read_lines(path), counts), batch_size),
+                                  detector, counts, min_severity), speed)
+        for events in pipeline:
+            if events:
+                pet.apply_events([(e["severity"], e["type"]) for e in events])
+                types.update(e["type"] for e in events)
+                counts["events"] += len(events)
+            counts["batches"] += 1
+        elapsed = time.perf_counter() - started
+        pet.close()
+
+    return {
+        "file": path,
+        "counts": dict(counts),
+        "threat_types": dict(types.most_common(20)),
+        "final_pet_state": pet.get_state(),
+        "elapsed_seconds": round(elapsed, 3),
+        "lines_per_second": round(counts["lines"] / elapsed) if elapsed else None,
+        "events_per_second": round(counts["events"] / elapsed) if elapsed else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "state_dir": state_dir
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a JSONL event log offline")
+    parser.add_argument('file')
+    parser.add_argument('--batch', type=int, default=1000, help="events applied per pet update")
+    parser.add_argument('--speed', type=float, default=None,
+                        help="replay at this multiple of recorded time (default: as fast as possible)")
+    parser.add_argument('--min-severity', type=int, default=0,
+                        help="ignore events below this severity")
+    parser.add_argument('--state-dir', default=None,
+                        help="where the replayed pet state goes (default: a temp dir)")
+    parser.add_argument('--verbose', action='store_true', help="show PetManager output")
+    args = parser.parse_args()
+
+    report = replay(args.file, args.batch, args.speed, args.min_severity,
+                    args.state_dir, quiet=not args.verbose)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+# backend/rule_engine.py
+#
+# Declarative URL threat rules. A rule file (JSON, url_rules.json by
+# default) lists rules, each naming a check, its parameters, the severity
+# it adds and the threat type / reason it reports:
+#
+#   {"severity_ceiling": 95,
+#    "rules": [{"name": "free_hosting", "check": "suffix",
+#               "suffixes": [".blogspot.com", ".weebly.com"], "severity": 30,
+#               "threat_type": "free_hosting",
+#               "reason": "Site hosted on free hosting {match}"}]}
+#
+# Rules are compiled into a plan sorted by the cost of their check (cheap
+# string and suffix tests first, threat-intel lookups next, edit distance
+# last). Evaluation walks the plan until the combined severity reaches the
+# ceiling and returns every finding so far. Severities combine like
+# independent probabilities: 1 - (1 - a/100)(1 - b/100)..., so one 90 stays
+# 90 and 90 + 40 gives 94.
+#
+# Checks that only look at the host are cached per host by the caller; the
+# rest run per URL. Reason templates can use {match}, {host}, {domain},
+# {suffix} and, for URL checks, {url}.
+
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import console
+from config import settings
+from public_suffix import ParsedURL
+
+BUNDLED_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'url_rules.json')
+
+
+class Check:
+    """One kind of test a rule can run; subclasses set cost and scope"""
+    cost = 1  # relative; orders the plan
+    scope = 'url'  # 'host' results depend only on the host and are cached
+
+    def __init__(self, rule: dict, context):
+        self.context = context
+
+    def match(self, url: str, parsed: ParsedURL) -> Optional[str]:
+        """What matched (used as {match} in the reason), or None"""
+        raise NotImplementedError
+
+    def match_many(self, items: Sequence[Tuple[str, ParsedURL]]) -> List[Optional[str]]:
+        return [self.match(url, parsed) for url, parsed in items]
+
+
+class SchemeCheck(Check):
+    cost = 1
+
+    def __init__(self, rule: dict, context):
+        super().__init__(rule, context)
+        self.schemes = set(rule.get('schemes', ['http']))
+        self.except_hosts = set(rule.get('except_hosts', []))
+
+    def match(self, url, parsed):
+        if parsed.scheme in self.schemes and parsed.host not in self.except_hosts:
+            return parsed.scheme
+        return None
+
+
+class SuffixCheck(Check):
+    """Public suffix (e.g. 'co.tk') or its TLD in a list; the detector's
+    suspicious TLDs when the rule has no list of its own"""
+    cost = 1
+    scope = 'host'
+
+    def __init__(self, rule: dict, context):
+        super().__init__(rule, context)
+        suffixes = rule.get('suffixes')
+        self.suffixes = ({s.strip('.').lower(): s for s in suffixes}
+                         if suffixes is not None else None)
+
+    def match(self, url, parsed):
+        suffixes = self.suffixes if self.suffixes is not None else self.context.suspicious_suffixes
+        return (suffixes.get(parsed.suffix)
+                or suffixes.get(parsed.suffix.rpartition('.')[2]))
+
+
+def _field(rule: dict, default: str) -> str:
+    field = rule.get('in', default)
+    if field not in ('url', 'host', 'domain'):
+        raise ValueError(f"'in' must be url, host or domain, not {field!r}")
+    return field
+
+
+class ContainsCheck(Check):
+    cost = 2
+
+    def __init__(self, rule: dict, context):
+        super().__init__(rule, context)
+        self.field = _field(rule, 'url')
+        self.scope = 'url' if self.field == 'url' else 'host'
+        self.values = [v.lower() for v in rule['values']]
+
+    def match(self, url, parsed):
+        text = url.lower() if self.field == 'url' else getattr(parsed, self.field)
+        return next((v for v in self.values if v in text), None)
+
+
+class RegexCheck(Check):
+    cost = 3
+
+    def __init__(self, rule: dict, context):
+        super().__init__(rule, context)
+        self.field = _field(rule, 'url')
+        self.scope = 'url' if self.field == 'url' else 'host'
+        self.pattern = re.compile(rule['pattern'], re.IGNORECASE)
+
+    def match(self, url, parsed):
+        m = self.pattern.search(url if self.field == 'url' else getattr(parsed, self.field))
+        return m.group(0) if m else None
+
+
+class KeywordsCheck(Check):
+    """The detector's phishing keywords, summed weight at least min_score"""
+    cost = 3
+
+    def __init__(self, rule: dict, context):
+        super().__init__(rule, context)
+        self.min_score = float(rule.get('min_score', settings.KEYWORD_SCORE_THRESHOLD))
+
+    def match(self, url, parsed):
+        matcher = self.context.keyword_matcher
+        found = matcher.find(url.lower())
+        if found and matcher.score(found) >= self.min_score:
+            return ', '.join(found)
+        return None
+
+
+class ThreatIntelCheck(Check):
+    """Host or a parent domain in a local threat-intel store (mmap lookups)"""
+    cost = 4
+    scope = 'host'
+
+    def match(self, url, parsed):
+        return self.context.threat_intel.lookup(parsed.host) if parsed.host else None
+
+
+class TyposquatCheck(Check):
+    """Registrable domain within edit distance of a protected brand"""
+    cost = 5
+    scope = 'host'
+
+    def match(self, url, parsed):
+        return self.context.typosquat_scan.match(parsed.domain_unicode)
+
+    def match_many(self, items):
+        return self.context.typosquat_scan.match_many([p.domain_unicode for _, p in items])
+
+
+CHECKS = {
+    'scheme': SchemeCheck,
+    'suffix': SuffixCheck,
+    'contains': ContainsCheck,
+    'regex': RegexCheck,
+    'keywords': KeywordsCheck,
+    'threat_intel': ThreatIntelCheck,
+    'typosquat': TyposquatCheck,
+}
+
+
+class Rule:
+    def __init__(self, spec: dict, context):
+        self.name = spec['name']
+        kind = spec['check']
+        if kind not in CHECKS:
+            raise ValueError(f"rule {self.name!r}: unknown check {kind!r}")
+        try:
+            self.check = CHECKS[kind](spec, context)
+            self.severity = int(spec['severity'])
+        except KeyError as e:
+            raise ValueError(f"rule {self.name!r}: missing {e}") from e
+        except (TypeError, ValueError, re.error) as e:
+            raise ValueError(f"rule {self.name!r}: {e}") from e
+        self.kind = kind
+        self.scope = self.check.scope
+        self.cost = spec.get('cost', self.check.cost)
+        self.keep = 1 - min(self.severity, 100) / 100  # factor left after this finding
+        self.threat_type = spec.get('threat_type', self.name)
+        self.reason = spec.get('reason', self.name)
+        self.evaluations = 0
+        self.matches = 0
+        self.seconds = 0.0
+
+    def finding(self, match: str, url: str, parsed: ParsedURL) -> dict:
+        return {
+            "rule": self.name,
+            "severity": self.severity,
+            "threat_type": self.threat_type,
+            "reason": self.reason.format(match=match, url=url, host=parsed.host,
+                                         domain=parsed.domain_unicode, suffix=parsed.suffix)
+        }
+
+
+def combine(remaining: float) -> int:
+    """Combined severity from the product of (1 - severity/100) over the findings"""
+    return round(100 * (1 - remaining))
+
+
+class RuleEngine:
+    """Compiled rule plan plus per-rule evaluation counters"""
+
+    def __init__(self, context, path: str = BUNDLED_RULES, reload_interval: float = 5.0):
+        self.context = context
+        self.path = path
+        self.reload_interval = reload_interval
+        self.version = 0
+        self._mtime = None
+        self._checked_at = time.monotonic()
+        self.load(path)
+
+    def load(self, path: str):
+        with open(path, 'r') as f:
+            spec = json.load(f)
+        self._mtime = os.path.getmtime(path)
+        self.set_rules(spec)
+
+    def set_rules(self, spec: dict):
+        """Compiles {"severity_ceiling": n, "rules": [...]} into a cost-ordered plan"""
+        rules = [Rule(rule, self.context) for rule in spec.get('rules', [])
+                 if rule.get('enabled', True)]
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError("rule names must be unique")
+        # Stable sort: equal-cost rules keep their file order
+        plan = sorted(rules, key=lambda rule: rule.cost)
+        # Swapped in as one tuple so a concurrent evaluation never sees a mix
+        self._compiled = (plan, int(spec.get('severity_ceiling', 100)))
+        self.version += 1
+
+    @property
+    def rules(self) -> List[Rule]:
+        return list(self._compiled[0])
+
+    def maybe_reload(self) -> bool:
+        """Reloads the rule file if it changed, checking at most once per interval"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+
+        try:
+            if os.path.getmtime(self.path) == self._mtime:
+                return False
+            self.load(self.path)
+        except Exception as e:
+            console.warning(f"⚠️  Failed to reload URL rules: {e}")
+            return False
+
+        console.info(f"🔄 Reloaded {len(self._compiled[0])} URL rules")
+        return True
+
+    def evaluate(self, url: str, parsed: ParsedURL, cached: dict) -> Tuple[int, List[dict]]:
+        """(combined severity, findings) for one URL; cached holds this host's
+        host-scope findings and is filled in as rules run"""
+        plan, ceiling = self._compiled
+        cutoff = 1 - ceiling / 100
+        remaining = 1.0
+        findings = []
+        for rule in plan:
+            if rule.scope == 'host' and rule.name in cached:
+                finding = cached[rule.name]
+            else:
+                started = time.perf_counter()
+                match = rule.check.match(url, parsed)
+                rule.seconds += time.perf_counter() - started
+                rule.evaluations += 1
+                finding = None
+                if match:
+                    rule.matches += 1
+                    finding = rule.finding(match, url, parsed)
+                if rule.scope == 'host':
+                    cached[rule.name] = finding
+            if finding:
+                findings.append(finding)
+                remaining *= rule.keep
+                if remaining <= cutoff:
+                    break
+        return combine(remaining), findings
+
+    def evaluate_many(self, items: Sequence[Tuple[str, ParsedURL]],
+                      host_results: Callable[[str], dict]) -> List[Tuple[int, List[dict]]]:
+        """(combined severity, findings) per (url, parsed) pair
+
+        Runs rule by rule so each check sees every still-open item at once
+        (one batched edit-distance call for all new hosts). host_results(host)
+        returns the mutable per-host dict caching host-scope findings.
+        """
+        plan, ceiling = self._compiled
+        findings: List[List[dict]] = [[] for _ in items]
+        remaining = [1.0] * len(items)
+        cached = [host_results(parsed.host) for _, parsed in items]
+        cutoff = 1 - ceiling / 100
+
+        for rule in plan:
+            open_items = [i for i in range(len(items)) if remaining[i] > cutoff]
+            if not open_items:
+                break
+
+            if rule.scope == 'host':
+                todo: Dict[str, int] = {}
+                for i in open_items:
+                    if rule.name not in cached[i]:
+                        todo.setdefault(items[i][1].host, i)
+                if todo:
+                    matches = self._run(rule, [items[i] for i in todo.values()])
+                    for i, match in zip(todo.values(), matches):
+                        url, parsed = items[i]
+                        cached[i][rule.name] = (rule.finding(match, url, parsed)
+                                                if match else None)
+                    # Same host, different dict: the cache evicted and
+                    # re-created the host's entry partway through a big batch
+                    for i in open_items:
+                        if rule.name not in cached[i]:
+                            cached[i][rule.name] = cached[todo[items[i][1].host]][rule.name]
+                hits = [(i, cached[i][rule.name]) for i in open_items]
+            else:
+                matches = self._run(rule, [items[i] for i in open_items])
+                hits = [(i, rule.finding(match, *items[i]) if match else None)
+                        for i, match in zip(open_items, matches)]
+
+            for i, finding in hits:
+                if finding:
+                    findings[i].append(finding)
+                    remaining[i] *= rule.keep
+
+        return [(combine(left), found) for left, found in zip(remaining, findings)]
+
+    def _run(self, rule: Rule, items) -> List[Optional[str]]:
+        started = time.perf_counter()
+        if len(items) == 1:
+            matches = [rule.check.match(*items[0])]
+        else:
+            matches = rule.check.match_many(items)
+        rule.seconds += time.perf_counter() - started
+        rule.evaluations += len(items)
+        rule.matches += sum(1 for m in matches if m)
+        return matches
+
+    def stats(self) -> dict:
+        plan, ceiling = self._compiled
+        return {
+            "severity_ceiling": ceiling,
+            "rules": [{
+                "name": rule.name,
+                "check": rule.kind,
+                "cost": rule.cost,
+                "scope": rule.scope,
+                "evaluations": rule.evaluations,
+                "matches": rule.matches,
+                "total_ms": round(rule.seconds * 1000, 3),
+                "avg_us": round(rule.seconds / rule.evaluations * 1e6, 2) if rule.evaluations else None
+            } for rule in plan]
+        }
@@ -0,0 +1,126 @@
+# backend/screen_cache.py
+
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+import console
+from frame_diff import dhash, hamming
+from ttl_cache import TTLCache
+
+Key = Tuple[int, int, int, int]  # width, height, coarse colour, 64-bit dHash
+
+
+def screen_key(image: Image.Image) -> Key:
+    """Cache key for an analyzed image, computed from a 64px-wide copy
+
+    dHash only sees brightness gradients, so two flat areas of different
+    colours hash the same; the mean colour, quantized to 3 bits per channel,
+    tells them apart.
+    """
+    width, height = image.size
+    small = np.asarray(image.convert('RGB').resize(
+        (64, max(8, 64 * height // max(width, 1))), Image.BILINEAR, reducing_gap=2.0))
+    r, g, b = (small.reshape(-1, 3).mean(axis=0) // 32).astype(int)
+    gray = np.asarray(Image.fromarray(small).convert('L'))
+    return width, height, int(r << 6 | g << 3 | b), dhash(gray)
+
+
+class ScreenVerdictCache:
+    """Analyzer verdicts keyed by what the screen looked like
+
+    Keys come from screen_key() on the image that was analyzed, so the same
+    login page or inbox view maps to the same verdict even across restarts.
+    A lookup matches any entry of the same size and colour whose hash is
+    within `threshold` bits. Near matches are found without a scan: the
+    hash is split into threshold + 1 bands, and any hash within threshold
+    bits must agree exactly on at least one band (pigeonhole), so only
+    entries sharing a band are compared. Eviction is LRU plus TTL
+    (wall-clock, so expiry still holds after a restart); with a path the
+    cache is loaded at startup and saved by save().
+    """
+
+    def __init__(self, max_size: int = 2000, ttl: float = 24 * 3600,
+                 threshold: int = 4, path: str = ""):
+        self.threshold = threshold
+        self.path = path
+        self.cache = TTLCache(max_size, ttl, clock=time.time)
+        self.near_hits = 0  # hits that matched a similar, not identical, hash
+        self._bands = threshold + 1
+        self._band_bits = -(-64 // self._bands)
+        self._index: Dict[tuple, Set[Key]] = defaultdict(set)  # (w, h, tone, band, bits) -> keys
+        self._indexed = 0
+        if path:
+            self.load()
+
+    def _band_keys(self, key: Key):
+        width, height, tone, value = key
+        mask = (1 << self._band_bits) - 1
+        for band in range(self._bands):
+            yield width, height, tone, band, (value >> (band * self._band_bits)) & mask
+
+    def get(self, key: Key) -> Optional[dict]:
+        if key not in self.cache:
+            best, best_distance = None, self.threshold + 1
+            for band_key in self._band_keys(key):
+                for candidate in self._index.get(band_key, ()):
+                    distance = hamming(candidate[3], key[3])
+                    if distance < best_distance and candidate in self.cache:
+                        best, best_distance = candidate, distance
+            if best is not None:
+                self.near_hits += 1
+                key = best
+        value = self.cache.get(key, None)
+        return dict(value) if value is not None else None
+
+    def put(self, key: Key, verdict: dict, expires_at: Optional[float] = None):
+        self.cache.put(key, dict(verdict), expires_at)
+        for band_key in self._band_keys(key):
+            self._index[band_key].add(key)
+        self._indexed += 1
+        if self._indexed > 2 * self.cache.max_size:
+            self._reindex()
+
+    def _reindex(self):
+        """Drops index entries for keys the LRU/TTL has since evicted"""
+        self._index.clear()
+        self._indexed = 0
+        for key, _, _ in self.cache.items():
+            for band_key in self._band_keys(key):
+                self._index[band_key].add(key)
+            self._indexed += 1
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            console.warning(f"⚠️  Ignoring unreadable screen cache {self.path}: {e}")
+            return
+        now = time.time()
+        for *key, expires_at, verdict in entries:
+            if expires_at > now:
+                self.put(tuple(key), verdict, expires_at)
+        console.info(f"✅ Loaded {len(self.cache)} cached screen verdicts")
+
+    def save(self):
+        if not self.path:
+            return
+        entries = [[*key, expires_at, value] for key, expires_at, value in self.cache.items()]
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp, self.path)
+
+    def stats(self) -> dict:
+        stats = self.cache.stats()
+        stats["near_hits"] = self.near_hits
+        stats["threshold"] = self.threshold
+        return stats
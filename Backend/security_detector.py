@@ -1,14 +1,23 @@
 # backend/security_detector.py
 
-from urllib.parse import urlparse
-from typing import Dict
-import Levenshtein
+import os
+import threading
+import time
+from typing import Dict, Iterable, List
+import console
+from config import settings
+from keyword_matcher import KeywordMatcher
+from metrics import ANALYZE_URL_SECONDS, URL_VERDICTS
+from public_suffix import BUNDLED_LIST, PublicSuffixList
+from rule_engine import BUNDLED_RULES, RuleEngine
+from ttl_cache import MISSING, TTLCache
+from typosquat_scan import TyposquatScan
 
 
 class SecurityDetector:
     def __init__(self):
-        self.suspicious_tlds = ['.xyz', '.tk',
-                                '.ml', '.ga', '.cf', '.gq', '.top']
+        self._domain_rules_version = 0
+        self.set_suspicious_tlds(['.xyz', '.tk', '.ml', '.ga', '.cf', '.gq', '.top'])
         self.legitimate_domains = [
             'google.com', 'facebook.com', 'amazon.com', 'paypal.com',
             'microsoft.com', 'apple.com', 'github.com', 'linkedin.com'
@@ -17,59 +26,190 @@ class SecurityDetector:
             'verify', 'suspend', 'account', 'update', 'confirm',
             'secure', 'banking', 'urgent', 'immediately', 'click-here'
         ]
+        # Findings of the host-only rules (threat intel, TLD, typosquat),
+        # keyed by host
+        self.verdict_cache = TTLCache(
+            max_size=settings.VERDICT_CACHE_SIZE,
+            ttl=settings.VERDICT_CACHE_TTL
+        )
+        self._threat_intel = None  # opened on first use, see threat_intel
+        self._public_suffixes = None  # see public_suffixes
+        self._breach_index = None  # see breach_index
+        self._breach_checked_at = 0.0
+        self._load_lock = threading.Lock()
+        self.keyword_matcher = KeywordMatcher(
+            self.phishing_keywords,
+            path=settings.PHISHING_KEYWORDS_FILE or None,
+            reload_interval=settings.KEYWORDS_RELOAD_INTERVAL
+        )
+        if settings.PROTECTED_DOMAINS_FILE:
+            self.load_protected_domains(settings.PROTECTED_DOMAINS_FILE)
+        else:
+            self.set_protected_domains(self.legitimate_domains)
+        # Which checks run, their severities and reasons (see url_rules.json)
+        self.rule_engine = RuleEngine(
+            self,
+            path=settings.URL_RULES_FILE or BUNDLED_RULES,
+            reload_interval=settings.URL_RULES_RELOAD_INTERVAL
+        )
+
+    @property
+    def threat_intel(self):
+        """Local threat-intel stores (numpy + mmap), opened on first use"""
+        if self._threat_intel is None:
+            with self._load_lock:
+                if self._threat_intel is None:
+                    from threat_intel import ThreatIntel
+                    self._threat_intel = ThreatIntel(
+                        settings.THREAT_INTEL_DIR,
+                        reload_interval=settings.THREAT_INTEL_RELOAD_INTERVAL
+                    )
+        return self._threat_intel
+
+    @property
+    def public_suffixes(self):
+        """Compiled Public Suffix List (~10k rules), built on first use"""
+        if self._public_suffixes is None:
+            with self._load_lock:
+                if self._public_suffixes is None:
+                    self._public_suffixes = PublicSuffixList(
+                        settings.PUBLIC_SUFFIX_FILE or BUNDLED_LIST,
+                        cache_size=settings.DOMAIN_PARSE_CACHE_SIZE
+                    )
+        return self._public_suffixes
+
+    @property
+    def breach_index(self):
+        """Local breached-password index, or None if none has been imported;
+        reopened when the file is replaced. The old index is swapped out
+        first and closed after any reads already running on it."""
+        now = time.monotonic()
+        if now - self._breach_checked_at >= settings.THREAT_INTEL_RELOAD_INTERVAL:
+            self._breach_checked_at = now
+            with self._load_lock:
+                old = self._breach_index
+                if old is None or old.changed_on_disk():
+                    new = None
+                    if os.path.exists(settings.BREACH_INDEX_FILE):
+                        from breach_index import BreachIndex
+                        try:
+                            new = BreachIndex(settings.BREACH_INDEX_FILE)
+                            console.info(f"📂 Loaded breached-password index ({len(new)} hashes)")
+                        except (OSError, ValueError) as e:
+                            console.warning(f"⚠️  Failed to open {settings.BREACH_INDEX_FILE}: {e}")
+                    self._breach_index = new
+                    if old is not None:
+                        old.close()
+        return self._breach_index
+
+    def warm_up(self):
+        """Opens the threat-intel stores and imports numpy ahead of the first URL"""
+        self.threat_intel
+        self.public_suffixes
+        self.breach_index
+        import numpy  # noqa: F401  (used by batched typosquat matching)
+
+    @property
+    def rules_version(self) -> tuple:
+        """Changes whenever any rule list changes, so cached verdicts can be dropped"""
+        return (self._domain_rules_version, self.rule_engine.version,
+                self.keyword_matcher.version, self.threat_intel.version)
+
+    def load_protected_domains(self, path: str):
+        """Adds one domain per line from a file and rebuilds the typosquat scan"""
+        with open(path, 'r') as f:
+            domains = [line.strip().lower() for line in f
+                       if line.strip() and not line.startswith('#')]
+        self.set_protected_domains(self.legitimate_domains + domains)
+        console.info(f"📂 Loaded {len(self.typosquat_scan)} protected domains")
+
+    def set_protected_domains(self, domains: Iterable[str]):
+        """Replaces the protected domain list and rebuilds the typosquat scan"""
+        self.legitimate_domains = list(domains)
+        self.typosquat_scan = TyposquatScan(self.legitimate_domains)
+        self._domain_rules_version += 1
+
+    def set_suspicious_tlds(self, tlds: Iterable[str]):
+        """Replaces the suspicious TLD list (entries like '.xyz' or '.co.tk')"""
+        self.suspicious_tlds = list(tlds)
+        self.suspicious_suffixes = {tld.strip('.').lower(): tld for tld in self.suspicious_tlds}
+        self._domain_rules_version += 1
 
     def analyze_url(self, url: str) -> Dict:
         """Analyzes URL for phishing indicators"""
-        result = {
-            "is_threat": False,
-            "severity": 0,
-            "reason": "",
-            "threat_type": "safe"
-        }
+        started = time.perf_counter()
+        verdict = self._analyze_url(url)
+        ANALYZE_URL_SECONDS.observe(time.perf_counter() - started)
+        URL_VERDICTS.labels(verdict["threat_type"]).inc()
+        return verdict
 
-        # Check 1: HTTPS
-        if url.startswith('http://') and 'localhost' not in url:
-            result["is_threat"] = True
-            result["severity"] = 40
-            result["reason"] = "Using insecure HTTP connection instead of HTTPS"
-            result["threat_type"] = "insecure_connection"
-            return result
-
-        # Check 2: Suspicious TLD
-        domain = self._extract_domain(url)
-        for tld in self.suspicious_tlds:
-            if domain.endswith(tld):
-                result["is_threat"] = True
-                result["severity"] = 65
-                result["reason"] = f"Suspicious domain extension {tld} commonly used in scams"
-                result["threat_type"] = "suspicious_domain"
-                return result
-
-        # Check 3: Typosquatting
-        for legit in self.legitimate_domains:
-            similarity = Levenshtein.ratio(domain, legit)
-            if 0.75 < similarity < 1.0:
-                result["is_threat"] = True
-                result["severity"] = 90
-                result["reason"] = f"Domain '{domain}' looks like fake version of '{legit}'"
-                result["threat_type"] = "phishing_typosquatting"
-                return result
-
-        # Check 4: Phishing keywords
-        url_lower = url.lower()
-        found_keywords = [
-            kw for kw in self.phishing_keywords if kw in url_lower]
-        if len(found_keywords) >= 2:
-            result["is_threat"] = True
-            result["severity"] = 75
-            result["reason"] = f"URL contains phishing keywords: {', '.join(found_keywords)}"
-            result["threat_type"] = "phishing_url"
-            return result
+    def _analyze_url(self, url: str) -> Dict:
+        self._refresh_rules()
+        return self._evaluate([(url, self.public_suffixes.parse_url(url))])[0]
 
-        return result
+    def analyze_urls(self, urls: List[str]) -> List[Dict]:
+        """Analyzes a batch of URLs, checking each distinct domain only once
+
+        Same verdicts as calling analyze_url on each URL, in input order.
+        """
+        self._refresh_rules()
+
+        parse_url = self.public_suffixes.parse_url
+        items = [(url, parse_url(url)) for url in dict.fromkeys(urls)]
+        verdicts = dict(zip((url for url, _ in items), self._evaluate(items)))
+
+        for verdict in verdicts.values():
+            URL_VERDICTS.labels(verdict["threat_type"]).inc()
+
+        # Copies, so callers can't mutate a verdict shared between URLs
+        return [{**verdicts[url], "findings": [dict(f) for f in verdicts[url]["findings"]]}
+                for url in urls]
+
+    def _evaluate(self, items: List[tuple]) -> List[Dict]:
+        """Runs the rule plan; the top finding gives the reason and threat type,
+        all of them together the severity"""
+        if len(items) == 1:
+            url, parsed = items[0]
+            results = [self.rule_engine.evaluate(url, parsed, self._host_results(parsed.host))]
+        else:
+            results = self.rule_engine.evaluate_many(items, self._host_results)
+        verdicts = []
+        for severity, findings in results:
+            if not findings:
+                verdicts.append({**self._threat_result(), "findings": []})
+                continue
+            top = max(findings, key=lambda f: f["severity"])  # first in plan order on ties
+            verdicts.append({**self._threat_result(severity, top["reason"], top["threat_type"]),
+                             "findings": [dict(f) for f in findings]})
+        return verdicts
+
+    def _host_results(self, host: str) -> dict:
+        """Cached findings of the host-only rules for one host, filled in as rules run"""
+        results = self.verdict_cache.get(host)
+        if results is MISSING:
+            results = {}
+            self.verdict_cache.put(host, results)
+        return results
+
+    def _refresh_rules(self):
+        """Picks up rule and keyword file edits and drops verdicts from older rules"""
+        self.rule_engine.maybe_reload()
+        self.keyword_matcher.maybe_reload()
+        self.threat_intel.maybe_reload()
+        self.verdict_cache.sync_version(self.rules_version)
+
+    def _threat_result(self, severity: int = 0, reason: str = "",
+                       threat_type: str = "safe") -> Dict:
+        return {
+            "is_threat": severity > 0,
+            "severity": severity,
+            "reason": reason,
+            "threat_type": threat_type
+        }
 
     def check_password_strength(self, metadata: Dict) -> Dict:
-        """Analyzes password without storing it"""
+        """Analyzes password without storing it; ValueError for a hash_prefix
+        that isn't 5 hex digits or a breach_count that isn't a count"""
         score = 0
         issues = []
 
@@ -78,6 +218,20 @@ class SecurityDetector:
         has_lower = metadata.get('has_lower', False)
         has_numbers = metadata.get('has_numbers', False)
         has_special = metadata.get('has_special', False)
+        # k-anonymity breach check: the client fetched the range for the first
+        # 5 hex digits of the SHA-1 (hash_prefix) and matched its own suffix
+        hash_prefix = metadata.get('hash_prefix')
+        breach_count = metadata.get('breach_count')
+        if hash_prefix is not None:
+            from breach_index import parse_prefix
+            parse_prefix(str(hash_prefix))
+        if breach_count is not None:
+            try:
+                breach_count = int(breach_count)
+            except (TypeError, ValueError):
+                raise ValueError("breach_count must be a whole number") from None
+            if breach_count < 0:
+                raise ValueError("breach_count can't be negative")
 
         if length < 8:
             score += 50
@@ -98,18 +252,17 @@ class SecurityDetector:
         if not has_special:
             score += 15
             issues.append("Missing special characters")
+        if breach_count:
+            score += 100
+            issues.append(f"Found in {breach_count:,} known data breaches")
 
         strength = "weak" if score >= 60 else "medium" if score >= 30 else "strong"
 
-        return {
+        result = {
             "strength": strength,
             "score": min(100, score),
             "issues": issues
         }
-
-    def _extract_domain(self, url: str) -> str:
-        try:
-            parsed = urlparse(url)
-            return parsed.netloc.replace('www.', '')
-        except:
-            return ""
+        if hash_prefix is not None and breach_count is not None:
+            result["breaches"] = breach_count
+        return result
@@ -0,0 +1,278 @@
+# backend/shared_state.py
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Awaitable, Callable, List, Optional
+
+import console
+from pet_journal import fold
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pets (
+    tenant TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    coalesce_key TEXT,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS flags (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+Deliver = Callable[[dict, Optional[str], str], Awaitable[None]]
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SharedState:
+    """SQLite file (WAL) shared by every worker process of one server
+
+    Holds the pet state of every tenant, the broadcast log workers use to
+    reach each other's WebSocket clients, leases, and small flags such as
+    whether monitoring is on. Writes go through transaction(), which takes
+    SQLite's write lock (BEGIN IMMEDIATE) so a read-modify-write of a pet
+    is atomic across processes.
+
+    Every call can wait up to busy_timeout seconds for another worker's
+    write lock, so async code goes through run(), which makes the call on
+    this database's own thread instead of the event loop.
+    """
+
+    def __init__(self, path: str = 'shared.db', worker: Optional[str] = None,
+                 busy_timeout: float = 2.0):
+        self.path = path
+        self.worker = worker or worker_id()
+        self.busy_timeout = busy_timeout
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.RLock()
+        # One thread: calls run in the order they were made
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-state")
+
+    async def run(self, fn: Callable, *args):
+        """fn(*args) on the database thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    @contextmanager
+    def transaction(self):
+        """Write transaction; nested calls join the outer one"""
+        with self._lock:
+            if self._conn.in_transaction:
+                yield self._conn
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def query(self, sql: str, args=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def get_flag(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        rows = self.query("SELECT value FROM flags WHERE name = ?", (name,))
+        return rows[0][0] if rows else default
+
+    def set_flag(self, name: str, value: str):
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO flags VALUES (?, ?) "
+                         "ON CONFLICT (name) DO UPDATE SET value = excluded.value", (name, value))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+class SharedPetJournal:
+    """Stand-in for PetJournal that keeps one tenant's pet in SharedState
+
+    Same load/append/close interface, with the same snapshot-shaped state
+    (fields, last events, seq), so PetManager doesn't care which one it has.
+    transaction() and fresh_state() hand PetManager whatever another worker
+    wrote since this process last looked, so its in-memory pet never
+    updates from a stale copy.
+    """
+
+    def __init__(self, shared: SharedState, tenant: str):
+        self.shared = shared
+        self.tenant = tenant
+        self.version = 0
+
+    def load(self) -> Optional[dict]:
+        rows = self.shared.query("SELECT version, state FROM pets WHERE tenant = ?", (self.tenant,))
+        if not rows:
+            return None
+        self.version = rows[0][0]
+        return json.loads(rows[0][1])
+
+    def fresh_state(self) -> Optional[dict]:
+        """The stored state if another worker changed it, else None"""
+        rows = self.shared.query("SELECT version FROM pets WHERE tenant = ?", (self.tenant,))
+        if rows and rows[0][0] != self.version:
+            return self.load()
+        return None
+
+    @contextmanager
+    def transaction(self):
+        """Holds the write lock across a pet update; yields fresh_state()"""
+        try:
+            with self.shared.transaction():
+                yield self.fresh_state()
+        except BaseException:
+            self.version = -1  # the in-memory pet may be ahead of the database; reload next time
+            raise
+
+    def append(self, entry: dict):
+        with self.shared.transaction() as conn:
+            row = conn.execute("SELECT version, state FROM pets WHERE tenant = ?",
+                               (self.tenant,)).fetchone()
+            version, state = (row[0], json.loads(row[1])) if row else (0, {})
+            state = fold(state, {**entry, "seq": version + 1})
+            conn.execute("INSERT INTO pets VALUES (?, ?, ?) ON CONFLICT (tenant) DO UPDATE "
+                         "SET version = excluded.version, state = excluded.state",
+                         (self.tenant, state["seq"], json.dumps(state, separators=(',', ':'))))
+        self.version = state["seq"]
+
+    def flush(self):
+        pass  # every append is already committed
+
+    def close(self):
+        pass
+
+
+class SharedBus:
+    """Broadcasts between workers through the shared database
+
+    publish() appends the message to a log table. Every worker polls the log
+    every poll_interval seconds and hands other workers' messages to
+    deliver (its own ConnectionManager), so every /ws client gets every
+    broadcast for its tenant whichever worker it is connected to. Messages
+    older than retention seconds are trimmed. Database work runs on the
+    SharedState's thread.
+    """
+
+    def __init__(self, shared: SharedState, poll_interval: float = 0.05,
+                 retention: float = 60.0, clock=time.time):
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.clock = clock
+        self.published = 0
+        self.received = 0
+        self._last_id = 0
+        self._trimmed_at = 0.0
+
+    async def publish(self, tenant: str, message: dict, coalesce_key: Optional[str] = None):
+        await self.shared.run(self._insert, tenant, json.dumps(message), coalesce_key)
+        self.published += 1
+
+    def _insert(self, tenant: str, payload: str, coalesce_key: Optional[str]):
+        with self.shared.transaction() as conn:
+            conn.execute("INSERT INTO messages (origin, tenant, coalesce_key, payload, created) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (self.shared.worker, tenant, coalesce_key, payload, self.clock()))
+
+    async def run(self, deliver: Deliver):
+        """Delivers other workers' broadcasts until cancelled"""
+        self._last_id = (await self.shared.run(
+            self.shared.query, "SELECT COALESCE(MAX(id), 0) FROM messages"))[0][0]
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll(deliver)
+            except sqlite3.Error as e:
+                console.error(f"❌ Broadcast poll failed: {e}")
+
+    async def poll(self, deliver: Deliver) -> int:
+        rows = await self.shared.run(self._fetch, self._last_id)
+        delivered = 0
+        for row_id, origin, tenant, coalesce_key, payload in rows:
+            self._last_id = row_id
+            if origin != self.shared.worker:
+                await deliver(json.loads(payload), coalesce_key, tenant)
+                delivered += 1
+        self.received += delivered
+        return delivered
+
+    def _fetch(self, last_id: int) -> List[tuple]:
+        """Messages after last_id; trims old ones every retention / 4 seconds"""
+        rows = self.shared.query(
+            "SELECT id, origin, tenant, coalesce_key, payload FROM messages "
+            "WHERE id > ? ORDER BY id LIMIT 1000", (last_id,))
+        now = self.clock()
+        if now - self._trimmed_at > self.retention / 4:
+            self._trimmed_at = now
+            with self.shared.transaction() as conn:
+                conn.execute("DELETE FROM messages WHERE created < ?", (now - self.retention,))
+        return rows
+
+    def stats(self) -> dict:
+        return {"worker": self.shared.worker, "published": self.published,
+                "received": self.received, "last_id": self._last_id}
+
+
+class Lease:
+    """A named role (e.g. running the monitor) held by at most one worker
+
+    The holder renews it with hold() well within ttl seconds; if it stops
+    renewing (crashed, stuck), another worker's hold() takes it over once
+    it has expired.
+    """
+
+    def __init__(self, shared: SharedState, name: str, ttl: float = 10.0, clock=time.time):
+        self.shared = shared
+        self.name = name
+        self.ttl = ttl
+        self.clock = clock
+
+    def hold(self) -> bool:
+        """Acquires or renews the lease; returns whether this worker holds it"""
+        now = self.clock()
+        with self.shared.transaction() as conn:
+            conn.execute(
+                "INSERT INTO leases VALUES (?, ?, ?) ON CONFLICT (name) DO UPDATE "
+                "SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires < ?",
+                (self.name, self.shared.worker, now + self.ttl, now))
+            owner = conn.execute("SELECT owner FROM leases WHERE name = ?",
+                                 (self.name,)).fetchone()[0]
+        return owner == self.shared.worker
+
+    def release(self):
+        with self.shared.transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?",
+                         (self.name, self.shared.worker))
+
+    def owner(self) -> Optional[str]:
+        rows = self.shared.query("SELECT owner FROM leases WHERE name = ? AND expires >= ?",
+                                 (self.name, self.clock()))
+        return rows[0][0] if rows else None
@@ -0,0 +1,50 @@
+# backend/state_stream.py
+
+from collections import deque
+from typing import Optional
+
+_MISSING = object()
+
+
+class StateStream:
+    """Sequence-numbered pet state with a short history of field-level deltas
+
+    Every real change bumps seq and records only the fields that changed;
+    updates that change nothing are ignored. since() merges the deltas after
+    a client's last seen seq, or returns None when that seq is too old (or
+    unknown) and the client needs a full snapshot instead.
+    """
+
+    def __init__(self, history: int = 256, start: int = 0):
+        self.seq = start  # a replacement stream starts past its predecessor's seqs
+        self.state: dict = {}
+        self._deltas = deque(maxlen=history)  # (seq, changes)
+
+    def update(self, state: dict) -> Optional[dict]:
+        """Records a new state; returns the changed fields, or None for a no-op"""
+        changes = {k: v for k, v in state.items() if self.state.get(k, _MISSING) != v}
+        if not changes:
+            return None
+        self.seq += 1
+        self.state = {**self.state, **changes}
+        self._deltas.append((self.seq, changes))
+        return changes
+
+    def since(self, seq: int) -> Optional[dict]:
+        """Merged changes after seq, or None if only a snapshot will do"""
+        if seq == self.seq:
+            return {}
+        if seq < 0 or seq > self.seq or not self._deltas or seq < self._deltas[0][0] - 1:
+            return None
+        merged = {}
+        for delta_seq, changes in self._deltas:
+            if delta_seq > seq:
+                merged.update(changes)
+        return merged
+
+    def snapshot_message(self) -> dict:
+        return {"type": "pet_snapshot", "seq": self.seq, "pet_state": dict(self.state)}
+
+    def delta_message(self, base_seq: int, changes: dict) -> dict:
+        return {"type": "pet_delta", "base_seq": base_seq, "seq": self.seq,
+                "changes": changes}
@@ -0,0 +1,152 @@
+# backend/tenants.py
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from connection_manager import DEFAULT_TENANT
+from event_store import EventStore
+from pet_journal import JournalFlusher, PetJournal
+from pet_manager import PetManager
+from shared_state import SharedPetJournal, SharedState
+
+TENANT_ID = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+
+def valid_tenant(tenant: str) -> bool:
+    return bool(TENANT_ID.match(tenant)) and tenant not in ('.', '..')
+
+
+class PetRegistry:
+    """One PetManager per tenant (user or device), loaded on demand
+
+    At most max_loaded pets are kept in memory, in LRU order; the least
+    recently used one is closed (journal flushed, snapshot written) when a
+    new tenant needs room, and pets idle for idle_timeout seconds are closed
+    as well. Closing happens on the flusher thread, never in get(); until
+    it finishes, get() hands back the evicted pet rather than loading a
+    snapshot that is still being written. Each tenant's snapshot and journal live under directory in one
+    of 256 shard folders picked by a hash of the tenant id, so no folder
+    grows too large. All tenant journals share one flusher thread. The
+    default tenant keeps the original pet_state.json / pet_state.journal
+    paths, so single-user setups see no change.
+
+    With a SharedState (several worker processes), pets live in the shared
+    database instead of files, and get() brings a loaded pet up to date
+    with whatever other workers wrote before handing it out.
+    """
+
+    def __init__(self, directory: str = 'pets', max_loaded: int = 1000,
+                 idle_timeout: float = 600.0, event_store: Optional[EventStore] = None,
+                 shared: Optional[SharedState] = None, clock=time.monotonic):
+        self.directory = directory
+        self.shared = shared
+        self.max_loaded = max_loaded
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.event_store = event_store
+        self.flusher = JournalFlusher(settings.PET_JOURNAL_FLUSH_INTERVAL)
+        self._pets: "OrderedDict[str, Tuple[PetManager, float]]" = OrderedDict()
+        self._closing: Dict[str, List] = {}  # tenant -> [pet, closes pending]
+        self._closing_lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def paths(self, tenant: str) -> Tuple[str, str]:
+        """(snapshot, journal) file paths for a tenant"""
+        if tenant == DEFAULT_TENANT:
+            return settings.PET_STATE_FILE, settings.PET_JOURNAL_FILE
+        shard = hashlib.sha1(tenant.encode()).hexdigest()[:2]
+        base = os.path.join(self.directory, shard, tenant)
+        return base + '.json', base + '.journal'
+
+    def get(self, tenant: str = DEFAULT_TENANT) -> PetManager:
+        now = self.clock()
+        entry = self._pets.get(tenant)
+        if entry is not None:
+            self._pets[tenant] = (entry[0], now)
+            self._pets.move_to_end(tenant)
+            if self.shared is not None:
+                entry[0].refresh()
+            return entry[0]
+
+        self.evict_idle(now)
+        while len(self._pets) >= self.max_loaded:
+            self._evict(next(iter(self._pets)))
+
+        with self._closing_lock:
+            closing = self._closing.get(tenant)
+        if closing is not None:
+            pet = closing[0]  # its journal still works; the close only flushes
+            if self.shared is not None:
+                pet.refresh()
+        else:
+            pet = PetManager(journal=self._journal(tenant), event_store=self.event_store,
+                             tenant=tenant)
+            self.loads += 1
+        self._pets[tenant] = (pet, now)
+        return pet
+
+    def _journal(self, tenant: str):
+        if self.shared is not None:
+            return SharedPetJournal(self.shared, tenant)
+        snapshot_path, journal_path = self.paths(tenant)
+        if tenant != DEFAULT_TENANT:
+            os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        return PetJournal(
+            snapshot_path=snapshot_path,
+            journal_path=journal_path,
+            snapshot_every=settings.PET_SNAPSHOT_EVERY,
+            flusher=self.flusher
+        )
+
+    def loaded(self, tenant: str) -> Optional[PetManager]:
+        entry = self._pets.get(tenant)
+        return entry[0] if entry else None
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Closes pets nobody has touched for idle_timeout seconds"""
+        now = self.clock() if now is None else now
+        evicted = 0
+        while self._pets:
+            tenant, (_, last_used) = next(iter(self._pets.items()))
+            if now - last_used < self.idle_timeout:
+                break  # LRU order: everything after this is newer
+            self._evict(tenant)
+            evicted += 1
+        return evicted
+
+    def _evict(self, tenant: str):
+        pet, _ = self._pets.pop(tenant)
+        with self._closing_lock:
+            closing = self._closing.setdefault(tenant, [pet, 0])
+            closing[1] += 1
+        self.flusher.retire(pet.journal, lambda: self._closed(tenant))
+        self.evictions += 1
+
+    def _closed(self, tenant: str):
+        """Runs on the flusher thread once an evicted pet's close is done"""
+        with self._closing_lock:
+            closing = self._closing[tenant]
+            closing[1] -= 1
+            if not closing[1]:
+                del self._closing[tenant]
+
+    def close(self):
+        for tenant in list(self._pets):
+            self._pets.pop(tenant)[0].close()
+        self.flusher.close()
+
+    def stats(self) -> dict:
+        return {
+            "loaded": len(self._pets),
+            "closing": len(self._closing),
+            "max_loaded": self.max_loaded,
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
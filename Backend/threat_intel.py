@@ -0,0 +1,432 @@
+# backend/threat_intel.py
+#
+# Offline known-bad domain lookups. Each store is a set of SHA-256 hash
+# prefixes of "host/" expressions (the Safe Browsing convention):
+#
+#   <name>.tidb   header + sorted prefixes, memory-mapped, binary searched
+#   <name>.bloom  bloom filter over the same prefixes, checked first
+#   <name>.delta  "+<hex>" / "-<hex>" lines applied since the last compaction
+#
+# Usage (from Backend/):
+#   python -m threat_intel import-blocklist NAME FILE [--prefix-size 8]
+#   python -m threat_intel import-prefixes NAME FILE [--prefix-size 4]
+#   python -m threat_intel apply-delta NAME FILE
+#   python -m threat_intel compact NAME
+#   python -m threat_intel stats
+
+import argparse
+import glob
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import console
+from config import settings
+
+STORE_HEADER = struct.Struct('<4sB3xQ')  # magic, prefix size, count
+STORE_MAGIC = b'CPTI'
+BLOOM_HEADER = struct.Struct('<4sQI')  # magic, bits, hashes
+BLOOM_MAGIC = b'CPBF'
+DTYPES = {4: np.dtype('<u4'), 8: np.dtype('<u8')}
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def host_prefix(expression: str, prefix_size: int) -> int:
+    """Hash prefix of a host expression, as a big-endian integer"""
+    digest = hashlib.sha256((expression + '/').encode()).digest()
+    return int.from_bytes(digest[:prefix_size], 'big')
+
+
+def host_expressions(host: str) -> List[str]:
+    """The host itself plus up to four parent domains, Safe Browsing style"""
+    if '@' in host or ':' in host:
+        host = host.rsplit('@', 1)[-1].split(':')[0]
+    host = host.strip('.').lower()
+    if not host:
+        return []
+
+    labels = host.split('.')
+    if len(labels) <= 2 or labels[-1].isdigit():
+        return [host]  # already a registrable name, or an IP address
+
+    expressions = [host]
+    tail = labels[-5:]
+    for i in range(len(tail) - 1):
+        parent = '.'.join(tail[i:])
+        if parent not in expressions:
+            expressions.append(parent)
+    return expressions
+
+
+def _bloom_hashes(value: int, hashes: int, bits: int):
+    # Prefixes are already uniformly distributed, so double hashing off the
+    # value itself is enough
+    step = ((value * GOLDEN) & MASK64) >> 17 | 1
+    for i in range(hashes):
+        yield ((value + i * step) & MASK64) % bits
+
+
+class BloomFilter:
+    """Memory-mapped bloom filter over integer hash prefixes; read-only
+    unless opened writable (add() needs that)"""
+
+    def __init__(self, path: str, writable: bool = False):
+        self._file = open(path, 'r+b' if writable else 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0,
+                             access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, self.bits, self.hashes = BLOOM_HEADER.unpack_from(self._mm)
+        if magic != BLOOM_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a bloom filter file")
+
+    @staticmethod
+    def create(path: str, values: np.ndarray, fp_rate: float):
+        n = max(len(values), 1)
+        bits = max(64, int(-n * math.log(fp_rate) / math.log(2) ** 2))
+        bits += -bits % 8
+        hashes = max(1, round(bits / n * math.log(2)))
+
+        # Same positions as _bloom_hashes, computed with wrapping uint64 math
+        v = values.astype(np.uint64)
+        step = ((v * np.uint64(GOLDEN)) >> np.uint64(17)) | np.uint64(1)
+        flags = np.zeros(bits, dtype=bool)
+        for i in range(hashes):
+            flags[(v + np.uint64(i) * step) % np.uint64(bits)] = True
+
+        with open(path + '.tmp', 'wb') as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, bits, hashes))
+            f.write(np.packbits(flags, bitorder='little').tobytes())
+        os.replace(path + '.tmp', path)
+
+    def __contains__(self, value: int) -> bool:
+        mm = self._mm
+        bits = self.bits
+        step = ((value * GOLDEN) & MASK64) >> 17 | 1
+        for i in range(self.hashes):
+            bit = ((value + i * step) & MASK64) % bits
+            if not mm[BLOOM_HEADER.size + (bit >> 3)] >> (bit & 7) & 1:
+                return False
+        return True
+
+    def flush(self):
+        self._mm.flush()
+
+    def add(self, value: int):
+        mm = self._mm
+        for bit in _bloom_hashes(value, self.hashes, self.bits):
+            offset = BLOOM_HEADER.size + (bit >> 3)
+            mm[offset] = mm[offset] | (1 << (bit & 7))
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+def _write_store(base: str, values: np.ndarray, prefix_size: int):
+    """Both files are written in full before either is swapped in. The
+    sorted store goes first: a reader reopening between the two swaps gets
+    the new store with the old bloom, and since the bloom's mtime is part of
+    changed_on_disk() it reopens again on its next check."""
+    values = np.unique(values.astype(DTYPES[prefix_size]))
+    with open(base + '.tidb.tmp', 'wb') as f:
+        f.write(STORE_HEADER.pack(STORE_MAGIC, prefix_size, len(values)))
+        f.write(values.tobytes())
+    BloomFilter.create(base + '.bloom.new', values, settings.THREAT_INTEL_BLOOM_FP_RATE)
+    os.replace(base + '.tidb.tmp', base + '.tidb')
+    os.replace(base + '.bloom.new', base + '.bloom')
+    if os.path.exists(base + '.delta'):
+        os.remove(base + '.delta')
+
+
+class ThreatStore:
+    """One named prefix store: sorted mmap array, bloom filter, delta overlay
+
+    The server opens stores read-only; apply_delta() needs writable=True
+    (the CLI), since it sets bloom bits in place.
+    """
+
+    def __init__(self, base: str, writable: bool = False):
+        self.base = base
+        self.name = os.path.basename(base)
+        self.writable = writable
+        self._open()
+
+    @staticmethod
+    def create(base: str, values: np.ndarray, prefix_size: int) -> 'ThreatStore':
+        """Writes a fresh store from an array of prefixes (any order, dupes ok)"""
+        _write_store(base, values, prefix_size)
+        return ThreatStore(base, writable=True)
+
+    def _open(self):
+        self._file = open(self.base + '.tidb', 'rb')
+        magic, self.prefix_size, count = STORE_HEADER.unpack(
+            self._file.read(STORE_HEADER.size))
+        if magic != STORE_MAGIC:
+            self._file.close()
+            raise ValueError(f"{self.base}.tidb is not a threat store")
+
+        # A native-order view straight over the mapped file; bisect on it
+        # costs a few page touches and no copies. Stores are little-endian.
+        code = 'Q' if self.prefix_size == 8 else 'I'
+        if count:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._prefixes = memoryview(self._mm)[STORE_HEADER.size:].cast(code)
+        else:
+            self._mm = None
+            self._prefixes = memoryview(b'').cast(code)
+        self._bloom = BloomFilter(self.base + '.bloom', writable=self.writable)
+
+        self._added = set()
+        self._removed = set()
+        if os.path.exists(self.base + '.delta'):
+            with open(self.base + '.delta', 'r') as f:
+                for line in f:
+                    self._apply_line(line.strip())
+        self.mtimes = self._stat()
+
+    def close(self):
+        self._bloom.close()
+        self._prefixes.release()
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def _stat(self) -> tuple:
+        return tuple(os.path.getmtime(self.base + ext) if os.path.exists(self.base + ext)
+                     else None for ext in ('.tidb', '.bloom', '.delta'))
+
+    def changed_on_disk(self) -> bool:
+        return self._stat() != self.mtimes
+
+    def __len__(self) -> int:
+        return len(self._prefixes) + len(self._added) - len(self._removed)
+
+    def contains_prefix(self, value: int) -> bool:
+        if value not in self._bloom:
+            return False
+        if value in self._removed:
+            return False
+        if value in self._added:
+            return True
+        return self._in_base(value)
+
+    def contains_host(self, host: str) -> bool:
+        return any(self.contains_prefix(host_prefix(expr, self.prefix_size))
+                   for expr in host_expressions(host))
+
+    def _apply_line(self, line: str):
+        if not line:
+            return
+        value = int(line[1:], 16)
+        if line[0] == '+':
+            self._removed.discard(value)
+            if not self._in_base(value):
+                self._added.add(value)
+        elif line[0] == '-':
+            self._added.discard(value)
+            if self._in_base(value):
+                self._removed.add(value)
+
+    def _in_base(self, value: int) -> bool:
+        i = bisect_left(self._prefixes, value)
+        return i < len(self._prefixes) and self._prefixes[i] == value
+
+    def apply_delta(self, adds: Iterable[int] = (), removes: Iterable[int] = ()):
+        """Appends additions/removals to the delta log and applies them in place"""
+        width = self.prefix_size * 2
+        lines = [f"+{v:0{width}x}" for v in adds] + [f"-{v:0{width}x}" for v in removes]
+        with open(self.base + '.delta', 'a') as f:
+            for line in lines:
+                f.write(line + '\n')
+                self._apply_line(line)
+                if line[0] == '+':
+                    self._bloom.add(int(line[1:], 16))
+            f.flush()
+            os.fsync(f.fileno())
+        self._bloom.flush()
+        self.mtimes = self._stat()
+
+        if len(self._added) + len(self._removed) > max(
+                settings.THREAT_INTEL_COMPACT_MIN, len(self._prefixes) // 20):
+            self.compact()
+
+    def compact(self):
+        """Folds the delta log into a new sorted array and bloom filter"""
+        base = np.frombuffer(self._prefixes, dtype=DTYPES[self.prefix_size]).copy()
+        if self._removed:
+            base = base[~np.isin(base, np.fromiter(self._removed, dtype=base.dtype))]
+        added = np.fromiter(self._added, dtype=base.dtype, count=len(self._added))
+        merged = np.concatenate([base, added])
+        self.close()
+        _write_store(self.base, merged, self.prefix_size)
+        self._open()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "prefix_size": self.prefix_size,
+            "entries": len(self),
+            "pending_delta": len(self._added) + len(self._removed),
+            "bloom_bits": self._bloom.bits,
+            "bloom_hashes": self._bloom.hashes,
+            "disk_bytes": sum(os.path.getsize(self.base + ext)
+                              for ext in ('.tidb', '.bloom', '.delta')
+                              if os.path.exists(self.base + ext))
+        }
+
+
+class ThreatIntel:
+    """Every threat store in a directory, checked together"""
+
+    def __init__(self, directory: str, reload_interval: float = 30.0):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.version = 0
+        self.stores: Dict[str, ThreatStore] = {}
+        self._checked_at = time.monotonic()
+        self.load()
+
+    def load(self):
+        """(Re)opens every store in the directory"""
+        for store in self.stores.values():
+            store.close()
+        self.stores = {}
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.tidb'))):
+            base = path[:-len('.tidb')]
+            try:
+                store = ThreatStore(base)
+                self.stores[store.name] = store
+            except Exception as e:
+                console.warning(f"⚠️  Failed to open threat store {base}: {e}")
+        self.version += 1
+        if self.stores:
+            total = sum(len(s) for s in self.stores.values())
+            console.info(f"📂 Loaded {len(self.stores)} threat stores ({total} entries)")
+
+    def lookup(self, host: str) -> Optional[str]:
+        """Name of the first store listing this host (or a parent domain)"""
+        for name, store in self.stores.items():
+            if store.contains_host(host):
+                return name
+        return None
+
+    def maybe_reload(self) -> bool:
+        """Reopens the stores if files changed on disk, checking at most once per interval"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+
+        on_disk = set(os.path.basename(p)[:-len('.tidb')]
+                      for p in glob.glob(os.path.join(self.directory, '*.tidb')))
+        if on_disk == set(self.stores) and not any(
+                s.changed_on_disk() for s in self.stores.values()):
+            return False
+
+        self.load()
+        return True
+
+    def stats(self) -> dict:
+        return {"stores": [store.stats() for store in self.stores.values()]}
+
+
+def _blocklist_hosts(path: str) -> Iterable[str]:
+    """Hosts from a plain, hosts-file or URL-per-line blocklist"""
+    with open(path, 'r', errors='ignore') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            token = line.split()[-1]
+            if '://' in token:
+                token = token.split('://', 1)[1]
+            host = token.split('/', 1)[0].strip('.').lower()
+            if host and host not in ('localhost', '0.0.0.0'):
+                yield host
+
+
+def import_blocklist(base: str, path: str, prefix_size: int = 8) -> ThreatStore:
+    """Builds a store from a domain blocklist, replacing any existing one"""
+    values = array('Q' if prefix_size == 8 else 'I')
+    for host in _blocklist_hosts(path):
+        values.append(host_prefix(host, prefix_size))
+    return ThreatStore.create(base, np.frombuffer(values, dtype=DTYPES[prefix_size]),
+                              prefix_size)
+
+
+def import_prefixes(base: str, path: str, prefix_size: int = 4) -> ThreatStore:
+    """Builds a store from a raw dump of concatenated big-endian hash prefixes"""
+    raw = np.fromfile(path, dtype=np.dtype(f'>u{prefix_size}'))
+    return ThreatStore.create(base, raw.astype(DTYPES[prefix_size]), prefix_size)
+
+
+def read_delta(path: str, prefix_size: int):
+    """+/- lines naming a host, or a hash prefix written as 0x<hex>"""
+    adds, removes = [], []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if len(line) < 2 or line[0] not in '+-':
+                continue
+            token = line[1:].strip()
+            if token.startswith('0x'):
+                value = int(token, 16)
+            else:
+                value = host_prefix(token.lower(), prefix_size)
+            (adds if line[0] == '+' else removes).append(value)
+    return adds, removes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage local threat-intel stores")
+    parser.add_argument('--dir', default=settings.THREAT_INTEL_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    for command, default_size in (('import-blocklist', 8), ('import-prefixes', 4)):
+        p = sub.add_parser(command)
+        p.add_argument('name')
+        p.add_argument('file')
+        p.add_argument('--prefix-size', type=int, choices=sorted(DTYPES),
+                       default=default_size)
+    p = sub.add_parser('apply-delta')
+    p.add_argument('name')
+    p.add_argument('file')
+    p = sub.add_parser('compact')
+    p.add_argument('name')
+    sub.add_parser('stats')
+
+    args = parser.parse_args()
+    os.makedirs(args.dir, exist_ok=True)
+    base = os.path.join(args.dir, getattr(args, 'name', ''))
+
+    start = time.perf_counter()
+    if args.command == 'import-blocklist':
+        store = import_blocklist(base, args.file, args.prefix_size)
+    elif args.command == 'import-prefixes':
+        store = import_prefixes(base, args.file, args.prefix_size)
+    elif args.command == 'apply-delta':
+        store = ThreatStore(base, writable=True)
+        store.apply_delta(*read_delta(args.file, store.prefix_size))
+    elif args.command == 'compact':
+        store = ThreatStore(base, writable=True)
+        store.compact()
+    else:
+        for stats in ThreatIntel(args.dir).stats()["stores"]:
+            print(stats)
+        return
+
+    print(f"✅ {args.command} {store.name}: {store.stats()} "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
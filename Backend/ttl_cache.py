@@ -0,0 +1,93 @@
+# backend/ttl_cache.py
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ttl seconds
+
+    Values can be tagged with a version (e.g. the rule-list version they were
+    computed from); sync_version drops everything once the version moves on.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version: Any = None
+        self._clock = clock
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether key holds a live entry; doesn't count as a lookup or touch LRU order"""
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > self._clock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        if entry[0] <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        if expires_at is None:
+            expires_at = self._clock() + self.ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def items(self) -> Iterator[Tuple[Hashable, float, Any]]:
+        """(key, expires_at, value) for live entries, least recently used first"""
+        now = self._clock()
+        for key, (expires_at, value) in list(self._data.items()):
+            if expires_at > now:
+                yield key, expires_at, value
+
+    def clear(self):
+        self._data.clear()
+        self.invalidations += 1
+
+    def sync_version(self, version: Any):
+        """Clears the cache if it holds values from another version"""
+        if version != self.version:
+            if self._data:
+                self.clear()
+            self.version = version
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
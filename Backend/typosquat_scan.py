@@ -0,0 +1,140 @@
+# backend/typosquat_scan.py
+
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional
+
+from rapidfuzz import process
+from rapidfuzz.distance import Indel
+
+BLOCK_SIZE = 1024
+SMALL_SLICE = 32  # below this, per-pair scoring beats a batched call
+SMALL_BATCH = 16  # below this, match_many just loops over match
+QUERY_CHUNK = 1024  # bounds the score matrix to QUERY_CHUNK x BLOCK_SIZE
+
+
+class _Block:
+    """A run of consecutive brands, sorted by length for window slicing"""
+
+    def __init__(self, entries: List[tuple]):
+        entries = sorted(entries)
+        self.lengths = [length for length, _, _ in entries]
+        self.ids = [i for _, i, _ in entries]
+        self.domains = [domain for _, _, domain in entries]
+
+
+class TyposquatScan:
+    """Length-bucketed linear scan of protected domains for typosquat lookups
+
+    This is not a pruning index: every brand in the length window is scored.
+    Levenshtein.ratio is 2 * LCS / (len(a) + len(b)), so it can never exceed
+    2 * min(len) / (len(a) + len(b)); that bounds the brands worth scoring to
+    a window of lengths around the query. Brands are kept in blocks of
+    consecutive list entries, each sorted by length, so match() scores one
+    window slice per block in a single batched rapidfuzz call and stops at
+    the first block with a hit, just like the old scan stopped at the first
+    matching brand. A metric tree (BK-tree over Indel distance) was tried
+    and visited about two thirds of the brands at the radii a 0.75 ratio
+    allows, which is slower than scoring the window in C.
+    """
+
+    def __init__(self, domains: Iterable[str], threshold: float = 0.75,
+                 block_size: int = BLOCK_SIZE):
+        self.threshold = threshold
+        self._domains: List[str] = []
+        self._exact = set()
+        for domain in domains:
+            domain = domain.strip().lower()
+            if domain and domain not in self._exact:
+                self._exact.add(domain)
+                self._domains.append(domain)
+
+        self._blocks = [
+            _Block([(len(d), start + i, d)
+                    for i, d in enumerate(self._domains[start:start + block_size])])
+            for start in range(0, len(self._domains), block_size)
+        ]
+
+    def __len__(self) -> int:
+        return len(self._domains)
+
+    def __contains__(self, domain: str) -> bool:
+        return domain in self._exact
+
+    def match(self, domain: str) -> Optional[str]:
+        """Returns the protected domain this one imitates, if any
+
+        Same rule as the old linear scan (0.75 < ratio < 1.0, first brand in
+        list order wins), except that a protected domain is never reported
+        as a fake of another protected domain.
+        """
+        if not domain or domain in self._exact:
+            return None
+
+        t = self.threshold
+        # Shorter brand: 2 * lc / (n + lc) > t  =>  lc > t * n / (2 - t)
+        # Longer brand:  2 * n / (n + lc) > t   =>  lc < (2 - t) * n / t
+        min_len = int(t * len(domain) / (2 - t))
+        max_len = (2 - t) * len(domain) / t
+
+        for block in self._blocks:
+            lo = bisect_right(block.lengths, min_len)
+            hi = bisect_left(block.lengths, max_len)
+            if lo >= hi:
+                continue
+
+            if hi - lo < SMALL_SLICE:
+                matches = [(block.ids[i], block.domains[i]) for i in range(lo, hi)
+                           if t < Indel.normalized_similarity(domain, block.domains[i]) < 1.0]
+            else:
+                hits = process.extract(
+                    domain,
+                    block.domains[lo:hi],
+                    scorer=Indel.normalized_similarity,
+                    score_cutoff=t,
+                    limit=None
+                )
+                matches = [(block.ids[lo + pos], legit)
+                           for legit, score, pos in hits if t < score < 1.0]
+            if matches:
+                return min(matches)[1]
+
+        return None
+
+    def match_many(self, domains: List[str]) -> List[Optional[str]]:
+        """Same as [match(d) for d in domains], scored as query x brand matrices
+
+        Each block is scored in full, without the length window: one cdist
+        call over the block is cheaper than a call per query.
+        """
+        if len(domains) < SMALL_BATCH:
+            return [self.match(domain) for domain in domains]
+        import numpy as np  # only this path needs it; keeps it out of startup
+
+        results: List[Optional[str]] = [None] * len(domains)
+        pending = [i for i, d in enumerate(domains) if d and d not in self._exact]
+        t = self.threshold
+
+        for block in self._blocks:
+            if not pending:
+                break
+            ids = np.array(block.ids)
+            unresolved = []
+            for start in range(0, len(pending), QUERY_CHUNK):
+                chunk = pending[start:start + QUERY_CHUNK]
+                scores = process.cdist(
+                    [domains[i] for i in chunk],
+                    block.domains,
+                    scorer=Indel.normalized_similarity,
+                    score_cutoff=t,
+                    dtype=np.float64
+                )
+                hits = (scores > t) & (scores < 1.0)
+                first = np.where(hits, ids, len(self._domains)).argmin(axis=1)
+                for row, i in enumerate(chunk):
+                    if hits[row, first[row]]:
+                        results[i] = block.domains[first[row]]
+                    else:
+                        unresolved.append(i)
+            pending = unresolved
+
+        return results
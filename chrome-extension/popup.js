@@ -974,7 +974,11 @@ class CyberPetSecurityManager {
 // Password Tester Class - UPDATED WITH STRICTER PARAMETERS
 class PasswordTester {
     constructor() {
-        this.breachApiUrl = 'https://api.pwnedpasswords.com/range/';
+        // Local backend index first (works offline), public range API as fallback
+        this.breachApiUrls = [
+            'http://localhost:8000/api/breach-range/',
+            'https://api.pwnedpasswords.com/range/'
+        ];
     }
 
     async testPassword(password) {
@@ -1075,6 +1079,21 @@ class PasswordTester {
         return size || 1;
     }
 
+    // Only the 5-character prefix ever leaves the browser
+    async fetchRange(prefix) {
+        let lastError;
+        for (const url of this.breachApiUrls) {
+            try {
+                const response = await fetch(`${url}${prefix}`);
+                if (response.ok) return await response.text();
+                lastError = new Error(`${url} returned ${response.status}`);
+            } catch (error) {
+                lastError = error;
+            }
+        }
+        throw lastError;
+    }
+
     async checkBreaches(password) {
         try {
             // SHA-1 hash the password
@@ -1087,8 +1106,7 @@ class PasswordTester {
             const prefix = hashHex.substring(0, 5).toUpperCase();
             const suffix = hashHex.substring(5).toUpperCase();
 
-            const response = await fetch(`${this.breachApiUrl}${prefix}`);
-            const responseData = await response.text();
+            const responseData = await this.fetchRange(prefix);
             
             const lines = responseData.split('\n');
             for (const line of lines) {
@@ -2,6 +2,9 @@
 export class APIClient {
   constructor(baseURL) {
     this.baseURL = baseURL;
+    // Every read-modify-write of failedEvents goes through this chain, so a
+    // queued event can't be overwritten by a flush removing sent ones
+    this.storageChain = Promise.resolve();
   }
 
   async sendSecurityEvent(event) {
@@ -12,20 +15,99 @@ export class APIClient {
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(event)
       });
+      if (isRejected(res.status)) {
+        console.warn(`🗑️ Backend rejected event (HTTP ${res.status}), not queuing it:`, event);
+        return;
+      }
       if (!res.ok) throw new Error(`HTTP ${res.status}`);
       console.log('✅ Event sent successfully');
+      this.flushFailedEvents();
     } catch (err) {
       console.error('❌ Failed to send event:', err);
       this.queueFailedEvent(event);
     }
   }
 
+  updateFailedEvents(update) {
+    const next = this.storageChain.then(async () => {
+      const { failedEvents = [] } = await chrome.storage.local.get(['failedEvents']);
+      await chrome.storage.local.set({ failedEvents: update(failedEvents) });
+    });
+    this.storageChain = next.catch((err) => console.error('❌ Failed to update queued events:', err));
+    return next;
+  }
+
   queueFailedEvent(event) {
-    chrome.storage.local.get(['failedEvents'], (result) => {
-      const failed = result.failedEvents || [];
-      failed.push({ ...event, failedAt: Date.now() });
-      chrome.storage.local.set({ failedEvents: failed });
-      console.log('💾 Queued failed event');
+    return this.updateFailedEvents((failed) => [...failed, { ...event, failedAt: Date.now() }])
+      .then(() => console.log('💾 Queued failed event'));
+  }
+
+  // Sends the offline backlog, up to 500 events per request. On 429 it stays
+  // queued and is retried after the server's Retry-After hint; network
+  // errors and 5xx leave it for the next flush. A batch the backend rejects
+  // (any other 4xx) is split until the bad events are found and dropped, so
+  // one of them can't block the backlog forever.
+  async flushFailedEvents() {
+    if (this.flushing) return;
+    this.flushing = true;
+    const progress = { done: 0 };
+    let more = false;
+    try {
+      await this.storageChain;
+      const { failedEvents = [] } = await chrome.storage.local.get(['failedEvents']);
+      if (failedEvents.length === 0) return;
+
+      const batch = failedEvents.slice(0, 500).map(({ failedAt, ...event }) => event);
+      await this.postBacklog(batch, progress);
+      console.log(`✅ Flushed ${batch.length} queued events`);
+      more = failedEvents.length > batch.length;
+    } catch (err) {
+      if (err.retryAfter) {
+        console.log(`⏳ Backend busy, retrying backlog in ${err.retryAfter}s`);
+        setTimeout(() => this.flushFailedEvents(), err.retryAfter * 1000);
+      } else {
+        console.error('❌ Failed to flush queued events:', err);
+      }
+    } finally {
+      // Only this flush removes events, always from the front; events queued
+      // while it ran are behind them and stay for next time
+      if (progress.done > 0) {
+        await this.updateFailedEvents((current) => current.slice(progress.done)).catch(() => {});
+      }
+      this.flushing = false;
+    }
+    if (more) setTimeout(() => this.flushFailedEvents(), 0);
+  }
+
+  // Posts events in order; progress.done counts those sent or dropped so far
+  async postBacklog(batch, progress) {
+    const res = await fetch(`${this.baseURL}/api/security-events`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(batch)
     });
+    if (res.status === 429) {
+      const err = new Error('HTTP 429');
+      err.retryAfter = Number(res.headers.get('Retry-After')) || 5;
+      throw err;
+    }
+    if (isRejected(res.status)) {
+      if (batch.length === 1) {
+        console.warn(`🗑️ Dropping queued event the backend rejected (HTTP ${res.status}):`, batch[0]);
+      } else {
+        const half = Math.ceil(batch.length / 2);
+        await this.postBacklog(batch.slice(0, half), progress);
+        await this.postBacklog(batch.slice(half), progress);
+        return;
+      }
+    } else if (!res.ok) {
+      throw new Error(`HTTP ${res.status}`);
+    }
+    progress.done += batch.length;
   }
-}
\ No newline at end of file
+}
+
+// The request itself is bad (e.g. 422): resending it won't help
+function isRejected(status) {
+  return status >= 400 && status < 500 && status !== 429;
+}